@@ -0,0 +1,33 @@
+"""add keyset pagination indexes
+
+Revision ID: 94d5206987d1
+Revises: ce5e1602d712
+Create Date: 2026-10-18 14:03:56.892032
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '94d5206987d1'
+down_revision: Union[str, Sequence[str], None] = 'ce5e1602d712'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Full (score DESC, timestamp, id) order so keyset pages need no sort step
+    op.create_index('ix_leaderboard_score_timestamp_id', 'leaderboard', [sa.text('score DESC'), 'timestamp', 'id'], unique=False)
+    op.drop_index('ix_leaderboard_mode_score', table_name='leaderboard')
+    op.create_index('ix_leaderboard_mode_score', 'leaderboard', ['mode', sa.text('score DESC'), 'timestamp', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_leaderboard_mode_score', table_name='leaderboard')
+    op.create_index('ix_leaderboard_mode_score', 'leaderboard', ['mode', sa.text('score DESC'), 'timestamp'], unique=False)
+    op.drop_index('ix_leaderboard_score_timestamp_id', table_name='leaderboard')
@@ -0,0 +1,46 @@
+"""add player_stats
+
+Revision ID: ad843a7c2bcb
+Revises: 1ce738e47e4f
+Create Date: 2026-10-18 14:01:50.598923
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'ad843a7c2bcb'
+down_revision: Union[str, Sequence[str], None] = '1ce738e47e4f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('player_stats',
+    sa.Column('username', sa.String(), nullable=False),
+    sa.Column('mode', sa.String(), nullable=False),
+    sa.Column('games_played', sa.Integer(), nullable=False),
+    sa.Column('best_score', sa.Integer(), nullable=False),
+    sa.Column('total_score', sa.BigInteger(), nullable=False),
+    sa.Column('last_played', sa.BigInteger(), nullable=True),
+    sa.PrimaryKeyConstraint('username', 'mode')
+    )
+    # Backfill from existing leaderboard rows
+    op.execute(
+        """
+        INSERT INTO player_stats (username, mode, games_played, best_score, total_score, last_played)
+        SELECT username, mode, COUNT(id), MAX(score), SUM(score), MAX(timestamp)
+        FROM leaderboard
+        WHERE username IS NOT NULL AND mode IS NOT NULL
+        GROUP BY username, mode
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('player_stats')
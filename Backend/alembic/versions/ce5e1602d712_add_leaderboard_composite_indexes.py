@@ -0,0 +1,32 @@
+"""add leaderboard composite indexes
+
+Revision ID: ce5e1602d712
+Revises: ad843a7c2bcb
+Create Date: 2026-10-18 14:02:44.200177
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'ce5e1602d712'
+down_revision: Union[str, Sequence[str], None] = 'ad843a7c2bcb'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_leaderboard_mode_score', 'leaderboard', ['mode', sa.text('score DESC'), 'timestamp'], unique=False)
+    op.create_index('ix_leaderboard_mode_timestamp_score', 'leaderboard', ['mode', 'timestamp', 'score'], unique=False)
+    op.create_index('ix_leaderboard_timestamp_score', 'leaderboard', ['timestamp', 'score'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_leaderboard_timestamp_score', table_name='leaderboard')
+    op.drop_index('ix_leaderboard_mode_timestamp_score', table_name='leaderboard')
+    op.drop_index('ix_leaderboard_mode_score', table_name='leaderboard')
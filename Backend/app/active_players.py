@@ -0,0 +1,148 @@
+import heapq
+import math
+import time
+from typing import Callable, Dict, List, Optional, Set
+
+from .core.config import settings
+
+# Who is playing right now, for GET /players/active.
+#
+# Game clients heartbeat (POST /players/heartbeat) with their current score and
+# mode, and every frame a player publishes to the relay counts as one too. A
+# player is dropped PLAYER_HEARTBEAT_TIMEOUT_SECONDS after the last one.
+#
+# Expiry uses a timer wheel instead of scanning every player: time is cut into
+# ticks of PLAYER_EXPIRY_RESOLUTION_SECONDS and each player sits in the slot of
+# the tick it expires at, so a heartbeat just moves one id between two sets.
+# There is no background task: each heartbeat or read first advances the wheel
+# to the current tick, emptying only the slots of the ticks that have passed.
+# Players are also grouped by mode, so a filtered read only touches that mode.
+
+
+class PlayerState:
+    __slots__ = ("id", "username", "mode", "score", "last_seen", "expires")
+
+    def __init__(self, player_id: str, username: str, mode: str):
+        self.id = player_id
+        self.username = username
+        self.mode = mode
+        self.score = 0
+        self.last_seen = 0.0
+        self.expires = 0
+
+
+class TimerWheel:
+    """Keys bucketed by the tick they expire at, for up to `span` ticks ahead."""
+
+    def __init__(self, span: int):
+        self.span = span
+        self._slots: List[Set[str]] = [set() for _ in range(span + 1)]
+        self.tick: Optional[int] = None
+
+    def schedule(self, key: str, tick: int) -> None:
+        self._slots[tick % len(self._slots)].add(key)
+
+    def cancel(self, key: str, tick: int) -> None:
+        self._slots[tick % len(self._slots)].discard(key)
+
+    def advance(self, tick: int) -> List[str]:
+        """Move to `tick`; returns the keys that expired on the way."""
+        if self.tick is None:
+            self.tick = tick
+            return []
+        expired: List[str] = []
+        # Every scheduled key is at most `span` ticks ahead of self.tick, so one
+        # lap of the wheel is as far as anything can be overdue
+        start = max(self.tick + 1, tick - self.span)
+        for t in range(start, tick + 1):
+            slot = self._slots[t % len(self._slots)]
+            if slot:
+                expired.extend(slot)
+                slot.clear()
+        self.tick = max(self.tick, tick)
+        return expired
+
+
+class ActivePlayerRegistry:
+    def __init__(self, timeout: float, resolution: float, clock: Callable[[], float] = time.monotonic):
+        self.timeout = timeout
+        self.resolution = resolution
+        self._clock = clock
+        # One extra tick, so nobody expires before a full `timeout` has passed
+        self._wheel = TimerWheel(math.ceil(timeout / resolution) + 1)
+        self._players: Dict[str, PlayerState] = {}
+        self._by_mode: Dict[str, Dict[str, PlayerState]] = {}
+        self.heartbeats = 0
+        self.expired = 0
+
+    def __len__(self) -> int:
+        self._advance()
+        return len(self._players)
+
+    def _advance(self) -> None:
+        for player_id in self._wheel.advance(int(self._clock() / self.resolution)):
+            self._forget(self._players[player_id])
+            self.expired += 1
+
+    def _forget(self, player: PlayerState) -> None:
+        del self._players[player.id]
+        players = self._by_mode[player.mode]
+        del players[player.id]
+        if not players:
+            del self._by_mode[player.mode]
+
+    def heartbeat(self, player_id: str, username: str, mode: str, score: int) -> None:
+        self._advance()
+        self.heartbeats += 1
+        player = self._players.get(player_id)
+        if player is None:
+            player = self._players[player_id] = PlayerState(player_id, username, mode)
+            self._by_mode.setdefault(mode, {})[player_id] = player
+        else:
+            self._wheel.cancel(player_id, player.expires)
+            if player.mode != mode:
+                self._forget(player)
+                player.mode = mode
+                self._players[player_id] = player
+                self._by_mode.setdefault(mode, {})[player_id] = player
+        player.username = username
+        player.score = score
+        player.last_seen = self._clock()
+        player.expires = self._wheel.tick + self._wheel.span
+        self._wheel.schedule(player_id, player.expires)
+
+    def remove(self, player_id: str) -> None:
+        player = self._players.get(player_id)
+        if player is not None:
+            self._wheel.cancel(player_id, player.expires)
+            self._forget(player)
+
+    def active(self, mode: Optional[str] = None, limit: Optional[int] = None) -> List[PlayerState]:
+        """Players by current score, highest first."""
+        self._advance()
+        if mode is None:
+            players = self._players.values()
+        else:
+            players = self._by_mode.get(mode, {}).values()
+        if limit is not None and limit < len(players):
+            return heapq.nlargest(limit, players, key=lambda player: player.score)
+        return sorted(players, key=lambda player: player.score, reverse=True)
+
+    def stats(self) -> dict:
+        self._advance()
+        return {
+            "active": len(self._players),
+            "by_mode": {mode: len(players) for mode, players in self._by_mode.items()},
+            "heartbeats": self.heartbeats,
+            "expired": self.expired,
+        }
+
+    def reset(self) -> None:
+        self._wheel = TimerWheel(self._wheel.span)
+        self._players = {}
+        self._by_mode = {}
+        self.heartbeats = 0
+        self.expired = 0
+
+
+active_players = ActivePlayerRegistry(settings.PLAYER_HEARTBEAT_TIMEOUT_SECONDS, settings.PLAYER_EXPIRY_RESOLUTION_SECONDS)
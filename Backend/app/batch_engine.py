@@ -0,0 +1,184 @@
+from typing import List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .engine import (
+    DIRECTION_CODES,
+    GRID_SIZE,
+    INITIAL_SPEED,
+    MIN_SPEED,
+    SPEED_STEP,
+    SnakeGame,
+    _DELTAS,
+)
+from .models import Direction, GameMode
+
+# K games stepped together with NumPy (requires the `sim` extra).
+#
+# Same state layout as app.engine.SnakeGame, one row per game: a ring-buffer
+# body, an occupancy grid, the free-cell array with its position map and a
+# mulberry32 state. Every array operation mirrors the scalar step in the same
+# order, so a batch and K scalar games fed the same seeds and turns stay
+# identical tick for tick. Modes may differ per game: moves are computed with
+# x/y arithmetic and the pass-through / walls rules applied as masks.
+
+_MASK32 = np.uint64(0xFFFFFFFF)
+_DX = np.array([dx for dx, _ in _DELTAS], dtype=np.int32)
+_DY = np.array([dy for _, dy in _DELTAS], dtype=np.int32)
+
+
+def mulberry32(state: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Vectorized app.engine.mulberry32 over uint64 arrays holding 32-bit values."""
+    state = (state + np.uint64(0x6D2B79F5)) & _MASK32
+    t = ((state ^ (state >> np.uint64(15))) * (state | np.uint64(1))) & _MASK32
+    t = ((t + (((t ^ (t >> np.uint64(7))) * (t | np.uint64(61))) & _MASK32)) & _MASK32) ^ t
+    return state, (t ^ (t >> np.uint64(14))) & _MASK32
+
+
+class BatchSnakeGame:
+    def __init__(
+        self,
+        modes: Union[GameMode, Sequence[GameMode]],
+        seeds: Sequence[int],
+        width: int = GRID_SIZE,
+        height: int = GRID_SIZE,
+    ):
+        k = len(seeds)
+        if isinstance(modes, GameMode):
+            modes = [modes] * k
+        self.size = k
+        self.width = width
+        self.height = height
+        cells = width * height
+        self.wrap = np.array([mode == GameMode.pass_through for mode in modes], dtype=bool)
+        self.seeds = np.array([seed & 0xFFFFFFFF for seed in seeds], dtype=np.uint64)
+
+        self.body = np.zeros((k, cells), dtype=np.int16)
+        self.head = np.zeros(k, dtype=np.int32)
+        self.tail = np.zeros(k, dtype=np.int32)
+        self.length = np.zeros(k, dtype=np.int32)
+        self.occupied = np.zeros((k, cells), dtype=bool)
+        self.free = np.zeros((k, cells), dtype=np.int16)
+        self.free_pos = np.zeros((k, cells), dtype=np.int16)
+        self.free_count = np.zeros(k, dtype=np.int32)
+        self.food = np.zeros(k, dtype=np.int32)
+        self.rng = np.zeros(k, dtype=np.uint64)
+        self.tick = np.zeros(k, dtype=np.int64)
+        self.score = np.zeros(k, dtype=np.int32)
+        self.interval_ms = np.zeros(k, dtype=np.int32)
+        self.direction = np.zeros(k, dtype=np.int8)
+        self.requested = np.zeros(k, dtype=np.int8)
+        self.alive = np.zeros(k, dtype=bool)
+
+        # Initial state is taken from the scalar engine so the two can't drift apart
+        self._template = SnakeGame(GameMode.pass_through, 0, width, height)
+        self.restart(np.ones(k, dtype=bool))
+
+    def restart(self, games: np.ndarray) -> None:
+        """Start fresh games (same seeds) where `games` is True."""
+        t = self._template
+        rows = np.flatnonzero(games)
+        self.body[rows] = t._body
+        self.head[rows] = t._head
+        self.tail[rows] = t._tail
+        self.length[rows] = t.length
+        self.occupied[rows] = np.frombuffer(bytes(t.occupied), dtype=np.uint8).astype(bool)
+        self.free[rows] = t._free + [0] * (len(t._free_pos) - len(t._free))
+        self.free_pos[rows] = t._free_pos
+        self.free_count[rows] = len(t._free)
+        self.food[rows] = t.food
+        self.rng[rows] = self.seeds[rows]
+        self.tick[rows] = 0
+        self.score[rows] = 0
+        self.interval_ms[rows] = INITIAL_SPEED
+        self.direction[rows] = t.direction
+        self.requested[rows] = -1
+        self.alive[rows] = True
+
+    def turn(self, directions: np.ndarray) -> np.ndarray:
+        """Per game direction code (-1 for none); returns which requests were accepted."""
+        directions = np.asarray(directions, dtype=np.int8)
+        accepted = (directions >= 0) & ((directions ^ 1) != self.direction)
+        self.requested[accepted] = directions[accepted]
+        return accepted
+
+    def step(self) -> np.ndarray:
+        """Advance every live game one tick. Returns the alive mask."""
+        active = self.alive
+        requested = active & (self.requested >= 0)
+        self.direction[requested] = self.requested[requested]
+        self.requested[requested] = -1
+
+        rows = np.flatnonzero(active)
+        direction = self.direction[rows]
+        cell = self.body[rows, self.head[rows]].astype(np.int32)
+        x = cell % self.width + _DX[direction]
+        y = cell // self.width + _DY[direction]
+        wrap = self.wrap[rows]
+        off_grid = (x < 0) | (x >= self.width) | (y < 0) | (y >= self.height)
+        x = np.where(wrap, x % self.width, x)
+        y = np.where(wrap, y % self.height, y)
+        cell = y * self.width + x
+        hit = off_grid & ~wrap
+        hit |= self.occupied[rows, np.where(hit, 0, cell)] & ~hit
+        self.alive[rows[hit]] = False
+
+        moving = ~hit
+        rows, cell = rows[moving], cell[moving]
+        cells = self.body.shape[1]
+        self.tick[rows] += 1
+        head = self.head[rows] + 1
+        head[head == cells] = 0
+        self.head[rows] = head
+        self.body[rows, head] = cell
+        self.occupied[rows, cell] = True
+        last_index = self.free_count[rows] - 1
+        last = self.free[rows, last_index]
+        index = self.free_pos[rows, cell]
+        self.free[rows, index] = last
+        self.free_pos[rows, last] = index
+        self.free_count[rows] = last_index
+
+        ate = cell == self.food[rows]
+        self._eat(rows[ate])
+        self._move_tail(rows[~ate])
+        return self.alive
+
+    def _eat(self, rows: np.ndarray) -> None:
+        self.length[rows] += 1
+        self.score[rows] += 1
+        self.interval_ms[rows] = np.maximum(MIN_SPEED, self.interval_ms[rows] - SPEED_STEP)
+        full = self.free_count[rows] == 0
+        # The snake fills the grid; nothing left to eat
+        self.food[rows[full]] = -1
+        rows = rows[~full]
+        self.rng[rows], value = mulberry32(self.rng[rows])
+        index = (value * self.free_count[rows].astype(np.uint64)) >> np.uint64(32)
+        self.food[rows] = self.free[rows, index.astype(np.int64)]
+
+    def _move_tail(self, rows: np.ndarray) -> None:
+        tail = self.tail[rows]
+        vacated = self.body[rows, tail]
+        self.occupied[rows, vacated] = False
+        count = self.free_count[rows]
+        self.free[rows, count] = vacated
+        self.free_pos[rows, vacated] = count
+        self.free_count[rows] = count + 1
+        tail += 1
+        tail[tail == self.body.shape[1]] = 0
+        self.tail[rows] = tail
+
+    def cells(self, game: int) -> List[Tuple[int, int]]:
+        """Snake cells of one game as (x, y), head first."""
+        size = self.body.shape[1]
+        order = (self.head[game] - np.arange(self.length[game])) % size
+        return [(int(c) % self.width, int(c) // self.width) for c in self.body[game, order]]
+
+    def food_cell(self, game: int) -> Optional[Tuple[int, int]]:
+        food = int(self.food[game])
+        return None if food < 0 else (food % self.width, food // self.width)
+
+
+def direction_codes(directions: Sequence[Optional[Direction]]) -> np.ndarray:
+    """Turn requests for BatchSnakeGame.turn (None for no request)."""
+    return np.array([-1 if d is None else DIRECTION_CODES[d] for d in directions], dtype=np.int8)
@@ -0,0 +1,83 @@
+from typing import Iterable
+
+from .active_players import active_players
+from .event_bus import event_bus
+from .leaderboard_index import IndexedEntry, leaderboard_index
+from .models import Coordinate, GameFrame, GameMode
+from .ranking import rank_engine
+from .relay import relay_hub
+
+# What the workers tell each other over the event bus, and how each one applies it.
+#
+#   "scores":   committed leaderboard rows -> the leaderboard index and rank engine
+#               (and through the index, the pre-rendered pages and the stream)
+#   "game":     live game frames and game ends -> remote relay channels and active players
+#   "presence": heartbeats -> active players
+#   "resync":   sent by the bus after losing a "scores" event -> the index and
+#               rank engine are dropped and reload from the database
+#
+# Score batches are split to fit the backend's payload limit (8000 bytes for
+# NOTIFY). Frames travel as [x, y] pairs rather than the client's JSON text,
+# which keeps a full-grid snake well under that limit.
+
+
+def share_scores(entries: Iterable) -> None:
+    event_bus.publish_batch("scores", [IndexedEntry.from_row(entry) for entry in entries])
+
+
+def share_frame(player_id: str, username: str, mode: GameMode, frame: GameFrame) -> None:
+    event_bus.publish("game", {
+        "player": player_id,
+        "username": username,
+        "mode": mode.value,
+        "snake": [(cell.x, cell.y) for cell in frame.snake],
+        "food": (frame.food.x, frame.food.y) if frame.food is not None else None,
+        "score": frame.score,
+        "direction": frame.direction.value,
+    })
+
+
+def share_game_end(player_id: str) -> None:
+    event_bus.publish("game", {"player": player_id, "end": True})
+
+
+def share_heartbeat(player_id: str, username: str, mode: GameMode, score: int) -> None:
+    event_bus.publish("presence", [player_id, username, mode.value, score])
+
+
+def _apply_scores(rows: list) -> None:
+    for row in rows:
+        entry = IndexedEntry(*row)
+        leaderboard_index.add(entry)
+        rank_engine.add(entry)
+
+
+def _apply_game(event: dict) -> None:
+    if event.get("end"):
+        relay_hub.close_remote(event["player"])
+        if not relay_hub.is_live(event["player"]):
+            active_players.remove(event["player"])
+        return
+    frame = GameFrame(
+        snake=[Coordinate(x=x, y=y) for x, y in event["snake"]],
+        food=Coordinate(x=event["food"][0], y=event["food"][1]) if event["food"] is not None else None,
+        score=event["score"],
+        direction=event["direction"],
+    )
+    relay_hub.publish_remote(event["player"], event["username"], GameMode(event["mode"]), frame)
+    active_players.heartbeat(event["player"], event["username"], event["mode"], frame.score)
+
+
+def _apply_heartbeat(heartbeat: list) -> None:
+    active_players.heartbeat(*heartbeat)
+
+
+def _apply_resync(_) -> None:
+    leaderboard_index.reset()
+    rank_engine.reset()
+
+
+event_bus.subscribe("scores", _apply_scores)
+event_bus.subscribe("game", _apply_game)
+event_bus.subscribe("presence", _apply_heartbeat)
+event_bus.subscribe("resync", _apply_resync)
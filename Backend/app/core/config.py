@@ -1,8 +1,113 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import field_validator
+from typing import Literal, Optional
 
 class Settings(BaseSettings):
     DATABASE_URL: str = "sqlite+aiosqlite:///./snake_game.db"
+
+    # Connection pool (Postgres). Size for workers x concurrent requests; overflow
+    # connections absorb bursts and are closed once returned.
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    # Seconds a request waits for a connection before failing
+    DB_POOL_TIMEOUT: float = 30.0
+    # Reconnect connections older than this (seconds); keeps ahead of server/proxy idle timeouts
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # asyncpg prepared statements cached per connection (0 behind pgbouncer in transaction mode)
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    # File-backed SQLite: one writer connection plus this many read-only ones
+    DB_SQLITE_READERS: int = 4
+    DB_SQLITE_BUSY_TIMEOUT_MS: int = 5000
+
+    # Number of top leaderboard entries kept in the process-local index
+    LEADERBOARD_INDEX_CAPACITY: int = 10000
+    # Page size for GET /leaderboard (keyset-paginated with ?cursor=)
+    LEADERBOARD_DEFAULT_LIMIT: int = 50
+    LEADERBOARD_MAX_LIMIT: int = 200
+    # Cache-Control for GET /leaderboard: fresh for max-age seconds, then served
+    # stale for up to stale-while-revalidate more while a proxy revalidates (ETag)
+    LEADERBOARD_CACHE_MAX_AGE: int = 2
+    LEADERBOARD_CACHE_STALE_WHILE_REVALIDATE: int = 30
+    # GET /leaderboard/stream: top-N pushes, coalesced over this window
+    LEADERBOARD_STREAM_COALESCE_MS: int = 250
+    LEADERBOARD_STREAM_DEFAULT_LIMIT: int = 10
+    LEADERBOARD_STREAM_MAX_LIMIT: int = 100
+    LEADERBOARD_STREAM_QUEUE_SIZE: int = 8
+
+    # Live spectating: frames buffered per spectator before the oldest is dropped
+    SPECTATE_QUEUE_SIZE: int = 8
+    SPECTATE_KEEPALIVE_SECONDS: float = 15.0
+    # protocol=delta streams send a full keyframe at least this often (in frames)
+    SPECTATE_KEYFRAME_INTERVAL: int = 50
+
+    # Active players (GET /players/active): dropped this long after their last
+    # heartbeat or relayed frame, checked at this granularity
+    PLAYER_HEARTBEAT_TIMEOUT_SECONDS: float = 15.0
+    PLAYER_EXPIRY_RESOLUTION_SECONDS: float = 1.0
+    ACTIVE_PLAYERS_DEFAULT_LIMIT: int = 100
+    ACTIVE_PLAYERS_MAX_LIMIT: int = 1000
+
+    # Score submissions with a replay are re-simulated before they're accepted.
+    # "required": reject scores without one; "optional": verify replays when sent
+    # (unverified scores still reach the boards); "off": ignore replays
+    SCORE_VERIFICATION: Literal["off", "optional", "required"] = "required"
+    # Worker processes for replay verification (default: one per CPU)
+    REPLAY_VERIFY_WORKERS: Optional[int] = None
+    # Replays queued or running before submissions get 429
+    REPLAY_VERIFY_MAX_PENDING: int = 64
+    REPLAY_MAX_TICKS: int = 500_000
+    # Verified replays: append-only segment files plus an offset index
+    REPLAY_STORE_DIR: str = "./replays"
+    REPLAY_SEGMENT_BYTES: int = 64 * 1024 * 1024
+    # Replay playback: engine checkpoints every N ticks make from_tick seeks cheap
+    REPLAY_CHECKPOINT_INTERVAL: int = 500
+    # Replays whose checkpoints are kept in memory (LRU)
+    REPLAY_CHECKPOINT_CACHE: int = 256
+    REPLAY_MAX_SPEED: float = 64.0
+
+    # Write-behind score ingestion: POST /leaderboard answers 202 once the score
+    # is journaled and queued; a background task batches the INSERTs
+    SCORE_WRITE_BEHIND: bool = False
+    SCORE_FLUSH_INTERVAL_MS: int = 50
+    SCORE_FLUSH_MAX_ROWS: int = 500
+    # Scores waiting to be flushed before submissions get 503
+    SCORE_QUEUE_MAX_ROWS: int = 10000
+    # "fsync" (survives a machine crash), "write" (survives a process crash) or "off"
+    SCORE_JOURNAL: Literal["off", "write", "fsync"] = "fsync"
+    SCORE_JOURNAL_DIR: str = "./journal"
+    SCORE_DRAIN_TIMEOUT_SECONDS: float = 30.0
+
+    # Per-request SQL query counts and DB time: Server-Timing headers plus
+    # per-route totals at /system/queries. Off by default.
+    QUERY_PROFILING: bool = False
+    # With profiling on, log statements (without parameters) slower than this
+    QUERY_SLOW_MS: Optional[float] = None
+
+    # GET /metrics (Prometheus). With several uvicorn workers, point this at a
+    # directory they share: each worker writes its counters there every
+    # METRICS_SNAPSHOT_INTERVAL_SECONDS and a scrape sums them all
+    METRICS_MULTIPROC_DIR: Optional[str] = None
+    METRICS_SNAPSHOT_INTERVAL_SECONDS: float = 5.0
+
+    # Cross-worker events (live games, applied scores, heartbeats).
+    # "auto": Postgres LISTEN/NOTIFY on Postgres; on SQLite, a Unix socket hub when
+    # WEB_CONCURRENCY > 1, otherwise in-process only
+    EVENT_BUS: Literal["auto", "in-process", "postgres", "socket"] = "auto"
+    EVENT_BUS_SOCKET_PATH: str = "./events.sock"
+    # Postgres: events waiting to be sent before new ones are dropped
+    EVENT_BUS_QUEUE_SIZE: int = 1024
+    # A game on another worker that sends nothing for this long is treated as gone
+    REMOTE_GAME_TIMEOUT_SECONDS: float = 30.0
+
+    # Bearer tokens are HMAC-signed with this key; set it (and share it across
+    # workers) in production. Empty means a random per-process key.
+    SECRET_KEY: str = ""
+    TOKEN_TTL_SECONDS: int = 7 * 24 * 3600
+
+    # Profile cache for /auth/me (user id -> user), per process
+    USER_CACHE_SIZE: int = 10000
+    USER_CACHE_TTL_SECONDS: float = 300.0
     
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
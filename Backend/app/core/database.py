@@ -1,12 +1,156 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+import time
+from typing import Optional
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from .config import settings
 
-engine = create_async_engine(
-    settings.DATABASE_URL,
-    echo=False, # Set to True for SQL logging
-    connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {}
-)
+# Pools come from DB_POOL_* settings and are instrumented: every checkout is
+# timed (how long the request waited for a connection) and in-use/overflow
+# peaks are tracked, exported at /system/pool.
+#
+# File-backed SQLite gets its own layout: WAL journal, one writer connection
+# (SQLite serializes writers anyway; queueing in the pool beats "database is
+# locked" retries) and a pool of read-only connections behind get_read_db.
+# Elsewhere (Postgres, in-memory SQLite) readers share the main engine.
+
+
+class PoolMetrics:
+    def __init__(self, name: str):
+        self.name = name
+        self.pool: Optional["InstrumentedQueuePool"] = None
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.peak_in_use = 0
+        self.peak_overflow = 0
+
+    def observe_wait(self, seconds: float) -> None:
+        self.checkouts += 1
+        self.wait_seconds += seconds
+        if seconds > self.max_wait_seconds:
+            self.max_wait_seconds = seconds
+        pool = self.pool
+        if pool is not None:
+            self.peak_in_use = max(self.peak_in_use, pool.checkedout())
+            self.peak_overflow = max(self.peak_overflow, pool.overflow())
+
+    def stats(self) -> dict:
+        pool = self.pool
+        return {
+            "size": pool.size() if pool else 0,
+            "max_overflow": pool._max_overflow if pool else 0,
+            "in_use": pool.checkedout() if pool else 0,
+            "idle": pool.checkedin() if pool else 0,
+            # QueuePool counts overflow from -pool_size; only connections beyond the pool matter here
+            "overflow": max(0, pool.overflow()) if pool else 0,
+            "peak_in_use": self.peak_in_use,
+            "peak_overflow": max(0, self.peak_overflow),
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "avg_wait_ms": self.wait_seconds / self.checkouts * 1000 if self.checkouts else 0.0,
+            "max_wait_ms": self.max_wait_seconds * 1000,
+        }
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    metrics: Optional[PoolMetrics] = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            if self.metrics is not None:
+                self.metrics.timeouts += 1
+            raise
+        if self.metrics is not None:
+            self.metrics.observe_wait(time.perf_counter() - start)
+        return connection
+
+    def recreate(self):
+        # engine.dispose() swaps in a fresh pool; keep reporting into the same metrics
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        if self.metrics is not None:
+            self.metrics.pool = pool
+        return pool
+
+
+pool_metrics: dict[str, PoolMetrics] = {}
+
+
+def instrument(engine: AsyncEngine, name: str) -> AsyncEngine:
+    pool = engine.sync_engine.pool
+    if isinstance(pool, InstrumentedQueuePool):
+        metrics = pool_metrics[name] = PoolMetrics(name)
+        pool.metrics = metrics
+        metrics.pool = pool
+    return engine
+
+
+def _sqlite_pragmas(read_only: bool):
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        # WAL makes synchronous=NORMAL durable against application crashes
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={settings.DB_SQLITE_BUSY_TIMEOUT_MS}")
+        if read_only:
+            cursor.execute("PRAGMA query_only=ON")
+        cursor.close()
+    return on_connect
+
+
+def build_engines(url: str) -> tuple[AsyncEngine, AsyncEngine]:
+    """(writer engine, reader engine); the same engine twice unless SQLite is file-backed."""
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite":
+        if parsed.database in (None, "", ":memory:"):
+            engine = create_async_engine(url, connect_args={"check_same_thread": False})
+            return engine, engine
+        writer = create_async_engine(
+            url,
+            connect_args={"check_same_thread": False},
+            poolclass=InstrumentedQueuePool,
+            pool_size=1,
+            max_overflow=0,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+        )
+        reader = create_async_engine(
+            url,
+            connect_args={"check_same_thread": False},
+            poolclass=InstrumentedQueuePool,
+            pool_size=settings.DB_SQLITE_READERS,
+            max_overflow=0,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+        )
+        event.listen(writer.sync_engine, "connect", _sqlite_pragmas(read_only=False))
+        event.listen(reader.sync_engine, "connect", _sqlite_pragmas(read_only=True))
+        return instrument(writer, "writer"), instrument(reader, "reader")
+
+    connect_args = {}
+    if parsed.get_backend_name() == "postgresql" and parsed.get_driver_name() == "asyncpg":
+        connect_args["prepared_statement_cache_size"] = settings.DB_STATEMENT_CACHE_SIZE
+    engine = create_async_engine(
+        url,
+        echo=False, # Set to True for SQL logging
+        connect_args=connect_args,
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+    )
+    return instrument(engine, "default"), engine
+
+
+engine, read_engine = build_engines(settings.DATABASE_URL)
 
 AsyncSessionLocal = async_sessionmaker(
     bind=engine,
@@ -15,9 +159,26 @@ AsyncSessionLocal = async_sessionmaker(
     autoflush=False,
 )
 
+AsyncReadSessionLocal = async_sessionmaker(
+    bind=read_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autoflush=False,
+)
+
 class Base(DeclarativeBase):
     pass
 
 async def get_db():
     async with AsyncSessionLocal() as session:
         yield session
+
+async def get_read_db():
+    # For handlers that only SELECT; on file-backed SQLite these don't queue behind the writer
+    async with AsyncReadSessionLocal() as session:
+        yield session
+
+async def dispose_engines() -> None:
+    await engine.dispose()
+    if read_engine is not engine:
+        await read_engine.dispose()
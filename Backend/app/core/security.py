@@ -0,0 +1,63 @@
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import secrets
+import time
+from typing import NamedTuple, Optional
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# Self-validating bearer tokens: base64url(claims JSON) "." base64url(HMAC-SHA256).
+# Claims are {"sub": user id, "name": username, "exp": unix seconds}, so
+# authenticating a request is one HMAC and a JSON parse, with no lookup.
+# Tokens can't be revoked before they expire; keep TOKEN_TTL_SECONDS modest.
+
+if settings.SECRET_KEY:
+    _key = settings.SECRET_KEY.encode()
+else:
+    _key = secrets.token_bytes(32)
+    logger.warning("SECRET_KEY is not set: using a random key, so tokens won't survive a restart or work across workers")
+
+
+class TokenClaims(NamedTuple):
+    user_id: str
+    username: str
+    expires: int
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _sign(payload: str) -> str:
+    return _b64encode(hmac.new(_key, payload.encode(), hashlib.sha256).digest())
+
+
+def create_token(user_id: str, username: str, ttl: Optional[int] = None) -> str:
+    expires = int(time.time()) + (settings.TOKEN_TTL_SECONDS if ttl is None else ttl)
+    payload = _b64encode(json.dumps({"sub": user_id, "name": username, "exp": expires}, separators=(",", ":")).encode())
+    return f"{payload}.{_sign(payload)}"
+
+
+def verify_token(token: str) -> Optional[TokenClaims]:
+    """The token's claims if the signature is ours and it hasn't expired, else None."""
+    payload, _, signature = token.partition(".")
+    # compare_digest only takes ASCII str; tokens come straight from the request
+    if not signature or not hmac.compare_digest(signature.encode(), _sign(payload).encode()):
+        return None
+    try:
+        claims = json.loads(_b64decode(payload))
+        result = TokenClaims(claims["sub"], claims["name"], claims["exp"])
+    except (ValueError, KeyError, TypeError):
+        return None
+    if result.expires <= time.time():
+        return None
+    return result
@@ -1,6 +1,10 @@
+from typing import Collection
+
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
-from .models_db import User, LeaderboardEntry
+from sqlalchemy import select, insert, func, case, delete, and_, or_, literal, null, union_all
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from .models_db import User, LeaderboardEntry, PlayerStats
 from .models import User as UserModel, LeaderboardEntry as LeaderboardEntryModel
 
 # CRUD operations
@@ -17,49 +21,172 @@ async def get_user(db: AsyncSession, user_id: str):
     result = await db.execute(select(User).where(User.id == user_id))
     return result.scalars().first()
 
+def _insert_object(obj):
+    # Every column of our rows is generated in Python (ids, timestamps), so
+    # there's nothing to read back: a Core INSERT of the object's values keeps it
+    # out of the session, where expire-on-commit would force a refresh SELECT.
+    return insert(type(obj)).values({c.key: getattr(obj, c.key) for c in obj.__table__.columns})
+
 async def create_user(db: AsyncSession, user: User) -> User:
-    db.add(user)
+    await db.execute(_insert_object(user))
     await db.commit()
-    await db.refresh(user)
     return user
 
-async def get_leaderboard(db: AsyncSession, limit: int = 50):
-    result = await db.execute(select(LeaderboardEntry).order_by(LeaderboardEntry.score.desc()).limit(limit))
+async def get_leaderboard(
+    db: AsyncSession,
+    limit: int = 50,
+    mode: str | None = None,
+    since: int | None = None,
+    until: int | None = None,
+    after: tuple[int, int, str] | None = None,
+):
+    # Served by ix_leaderboard_mode_score / ix_leaderboard_mode_timestamp_score when filtered
+    query = select(LeaderboardEntry)
+    if after is not None:
+        # Keyset pagination: rows ranked after (score, timestamp, id) in
+        # score DESC, timestamp ASC, id ASC order. The leading `score <= s` gives
+        # the planner an index range, so deep pages cost the same as the first.
+        score, timestamp, entry_id = after
+        query = query.where(
+            LeaderboardEntry.score <= score,
+            or_(
+                LeaderboardEntry.score < score,
+                LeaderboardEntry.timestamp > timestamp,
+                and_(LeaderboardEntry.timestamp == timestamp, LeaderboardEntry.id > entry_id),
+            ),
+        )
+    if mode is not None:
+        query = query.where(LeaderboardEntry.mode == mode)
+    if since is not None:
+        query = query.where(LeaderboardEntry.timestamp >= since)
+    if until is not None:
+        query = query.where(LeaderboardEntry.timestamp < until)
+    result = await db.execute(
+        query
+        .order_by(LeaderboardEntry.score.desc(), LeaderboardEntry.timestamp.asc(), LeaderboardEntry.id.asc())
+        .limit(limit)
+    )
     return result.scalars().all()
 
+def _upsert(db: AsyncSession, table):
+    # INSERT ... ON CONFLICT is dialect specific in SQLAlchemy
+    if db.get_bind().dialect.name == "postgresql":
+        return postgresql_insert(table)
+    return sqlite_insert(table)
+
+async def upsert_player_stats(db: AsyncSession, username: str, mode: str, score: int, timestamp: int):
+    # Single-statement increment of the player's aggregates; runs in the caller's transaction
+    await upsert_player_stats_many(db, [{
+        "username": username,
+        "mode": mode,
+        "games_played": 1,
+        "best_score": score,
+        "total_score": score,
+        "last_played": timestamp,
+    }])
+
+async def upsert_player_stats_many(db: AsyncSession, rows: list[dict]):
+    # Rows are increments, at most one per (username, mode): Postgres rejects a
+    # multi-row ON CONFLICT that touches the same row twice
+    stmt = _upsert(db, PlayerStats).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[PlayerStats.username, PlayerStats.mode],
+        set_={
+            "games_played": PlayerStats.games_played + stmt.excluded.games_played,
+            "best_score": case(
+                (stmt.excluded.best_score > PlayerStats.best_score, stmt.excluded.best_score),
+                else_=PlayerStats.best_score,
+            ),
+            "total_score": PlayerStats.total_score + stmt.excluded.total_score,
+            # The column is nullable; a NULL would make the comparison NULL and stick
+            "last_played": case(
+                (stmt.excluded.last_played > func.coalesce(PlayerStats.last_played, 0), stmt.excluded.last_played),
+                else_=PlayerStats.last_played,
+            ),
+        },
+    )
+    await db.execute(stmt)
+
 async def create_leaderboard_entry(db: AsyncSession, entry: LeaderboardEntry):
-    db.add(entry)
+    mode = entry.mode.value if hasattr(entry.mode, "value") else entry.mode
+    await db.execute(_insert_object(entry).values(mode=mode))
+    await upsert_player_stats(db, entry.username, mode, entry.score, entry.timestamp)
     await db.commit()
-    await db.refresh(entry)
     return entry
 
+async def create_leaderboard_entries(db: AsyncSession, entries) -> None:
+    # Batched write path (write_behind): one multi-row INSERT plus one multi-row
+    # player_stats upsert, committed together. `entries` have id, username,
+    # score, mode and timestamp attributes (e.g. leaderboard_index.IndexedEntry).
+    await db.execute(insert(LeaderboardEntry).values([
+        {"id": e.id, "username": e.username, "score": e.score, "mode": e.mode, "timestamp": e.timestamp}
+        for e in entries
+    ]))
+    stats = {}
+    for e in entries:
+        row = stats.get((e.username, e.mode))
+        if row is None:
+            stats[(e.username, e.mode)] = {
+                "username": e.username, "mode": e.mode, "games_played": 1,
+                "best_score": e.score, "total_score": e.score, "last_played": e.timestamp,
+            }
+        else:
+            row["games_played"] += 1
+            row["best_score"] = max(row["best_score"], e.score)
+            row["total_score"] += e.score
+            row["last_played"] = max(row["last_played"], e.timestamp)
+    await upsert_player_stats_many(db, list(stats.values()))
+    await db.commit()
+
+async def get_existing_entry_ids(db: AsyncSession, ids: list[str]) -> set[str]:
+    result = await db.execute(select(LeaderboardEntry.id).where(LeaderboardEntry.id.in_(ids)))
+    return set(result.scalars().all())
+
+async def get_score_counts(db: AsyncSession, since: int, ids: Collection[str]):
+    # (id, mode, score, 1) for entries newer than `since` (ms) or listed in `ids`,
+    # (None, mode, score, count) per score for all the others. One statement, so
+    # both halves read the same snapshot.
+    counted = or_(LeaderboardEntry.timestamp >= since, LeaderboardEntry.id.in_(ids))
+    rows = select(LeaderboardEntry.id, LeaderboardEntry.mode, LeaderboardEntry.score, literal(1)).where(counted)
+    histogram = (
+        select(null(), LeaderboardEntry.mode, LeaderboardEntry.score, func.count(LeaderboardEntry.id))
+        .where(~counted)
+        .group_by(LeaderboardEntry.mode, LeaderboardEntry.score)
+    )
+    result = await db.execute(union_all(rows, histogram))
+    return result.all()
+
 async def get_user_stats(db: AsyncSession, username: str):
-    # Games Played
-    result = await db.execute(select(func.count(LeaderboardEntry.id)).where(LeaderboardEntry.username == username))
-    games_played = result.scalar() or 0
-    
-    # Best Score
-    result = await db.execute(select(func.max(LeaderboardEntry.score)).where(LeaderboardEntry.username == username))
-    best_score = result.scalar() or 0
-    
-    # Rank (Global position based on best score)
-    # This is a bit simplified: Rank = count of unique players with higher max score + 1
-    # Or simpler: Rank = count of entries with higher score + 1 (if entries are game runs).
-    # Usually rank is per player.
-    # Let's do: Rank of THIS player's best score in the list of all scores.
-    # If best_score > 0:
-    #   rank = count(distinct username) where max(score) > my_best_score?
-    #   That's complex in SQL.
-    #   Simpler approach: Rank in the "Leaderboard" list (entries).
-    #   rank = count(entries) where score > best_score + 1.
-    
-    rank = 0
-    if best_score > 0:
-        result = await db.execute(select(func.count(LeaderboardEntry.id)).where(LeaderboardEntry.score > best_score))
-        rank = (result.scalar() or 0) + 1
-        
-    return {
-        "games_played": games_played,
-        "best_score": best_score,
-        "rank": rank if games_played > 0 else 0
-    }
+    # Primary-key range read on player_stats: one row per mode the player has played.
+    # Ranks are answered by ranking.rank_engine, not by counting rows here.
+    result = await db.execute(
+        select(
+            PlayerStats.mode,
+            PlayerStats.games_played,
+            PlayerStats.best_score,
+            PlayerStats.total_score,
+            PlayerStats.last_played,
+        ).where(PlayerStats.username == username)
+    )
+    return {row.mode: row for row in result.all()}
+
+async def rebuild_player_stats(db: AsyncSession) -> int:
+    # Recompute player_stats from the leaderboard table (backfill / repair)
+    await db.execute(delete(PlayerStats))
+    result = await db.execute(
+        PlayerStats.__table__.insert().from_select(
+            ["username", "mode", "games_played", "best_score", "total_score", "last_played"],
+            select(
+                LeaderboardEntry.username,
+                LeaderboardEntry.mode,
+                func.count(LeaderboardEntry.id),
+                func.max(LeaderboardEntry.score),
+                func.sum(LeaderboardEntry.score),
+                func.max(LeaderboardEntry.timestamp),
+            )
+            .where(LeaderboardEntry.username.is_not(None), LeaderboardEntry.mode.is_not(None))
+            .group_by(LeaderboardEntry.username, LeaderboardEntry.mode),
+        )
+    )
+    await db.commit()
+    return result.rowcount
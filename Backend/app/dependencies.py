@@ -1,19 +1,48 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
-from .core.database import get_db
+from .core.cache import TTLCache
+from .core.config import settings
+from .core.database import get_read_db
+from .core.security import verify_token
 from . import crud
-from .models_db import User
+from .models import TokenUser, User
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> User:
-    # In this implementation, the token is just the user ID
-    user = await crud.get_user(db, user_id=token)
+# user id -> User, for the few endpoints that need more than the token carries
+# (e.g. the email on /auth/me). Users are never updated or deleted; an endpoint
+# that starts doing so must invalidate the entry here and on the other workers.
+user_cache: TTLCache[User] = TTLCache(settings.USER_CACHE_SIZE, settings.USER_CACHE_TTL_SECONDS)
+
+def credentials_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid authentication credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+def get_user_from_token(token: str) -> TokenUser | None:
+    # Signed tokens carry the identity, so this is pure CPU: no database round trip
+    claims = verify_token(token)
+    if claims is None:
+        return None
+    return TokenUser(id=claims.user_id, username=claims.username)
+
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> TokenUser:
+    user = get_user_from_token(token)
     if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid authentication credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+        raise credentials_exception()
+    return user
+
+async def get_current_profile(current_user: TokenUser = Depends(get_current_user), db: AsyncSession = Depends(get_read_db)) -> User:
+    user = user_cache.get(current_user.id)
+    if user is not None:
+        return user
+    row = await crud.get_user(db, user_id=current_user.id)
+    if row is None:
+        # Validly signed, but the account is gone
+        raise credentials_exception()
+    user = User.model_validate(row)
+    user_cache.set(current_user.id, user)
     return user
@@ -0,0 +1,265 @@
+from array import array
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from .models import GRID_SIZE, Coordinate, Direction, GameFrame, GameMode
+
+# Authoritative snake simulation, tick for tick the same rules as the
+# frontend's useSnakeGame.ts:
+#   - a requested direction is applied at the start of the next tick; a
+#     request that reverses the current direction is ignored
+#   - pass-through wraps around the grid, walls ends the game off the edge
+#   - hitting any cell of the previous snake (tail included) ends the game
+#   - eating grows the snake by one, scores +1 and shortens the tick interval
+#
+# Cells are ints (y * width + x). The body is a ring buffer of cells and
+# `occupied` a bytearray over the grid, so collision checks are one index.
+# Cells not covered by the snake are kept in a dense array with a position
+# map (swap-remove), so new food is a single draw from a seeded mulberry32
+# generator instead of retrying random cells until one is free:
+#   food = free[(next_u32() * len(free)) >> 32]
+# The frontend (src/lib/replay.ts) runs the same generator with the same seed
+# and inputs, so it places food in the same cells. Initially `free` is every
+# cell in row-major order with the starting snake removed head first; each tick
+# removes the new head, then (unless the snake ate) appends the vacated tail cell.
+
+INITIAL_SPEED = 150  # ms per tick
+MIN_SPEED = 50
+SPEED_STEP = 2
+
+INITIAL_SNAKE = ((10, 10), (9, 10), (8, 10))
+INITIAL_FOOD = (15, 15)
+
+# Same codes as the binary spectate format; opposite directions differ in bit 0
+UP, DOWN, LEFT, RIGHT = 0, 1, 2, 3
+DIRECTION_CODES = {Direction.UP: UP, Direction.DOWN: DOWN, Direction.LEFT: LEFT, Direction.RIGHT: RIGHT}
+DIRECTIONS = {code: direction for direction, code in DIRECTION_CODES.items()}
+_DELTAS = ((0, -1), (0, 1), (-1, 0), (1, 0))
+
+_MASK32 = 0xFFFFFFFF
+
+
+
+class GameSnapshot(NamedTuple):
+    """Everything needed to resume a game; body is tail first, cells as uint16."""
+    tick: int
+    score: int
+    alive: bool
+    interval_ms: int
+    direction: int
+    requested: Optional[int]
+    food: int
+    rng: int
+    body: bytes
+    free: bytes
+
+
+_move_tables: Dict[Tuple[GameMode, int, int], Tuple[List[int], ...]] = {}
+
+
+def mulberry32(state: int) -> Tuple[int, int]:
+    """One step of mulberry32: (new state, 32-bit output)."""
+    state = (state + 0x6D2B79F5) & _MASK32
+    t = ((state ^ (state >> 15)) * (state | 1)) & _MASK32
+    t = ((t + (((t ^ (t >> 7)) * (t | 61)) & _MASK32)) & _MASK32) ^ t
+    return state, (t ^ (t >> 14)) & _MASK32
+
+
+def move_table(mode: GameMode, width: int, height: int) -> Tuple[List[int], ...]:
+    """Per direction, the cell one step from each cell (-1 for a wall)."""
+    key = (mode, width, height)
+    tables = _move_tables.get(key)
+    if tables is None:
+        wrap = mode == GameMode.pass_through
+        tables = []
+        for dx, dy in _DELTAS:
+            table = []
+            for cell in range(width * height):
+                x, y = cell % width + dx, cell // width + dy
+                if wrap:
+                    x, y = x % width, y % height
+                elif not (0 <= x < width and 0 <= y < height):
+                    table.append(-1)
+                    continue
+                table.append(y * width + x)
+            tables.append(table)
+        tables = _move_tables[key] = tuple(tables)
+    return tables
+
+
+class SnakeGame:
+    def __init__(self, mode: GameMode = GameMode.pass_through, seed: int = 0, width: int = GRID_SIZE, height: int = GRID_SIZE):
+        self.mode = mode
+        self.width = width
+        self.height = height
+        self.seed = seed & _MASK32
+        self._rng = self.seed
+        self._moves = move_table(mode, width, height)
+
+        cells = width * height
+        self._body = [0] * cells  # ring buffer, tail at _tail, head at _head
+        self._tail = 0
+        self._head = -1
+        self.length = 0
+        self.occupied = bytearray(cells)
+        self._free = list(range(cells))
+        self._free_pos = list(range(cells))
+
+        self.tick = 0
+        self.score = 0
+        self.alive = True
+        self.interval_ms = INITIAL_SPEED
+        self.direction = RIGHT
+        self._requested: Optional[int] = None
+
+        for x, y in reversed(INITIAL_SNAKE):
+            self._push_head(y * width + x)
+        for x, y in INITIAL_SNAKE:
+            self._take(y * width + x)
+        self.food = INITIAL_FOOD[1] * width + INITIAL_FOOD[0]
+
+    def _push_head(self, cell: int) -> None:
+        self._head += 1
+        if self._head == len(self._body):
+            self._head = 0
+        self._body[self._head] = cell
+        self.occupied[cell] = 1
+        self.length += 1
+
+    def _take(self, cell: int) -> None:
+        free, pos = self._free, self._free_pos
+        i = pos[cell]
+        last = free.pop()
+        if last != cell:
+            free[i] = last
+            pos[last] = i
+
+    def turn(self, direction: Direction) -> bool:
+        """Request a direction for the next tick; False if it would reverse the snake."""
+        code = DIRECTION_CODES[direction]
+        if code ^ 1 == self.direction:
+            return False
+        self._requested = code
+        return True
+
+    def step(self) -> bool:
+        """Advance one tick. Returns whether the snake is still alive."""
+        if not self.alive:
+            return False
+        if self._requested is not None:
+            self.direction = self._requested
+            self._requested = None
+        body = self._body
+        cell = self._moves[self.direction][body[self._head]]
+        occupied = self.occupied
+        if cell < 0 or occupied[cell]:
+            self.alive = False
+            return False
+        self.tick += 1
+
+        head = self._head + 1
+        if head == len(body):
+            head = 0
+        body[head] = cell
+        self._head = head
+        occupied[cell] = 1
+        free, pos = self._free, self._free_pos
+        last = free.pop()
+        if last != cell:
+            i = pos[cell]
+            free[i] = last
+            pos[last] = i
+
+        if cell == self.food:
+            self.length += 1
+            self.score += 1
+            if self.interval_ms > MIN_SPEED:
+                self.interval_ms = max(MIN_SPEED, self.interval_ms - SPEED_STEP)
+            self._place_food()
+        else:
+            tail = self._tail
+            vacated = body[tail]
+            occupied[vacated] = 0
+            pos[vacated] = len(free)
+            free.append(vacated)
+            tail += 1
+            self._tail = 0 if tail == len(body) else tail
+        return True
+
+    def _place_food(self) -> None:
+        free = self._free
+        if not free:
+            # The snake fills the grid; nothing left to eat
+            self.food = -1
+            return
+        self._rng, value = mulberry32(self._rng)
+        self.food = free[(value * len(free)) >> 32]
+
+    def cells(self) -> List[Tuple[int, int]]:
+        """Snake cells as (x, y), head first."""
+        body, width, size = self._body, self.width, len(self._body)
+        return [
+            (body[(self._head - i) % size] % width, body[(self._head - i) % size] // width)
+            for i in range(self.length)
+        ]
+
+    def snapshot(self) -> GameSnapshot:
+        size = len(self._body)
+        body = array("H", [self._body[(self._tail + i) % size] for i in range(self.length)])
+        return GameSnapshot(
+            self.tick, self.score, self.alive, self.interval_ms, self.direction, self._requested,
+            self.food, self._rng, body.tobytes(), array("H", self._free).tobytes(),
+        )
+
+    @classmethod
+    def restore(cls, mode: GameMode, seed: int, snapshot: GameSnapshot, width: int = GRID_SIZE, height: int = GRID_SIZE) -> "SnakeGame":
+        game = cls(mode, seed, width, height)
+        body, free = array("H"), array("H")
+        body.frombytes(snapshot.body)
+        free.frombytes(snapshot.free)
+        game._body[:len(body)] = body
+        game._tail, game._head, game.length = 0, len(body) - 1, len(body)
+        game.occupied = bytearray(width * height)
+        for cell in body:
+            game.occupied[cell] = 1
+        game._free = free.tolist()
+        for i, cell in enumerate(game._free):
+            game._free_pos[cell] = i
+        game.tick, game.score, game.alive = snapshot.tick, snapshot.score, snapshot.alive
+        game.interval_ms, game.direction, game._requested = snapshot.interval_ms, snapshot.direction, snapshot.requested
+        game.food, game._rng = snapshot.food, snapshot.rng
+        return game
+
+    @property
+    def head(self) -> int:
+        """The head's cell index (y * width + x)."""
+        return self._body[self._head]
+
+    @property
+    def food_cell(self) -> Optional[Tuple[int, int]]:
+        return None if self.food < 0 else (self.food % self.width, self.food // self.width)
+
+    def to_frame(self) -> GameFrame:
+        food = self.food_cell
+        return GameFrame(
+            snake=[Coordinate(x=x, y=y) for x, y in self.cells()],
+            food=Coordinate(x=food[0], y=food[1]) if food is not None else None,
+            score=self.score,
+            direction=DIRECTIONS[self.direction],
+        )
+
+
+def run_replay(mode: GameMode, seed: int, inputs: Iterable[Tuple[int, int]], ticks: int) -> SnakeGame:
+    """Replay (tick, direction code) inputs for at most `ticks` moves, or until the snake dies.
+
+    An input for tick t is requested once t moves have been made, i.e. it takes
+    effect on move t + 1. Inputs must be in tick order.
+    """
+    game = SnakeGame(mode, seed)
+    inputs = iter(inputs)
+    pending = next(inputs, None)
+    while game.alive and game.tick < ticks:
+        while pending is not None and pending[0] <= game.tick:
+            game.turn(DIRECTIONS[pending[1]])
+            pending = next(inputs, None)
+        game.step()
+    return game
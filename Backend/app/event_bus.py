@@ -0,0 +1,446 @@
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from .core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Cross-worker broadcast. Code that changes process-local state (a published
+# frame, an applied score, a heartbeat) applies it locally as before and
+# publishes a (topic, data) event; every *other* worker applies it from its
+# subscribe() handler. Delivery is best-effort and unordered across publishers,
+# like the relay itself. Events published with critical=True (applied scores)
+# can't just be skipped: when one is lost (too large, a full queue, a failed
+# NOTIFY) the bus sends a "resync" event as soon as it can, and the other
+# workers rebuild that state from the database. A worker that was off the bus
+# for a while (a dropped LISTEN connection, a lost or replaced hub) may have
+# missed events too, and runs its own "resync" handlers once it is back.
+#
+# The transport is a pluggable backend:
+#   - InProcessBackend: a single worker, nothing to send (the default)
+#   - PostgresBackend: LISTEN/NOTIFY on one connection from the app's asyncpg engine
+#   - UnixSocketBackend: for SQLite. The first worker to take a lock file
+#     becomes the hub on a Unix socket and relays each line to the others. When
+#     the hub exits, a surviving worker takes over. A peer too slow to keep up
+#     is disconnected, and rejoins.
+# Events travel as one JSON line {"o": origin, "t": topic, "d": data}; workers
+# ignore their own (NOTIFY also delivers to the sender).
+
+Handler = Callable[[Any], None]
+
+
+class InProcessBackend:
+    name = "in-process"
+    shared = False
+    max_payload = None
+
+    async def start(self, receive: Callable[[str], None], lost: Callable[[], None], missed: Callable[[], None]) -> None:
+        pass
+
+    def send(self, line: str, critical: bool = False) -> bool:
+        return True
+
+    async def stop(self) -> None:
+        pass
+
+
+class PostgresBackend:
+    name = "postgres"
+    shared = True
+    CHANNEL = "snake_events"
+    # NOTIFY payloads must be shorter than 8000 bytes
+    max_payload = 7999
+
+    def __init__(self, engine: AsyncEngine, queue_size: int):
+        self.engine = engine
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._conn: Optional[AsyncConnection] = None
+        self._driver = None
+        self._receive: Optional[Callable[[str], None]] = None
+        self._lost: Optional[Callable[[], None]] = None
+        self._missed: Optional[Callable[[], None]] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watcher: Optional[asyncio.Task] = None
+        self._connecting = asyncio.Lock()
+        self._dropped = asyncio.Event()
+        self._listened = False
+
+    async def _listen(self) -> None:
+        # Held for the life of the process: LISTEN is tied to one connection
+        self._conn = await self.engine.connect()
+        raw = await self._conn.get_raw_connection()
+        self._driver = raw.driver_connection
+        self._driver.add_termination_listener(self._on_terminate)
+        await self._driver.add_listener(self.CHANNEL, self._on_notify)
+        if self._listened:
+            # Whatever was sent while we weren't listening is gone
+            self._missed()
+        self._listened = True
+
+    async def _connect(self) -> None:
+        async with self._connecting:
+            if self._driver is None or self._driver.is_closed():
+                await self._close()
+                try:
+                    await self._listen()
+                except Exception:
+                    await self._close()
+                    raise
+
+    def _on_notify(self, connection, pid, channel, payload: str) -> None:
+        self._receive(payload)
+
+    def _on_terminate(self, connection) -> None:
+        if connection is self._driver:
+            self._dropped.set()
+
+    async def _watch(self) -> None:
+        # The connection can die while there's nothing to send; LISTEN again right away
+        while True:
+            await self._dropped.wait()
+            self._dropped.clear()
+            delay = 0.1
+            while True:
+                try:
+                    await self._connect()
+                    break
+                except Exception:
+                    logger.warning("Event bus: LISTEN connection lost, reconnecting in %.1fs", delay, exc_info=True)
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, 5.0)
+
+    async def _close(self) -> None:
+        if self._conn is not None:
+            try:
+                await self._conn.invalidate()
+            except Exception:
+                pass
+        self._conn = self._driver = None
+
+    async def start(self, receive: Callable[[str], None], lost: Callable[[], None], missed: Callable[[], None]) -> None:
+        self._receive = receive
+        self._lost = lost
+        self._missed = missed
+        try:
+            await self._listen()
+        except Exception:
+            # The send loop connects on the first event
+            logger.warning("Event bus: could not LISTEN yet", exc_info=True)
+            await self._close()
+        self._task = asyncio.create_task(self._run())
+        self._watcher = asyncio.create_task(self._watch())
+
+    def send(self, line: str, critical: bool = False) -> bool:
+        if len(line.encode()) > self.max_payload:
+            return False
+        try:
+            self._queue.put_nowait((line, critical))
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    async def _run(self) -> None:
+        delay = 0.1
+        while True:
+            batch = [await self._queue.get()]
+            while not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                await self._connect()
+                # The listening connection can also send; one round trip per batch
+                await self._driver.executemany("SELECT pg_notify($1, $2)", [(self.CHANNEL, line) for line, _ in batch])
+                delay = 0.1
+            except Exception:
+                # Events are best-effort: drop this batch and reconnect
+                logger.exception("Event bus: NOTIFY failed, reconnecting in %.1fs", delay)
+                if any(critical for _, critical in batch):
+                    self._lost()
+                await self._close()
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 5.0)
+
+    async def stop(self) -> None:
+        for task in (self._task, self._watcher):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._task = self._watcher = None
+        if self._driver is not None:
+            self._driver.remove_termination_listener(self._on_terminate)
+            try:
+                await self._driver.remove_listener(self.CHANNEL, self._on_notify)
+            except Exception:
+                pass
+            await self._conn.close()
+        self._conn = self._driver = None
+
+
+class UnixSocketBackend:
+    name = "unix-socket"
+    shared = True
+    # Lines waiting for a slow peer before its events are dropped
+    MAX_BUFFER = 1024 * 1024
+    # Longest line a peer's StreamReader accepts
+    max_payload = MAX_BUFFER - 1
+
+    def __init__(self, path: str):
+        self.path = path
+        self.is_hub = False
+        self._receive: Optional[Callable[[str], None]] = None
+        self._missed: Optional[Callable[[], None]] = None
+        self._task: Optional[asyncio.Task] = None
+        self._lock_fd: Optional[int] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._clients: Set[asyncio.StreamWriter] = set()
+        self._hub: Optional[asyncio.StreamWriter] = None
+        self._connected = asyncio.Event()
+
+    async def start(self, receive: Callable[[str], None], lost: Callable[[], None], missed: Callable[[], None]) -> None:
+        self._receive = receive
+        self._missed = missed
+        self._task = asyncio.create_task(self._run())
+        # Don't serve requests before this worker is on the bus
+        try:
+            await asyncio.wait_for(self._connected.wait(), timeout=5)
+        except asyncio.TimeoutError:
+            logger.warning("Event bus: no hub at %s yet, continuing", self.path)
+
+    def _take_lock(self) -> bool:
+        fd = os.open(f"{self.path}.lock", os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self._lock_fd = fd
+        return True
+
+    async def _run(self) -> None:
+        rejoining = False
+        while True:
+            if self._take_lock():
+                await self._serve()
+                if rejoining:
+                    self._missed()
+                return
+            try:
+                reader, writer = await asyncio.open_unix_connection(self.path, limit=self.MAX_BUFFER)
+            except (FileNotFoundError, ConnectionRefusedError):
+                # The hub is starting up (or handing over)
+                await asyncio.sleep(0.05)
+                continue
+            self._hub = writer
+            self._connected.set()
+            if rejoining:
+                # Off the bus since the last hub dropped us
+                self._missed()
+            rejoining = True
+            try:
+                async for line in reader:
+                    self._receive(line.decode())
+            except (ConnectionError, ValueError):
+                pass
+            finally:
+                self._hub = None
+                writer.close()
+            logger.info("Event bus: lost the hub at %s, re-electing", self.path)
+
+    async def _serve(self) -> None:
+        # Holding the lock means any socket file left behind is stale
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._server = await asyncio.start_unix_server(self._serve_client, self.path, limit=self.MAX_BUFFER)
+        self.is_hub = True
+        self._connected.set()
+        logger.info("Event bus: hub listening on %s", self.path)
+
+    async def _serve_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._clients.add(writer)
+        try:
+            async for line in reader:
+                self._receive(line.decode())
+                self._fan_out(line, skip=writer)
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            self._clients.discard(writer)
+            writer.close()
+
+    def _write(self, writer: asyncio.StreamWriter, data: bytes) -> bool:
+        if writer.is_closing() or writer.transport.get_write_buffer_size() > self.MAX_BUFFER:
+            return False
+        writer.write(data)
+        return True
+
+    def _fan_out(self, data: bytes, skip: Optional[asyncio.StreamWriter] = None) -> None:
+        for client in list(self._clients):
+            if client is not skip and not self._write(client, data):
+                # Dropping the event would leave the peer silently stale;
+                # disconnect it instead, and it resyncs when it rejoins
+                self._clients.discard(client)
+                client.close()
+
+    def send(self, line: str, critical: bool = False) -> bool:
+        data = line.encode() + b"\n"
+        if len(data) > self.max_payload:
+            return False
+        if self.is_hub:
+            self._fan_out(data)
+            return True
+        if self._hub is None:
+            return False
+        return self._write(self._hub, data)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._hub is not None:
+            self._hub.close()
+            self._hub = None
+        if self._server is not None:
+            self._server.close()
+            for client in list(self._clients):
+                client.close()
+            self._server = None
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+        self.is_hub = False
+        self._connected.clear()
+
+
+class EventBus:
+    def __init__(self):
+        self.origin = uuid.uuid4().hex[:12]
+        self.backend = InProcessBackend()
+        self._handlers: Dict[str, List[Handler]] = {}
+        # A critical event was lost; the other workers need a "resync"
+        self.resync_pending = False
+        self.published = 0
+        self.received = 0
+        self.dropped = 0
+        self.resyncs = 0
+
+    def subscribe(self, topic: str, handler: Handler) -> None:
+        """Run handler(data) for each `topic` event published by another worker."""
+        self._handlers.setdefault(topic, []).append(handler)
+
+    def _encode(self, topic: str, data: Any) -> str:
+        return json.dumps({"o": self.origin, "t": topic, "d": data}, separators=(",", ":"))
+
+    def _send(self, line: str, critical: bool) -> None:
+        if self.resync_pending:
+            if not self.backend.send(self._encode("resync", None), critical=True):
+                return self._drop(critical)
+            self.resync_pending = False
+            self.resyncs += 1
+        if self.backend.send(line, critical):
+            self.published += 1
+        else:
+            self._drop(critical)
+
+    def _drop(self, critical: bool) -> None:
+        self.dropped += 1
+        if critical:
+            self.resync_pending = True
+
+    def lost(self) -> None:
+        """Called by backends that lose critical events after accepting them."""
+        self.resync_pending = True
+
+    def missed(self) -> None:
+        """Called by backends that may have missed other workers' events; resyncs this worker."""
+        self._dispatch("resync", None)
+
+    def publish(self, topic: str, data: Any, critical: bool = False) -> None:
+        """Send to the other workers; never blocks. The caller has already applied it locally."""
+        if not self.backend.shared:
+            return
+        self._send(self._encode(topic, data), critical)
+
+    def publish_batch(self, topic: str, items: list) -> None:
+        """A critical list event, split into as many events as the backend's payload limit needs."""
+        if not self.backend.shared or not items:
+            return
+        line = self._encode(topic, items)
+        limit = self.backend.max_payload
+        if limit is not None and len(line.encode()) > limit and len(items) > 1:
+            middle = len(items) // 2
+            self.publish_batch(topic, items[:middle])
+            self.publish_batch(topic, items[middle:])
+            return
+        self._send(line, critical=True)
+
+    def receive(self, line: str) -> None:
+        try:
+            event = json.loads(line)
+        except ValueError:
+            return
+        if event.get("o") == self.origin:
+            return
+        self.received += 1
+        self._dispatch(event.get("t"), event.get("d"))
+
+    def _dispatch(self, topic: str, data: Any) -> None:
+        for handler in self._handlers.get(topic, ()):
+            try:
+                handler(data)
+            except Exception:
+                logger.exception("Event bus: handler for %r failed", topic)
+
+    async def start(self, backend) -> None:
+        self.backend = backend
+        await backend.start(self.receive, self.lost, self.missed)
+
+    async def stop(self) -> None:
+        await self.backend.stop()
+        self.backend = InProcessBackend()
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.backend.name,
+            "origin": self.origin,
+            "hub": getattr(self.backend, "is_hub", None),
+            "published": self.published,
+            "received": self.received,
+            "dropped": self.dropped,
+            "resyncs": self.resyncs,
+        }
+
+
+def create_backend(engine: AsyncEngine):
+    """The backend for EVENT_BUS; "auto" picks Postgres, or the socket hub when running several SQLite workers."""
+    choice = settings.EVENT_BUS
+    if choice == "auto":
+        if make_url(settings.DATABASE_URL).get_backend_name() == "postgresql":
+            choice = "postgres"
+        elif int(os.environ.get("WEB_CONCURRENCY", "1")) > 1:
+            choice = "socket"
+        else:
+            choice = "in-process"
+    if choice == "postgres":
+        return PostgresBackend(engine, settings.EVENT_BUS_QUEUE_SIZE)
+    if choice == "socket":
+        return UnixSocketBackend(settings.EVENT_BUS_SOCKET_PATH)
+    return InProcessBackend()
+
+
+event_bus = EventBus()
@@ -0,0 +1,201 @@
+import json
+import struct
+from typing import List, Optional, Tuple, Union
+
+from .models import Direction, GameFrame, StreamEncoding, StreamProtocol
+
+# Spectate wire formats.
+#
+# protocol=full  : every message is a complete GameFrame (the original format).
+# protocol=delta : a keyframe, then small diffs against the previous message:
+#     keyframe  {"t":"k","snake":[[x,y],...],"food":[x,y],"score":s,"direction":"UP"}
+#     delta     {"t":"d","h":[[x,y],...],"r":n[,"f":[x,y]][,"s":ds][,"d":"LEFT"]}
+#   where h are the new head cells (newest first), r the number of tail cells
+#   removed, and f/s/d are only present when food, score or direction changed.
+#   Food is null once the snake fills the grid.
+#   A keyframe is re-sent every `keyframe_interval` messages and whenever the
+#   change can't be expressed as a diff (new game, teleport).
+#
+# encoding=binary packs the same messages with struct (little endian):
+#     keyframe  B type=1 | B direction | i score | h food_x | h food_y | H n | n * (h x, h y)
+#     delta     B type=2 | B flags | B heads | H removed | heads * (h x, h y)
+#               [h food_x, h food_y if flags & 1] [i score_delta if flags & 2] [B direction if flags & 4]
+# Binary messages go out as WebSocket binary frames, or base64 in SSE `data:` lines,
+# with no food sent as (-1, -1).
+
+Cell = Tuple[int, int]
+
+KEYFRAME = 1
+DELTA = 2
+FLAG_FOOD = 1
+FLAG_SCORE = 2
+FLAG_DIRECTION = 4
+
+DIRECTION_CODES = {Direction.UP: 0, Direction.DOWN: 1, Direction.LEFT: 2, Direction.RIGHT: 3}
+DIRECTIONS = {code: direction for direction, code in DIRECTION_CODES.items()}
+
+# How many new head cells a delta may carry (frames dropped in between)
+MAX_DELTA_HEADS = 16
+
+_KEY_HEADER = struct.Struct("<BBihhH")
+_DELTA_HEADER = struct.Struct("<BBBH")
+_CELL = struct.Struct("<hh")
+_SCORE = struct.Struct("<i")
+NO_FOOD = (-1, -1)
+
+
+class FrameState:
+    __slots__ = ("snake", "food", "score", "direction")
+
+    def __init__(self, snake: List[Cell], food: Optional[Cell], score: int, direction: Direction):
+        self.snake = snake
+        self.food = food
+        self.score = score
+        self.direction = direction
+
+    @classmethod
+    def from_frame(cls, frame: GameFrame) -> "FrameState":
+        return cls(
+            [(c.x, c.y) for c in frame.snake],
+            (frame.food.x, frame.food.y) if frame.food is not None else None,
+            frame.score,
+            Direction(frame.direction),
+        )
+
+    def to_frame(self) -> GameFrame:
+        return GameFrame(
+            snake=[{"x": x, "y": y} for x, y in self.snake],
+            food={"x": self.food[0], "y": self.food[1]} if self.food is not None else None,
+            score=self.score,
+            direction=self.direction,
+        )
+
+
+def diff(old: FrameState, new: FrameState) -> Optional[Tuple[List[Cell], int]]:
+    """(new head cells, tail cells removed) turning old.snake into new.snake, or None."""
+    for heads in range(0, min(len(new.snake), MAX_DELTA_HEADS) + 1):
+        kept = len(new.snake) - heads
+        if kept > len(old.snake):
+            continue
+        if new.snake[heads:] == old.snake[:kept]:
+            return new.snake[:heads], len(old.snake) - kept
+    return None
+
+
+def encode_keyframe(state: FrameState, encoding: StreamEncoding) -> Union[str, bytes]:
+    if encoding == StreamEncoding.binary:
+        food = state.food or NO_FOOD
+        parts = [_KEY_HEADER.pack(KEYFRAME, DIRECTION_CODES[state.direction], state.score, food[0], food[1], len(state.snake))]
+        parts.extend(_CELL.pack(x, y) for x, y in state.snake)
+        return b"".join(parts)
+    return json.dumps(
+        {"t": "k", "snake": state.snake, "food": state.food, "score": state.score, "direction": state.direction.value},
+        separators=(",", ":"),
+    )
+
+
+def encode_delta(old: FrameState, new: FrameState, heads: List[Cell], removed: int, encoding: StreamEncoding) -> Union[str, bytes]:
+    food_changed = new.food != old.food
+    score_delta = new.score - old.score
+    direction_changed = new.direction != old.direction
+    if encoding == StreamEncoding.binary:
+        flags = (FLAG_FOOD if food_changed else 0) | (FLAG_SCORE if score_delta else 0) | (FLAG_DIRECTION if direction_changed else 0)
+        parts = [_DELTA_HEADER.pack(DELTA, flags, len(heads), removed)]
+        parts.extend(_CELL.pack(x, y) for x, y in heads)
+        if food_changed:
+            parts.append(_CELL.pack(*(new.food or NO_FOOD)))
+        if score_delta:
+            parts.append(_SCORE.pack(score_delta))
+        if direction_changed:
+            parts.append(bytes([DIRECTION_CODES[new.direction]]))
+        return b"".join(parts)
+    message = {"t": "d", "h": heads, "r": removed}
+    if food_changed:
+        message["f"] = new.food
+    if score_delta:
+        message["s"] = score_delta
+    if direction_changed:
+        message["d"] = new.direction.value
+    return json.dumps(message, separators=(",", ":"))
+
+
+class FrameEncoder:
+    """Encodes one stream of frames; delta mode diffs against the last frame it encoded."""
+
+    def __init__(self, protocol: StreamProtocol = StreamProtocol.full, encoding: StreamEncoding = StreamEncoding.json, keyframe_interval: int = 50):
+        self.protocol = protocol
+        self.encoding = encoding
+        self.keyframe_interval = keyframe_interval
+        self._previous: Optional[FrameState] = None
+        self._since_keyframe = 0
+
+    def encode(self, frame: GameFrame) -> Union[str, bytes]:
+        if self.protocol == StreamProtocol.full and self.encoding == StreamEncoding.json:
+            return frame.model_dump_json()
+
+        state = FrameState.from_frame(frame)
+        if self.protocol == StreamProtocol.full:
+            return encode_keyframe(state, self.encoding)
+
+        previous, self._previous = self._previous, state
+        if previous is not None and self._since_keyframe < self.keyframe_interval:
+            change = diff(previous, state)
+            if change is not None:
+                self._since_keyframe += 1
+                return encode_delta(previous, state, change[0], change[1], self.encoding)
+        self._since_keyframe = 0
+        return encode_keyframe(state, self.encoding)
+
+    def keyframe(self, frame: GameFrame) -> Union[str, bytes]:
+        """A standalone message for `frame`, without touching the diff state."""
+        if self.protocol == StreamProtocol.full and self.encoding == StreamEncoding.json:
+            return frame.model_dump_json()
+        return encode_keyframe(FrameState.from_frame(frame), self.encoding)
+
+    def reset(self) -> None:
+        """Next frame goes out as a keyframe (e.g. a new game started)."""
+        self._previous = None
+
+
+def _cell(value: Optional[list]) -> Optional[Cell]:
+    return tuple(value) if value is not None else None
+
+
+def decode(message: Union[str, bytes], previous: Optional[FrameState]) -> FrameState:
+    """Reference decoder for delta streams (JSON or binary); used by tests and tooling."""
+    if isinstance(message, bytes):
+        kind = message[0]
+        if kind == KEYFRAME:
+            _, direction, score, food_x, food_y, n = _KEY_HEADER.unpack_from(message)
+            offset = _KEY_HEADER.size
+            snake = [_CELL.unpack_from(message, offset + i * _CELL.size) for i in range(n)]
+            food = (food_x, food_y) if (food_x, food_y) != NO_FOOD else None
+            return FrameState(snake, food, score, DIRECTIONS[direction])
+        _, flags, n, removed = _DELTA_HEADER.unpack_from(message)
+        offset = _DELTA_HEADER.size
+        heads = [_CELL.unpack_from(message, offset + i * _CELL.size) for i in range(n)]
+        offset += n * _CELL.size
+        food, score, direction = previous.food, previous.score, previous.direction
+        if flags & FLAG_FOOD:
+            food = _CELL.unpack_from(message, offset)
+            food = food if food != NO_FOOD else None
+            offset += _CELL.size
+        if flags & FLAG_SCORE:
+            score += _SCORE.unpack_from(message, offset)[0]
+            offset += _SCORE.size
+        if flags & FLAG_DIRECTION:
+            direction = DIRECTIONS[message[offset]]
+    else:
+        data = json.loads(message)
+        if data["t"] == "k":
+            return FrameState(
+                [tuple(c) for c in data["snake"]], _cell(data["food"]), data["score"], Direction(data["direction"])
+            )
+        heads = [tuple(c) for c in data["h"]]
+        removed = data["r"]
+        food = _cell(data["f"]) if "f" in data else previous.food
+        score = previous.score + data.get("s", 0)
+        direction = Direction(data["d"]) if "d" in data else previous.direction
+
+    body = previous.snake[: len(previous.snake) - removed] if removed else previous.snake
+    return FrameState(heads + body, food, score, direction)
@@ -0,0 +1,118 @@
+import asyncio
+import json
+from typing import Dict, List, Optional, Set, Tuple
+
+from .core.config import settings
+from .leaderboard_index import IndexedEntry, leaderboard_index
+from .relay import StreamFormat, Subscription
+
+# Push updates for GET /leaderboard/stream.
+#
+# Subscribers are grouped by (mode, top N). Each group remembers the top N it
+# last sent. Any score applied to the leaderboard index schedules one flush
+# LEADERBOARD_STREAM_COALESCE_MS later: a burst of submissions becomes a single
+# update per group. The update is the diff between the old and the new top N,
+# encoded once per group and shared by all of its subscribers:
+#
+#   event: update
+#   data: {"ops": [{"op": "drop", "id": ...}, {"op": "insert", "index": k, "entry": {...}}]}
+#
+# Clients remove the dropped ids, then apply the inserts in order. Subscribers
+# reuse the relay's bounded queues. A subscriber that falls behind has its
+# queue cleared and gets a fresh snapshot, because a lost diff can't be patched
+# over (the relay resyncs delta streams the same way).
+
+GroupKey = Tuple[Optional[str], int]
+
+
+def _entry_json(entry: IndexedEntry) -> dict:
+    return entry._asdict()
+
+
+def diff_top(old: List[IndexedEntry], new: List[IndexedEntry]) -> List[dict]:
+    new_ids = {entry.id for entry in new}
+    old_ids = {entry.id for entry in old}
+    ops = [{"op": "drop", "id": entry.id} for entry in old if entry.id not in new_ids]
+    ops += [{"op": "insert", "index": k, "entry": _entry_json(entry)} for k, entry in enumerate(new) if entry.id not in old_ids]
+    return ops
+
+
+class FeedGroup:
+    def __init__(self, mode: Optional[str], limit: int, entries: List[IndexedEntry]):
+        self.mode = mode
+        self.limit = limit
+        self.entries = entries
+        self.subscribers: Set[Subscription] = set()
+        self.updates = 0
+
+    def snapshot(self) -> bytes:
+        payload = json.dumps({"entries": [_entry_json(entry) for entry in self.entries]}, separators=(",", ":"))
+        return b"event: snapshot\ndata: " + payload.encode() + b"\n\n"
+
+    def refresh(self) -> None:
+        board = leaderboard_index.board(self.mode)
+        if not board.loaded:
+            return
+        entries = board.top(self.limit)
+        ops = diff_top(self.entries, entries)
+        if not ops:
+            return
+        self.entries = entries
+        self.updates += 1
+        message = b"event: update\ndata: " + json.dumps({"ops": ops}, separators=(",", ":")).encode() + b"\n\n"
+        snapshot = None
+        for subscription in self.subscribers:
+            if not subscription.push(message):
+                subscription.clear()
+                snapshot = snapshot or self.snapshot()
+                subscription.push(snapshot)
+
+
+class LeaderboardFeed:
+    def __init__(self, coalesce_seconds: float, queue_size: int):
+        self.coalesce_seconds = coalesce_seconds
+        self.queue_size = queue_size
+        self._groups: Dict[GroupKey, FeedGroup] = {}
+        self._flush: Optional[asyncio.TimerHandle] = None
+
+    def subscribe(self, mode: Optional[str], limit: int, entries: List[IndexedEntry]) -> Subscription:
+        """Join the (mode, limit) group; `entries` is the current top, used if the group is new."""
+        group = self._groups.get((mode, limit))
+        if group is None:
+            group = self._groups[(mode, limit)] = FeedGroup(mode, limit, list(entries))
+        subscription = Subscription(StreamFormat(transport="sse"), self.queue_size)
+        subscription.push(group.snapshot())
+        group.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, mode: Optional[str], limit: int, subscription: Subscription) -> None:
+        group = self._groups.get((mode, limit))
+        if group is None:
+            return
+        group.subscribers.discard(subscription)
+        if not group.subscribers:
+            del self._groups[(mode, limit)]
+
+    def notify(self) -> None:
+        # Called for every score applied to the index; only the first one in a window schedules work
+        if not self._groups or self._flush is not None:
+            return
+        self._flush = asyncio.get_running_loop().call_later(self.coalesce_seconds, self.flush)
+
+    def flush(self) -> None:
+        self._flush = None
+        for group in list(self._groups.values()):
+            group.refresh()
+
+    def subscriber_count(self) -> int:
+        return sum(len(group.subscribers) for group in self._groups.values())
+
+    def reset(self) -> None:
+        if self._flush is not None:
+            self._flush.cancel()
+        self._flush = None
+        self._groups = {}
+
+
+leaderboard_feed = LeaderboardFeed(settings.LEADERBOARD_STREAM_COALESCE_MS / 1000, settings.LEADERBOARD_STREAM_QUEUE_SIZE)
+leaderboard_index.listeners.append(leaderboard_feed.notify)
@@ -0,0 +1,244 @@
+import asyncio
+import bisect
+import logging
+import time
+import uuid
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .core.config import settings
+from .models import LeaderboardWindow
+from . import crud
+
+logger = logging.getLogger(__name__)
+
+# Process-local ranked index over the top of the `leaderboard` table.
+# Writes go to the database first (crud.create_leaderboard_entry) and are then
+# applied here, so GET /leaderboard never has to run ORDER BY score DESC.
+#
+# There is one board per (mode, window, bucket): mode None is the combined
+# board, and daily/weekly windows are UTC calendar buckets. Each board is
+# built from the database the first time it is read (using the composite
+# (mode, timestamp, score) index) and then maintained by write-through, so a
+# windowed read is a slice of at most `limit` entries.
+#
+# `version` counts applied writes and `epoch` names this process's index, so
+# (epoch, version, bucket) identifies the content of any board in this process:
+# GET /leaderboard re-renders a cached page only when its revision moves on.
+
+SortKey = Tuple[int, int, str]
+BoardKey = Tuple[Optional[str], LeaderboardWindow, int]
+
+DAY_MS = 86_400_000
+WEEK_MS = 7 * DAY_MS
+# 1970-01-01 was a Thursday; shift so weekly buckets start on Monday
+WEEK_OFFSET_MS = 3 * DAY_MS
+
+
+def window_bucket(window: LeaderboardWindow, timestamp: int) -> int:
+    if window == LeaderboardWindow.daily:
+        return timestamp // DAY_MS
+    if window == LeaderboardWindow.weekly:
+        return (timestamp + WEEK_OFFSET_MS) // WEEK_MS
+    return 0
+
+
+def bucket_bounds(window: LeaderboardWindow, bucket: int) -> Tuple[Optional[int], Optional[int]]:
+    """[start, end) of a bucket in ms; (None, None) for all-time."""
+    if window == LeaderboardWindow.daily:
+        return bucket * DAY_MS, (bucket + 1) * DAY_MS
+    if window == LeaderboardWindow.weekly:
+        start = bucket * WEEK_MS - WEEK_OFFSET_MS
+        return start, start + WEEK_MS
+    return None, None
+
+
+class IndexedEntry(NamedTuple):
+    id: str
+    username: str
+    score: int
+    mode: str
+    timestamp: int
+
+    @classmethod
+    def from_row(cls, row) -> "IndexedEntry":
+        mode = row.mode.value if hasattr(row.mode, "value") else row.mode
+        return cls(row.id, row.username, row.score, mode, row.timestamp)
+
+    @property
+    def sort_key(self) -> SortKey:
+        # Same ordering as crud.get_leaderboard: score DESC, timestamp ASC, id ASC
+        return (-self.score, self.timestamp, self.id)
+
+
+class RankedBoard:
+    """Sorted top-`capacity` entries of one board, kept in two parallel lists.
+
+    A board only ever holds its best `capacity` entries. Entries are never
+    deleted from the table, so anything that falls off the tail can never come
+    back and the board stays exact for any read of up to `capacity` rows.
+    """
+
+    def __init__(self, capacity: int, mode: Optional[str] = None, since: Optional[int] = None, until: Optional[int] = None):
+        self.capacity = capacity
+        self.mode = mode
+        self.since = since
+        self.until = until
+        self._keys: List[SortKey] = []
+        self._entries: List[IndexedEntry] = []
+        self._loaded = False
+        self._loading = False
+        self._pending: List[IndexedEntry] = []
+        self._lock = asyncio.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def matches(self, entry: IndexedEntry) -> bool:
+        if self.mode is not None and entry.mode != self.mode:
+            return False
+        if self.since is not None and not (self.since <= entry.timestamp < self.until):
+            return False
+        return True
+
+    async def load(self, db: AsyncSession) -> None:
+        """Build the board from the database (once; concurrent callers wait)."""
+        async with self._lock:
+            if self._loaded:
+                return
+            self._loading = True
+            try:
+                rows = await crud.get_leaderboard(
+                    db, limit=self.capacity, mode=self.mode, since=self.since, until=self.until
+                )
+                self._keys = []
+                self._entries = []
+                for row in rows:
+                    entry = IndexedEntry.from_row(row)
+                    self._keys.append(entry.sort_key)
+                    self._entries.append(entry)
+                # Entries written while the SELECT was in flight; _insert() is idempotent
+                for entry in self._pending:
+                    self._insert(entry)
+                self._loaded = True
+            finally:
+                self._pending = []
+                self._loading = False
+
+    def add(self, entry: IndexedEntry) -> None:
+        if not self.matches(entry):
+            return
+        if self._loaded:
+            self._insert(entry)
+        elif self._loading:
+            self._pending.append(entry)
+        # Not loaded yet: the next load() reads it from the database.
+
+    def _insert(self, entry: IndexedEntry) -> None:
+        key = entry.sort_key
+        i = bisect.bisect_left(self._keys, key)
+        if i < len(self._keys) and self._keys[i] == key:
+            return
+        if i >= self.capacity:
+            return
+        self._keys.insert(i, key)
+        self._entries.insert(i, entry)
+        if len(self._entries) > self.capacity:
+            self._keys.pop()
+            self._entries.pop()
+
+    def page(self, limit: int, after: Optional[SortKey] = None) -> Optional[List[IndexedEntry]]:
+        """Up to `limit` entries ranked strictly after `after`, or None if the board can't answer.
+
+        Seeking is a bisect, so a deep page costs the same as the first one.
+        """
+        if not self._loaded:
+            return None
+        start = 0 if after is None else bisect.bisect_right(self._keys, after)
+        end = start + limit
+        # A board holding fewer than `capacity` entries holds everything in its scope
+        if end > len(self._entries) and len(self._entries) >= self.capacity:
+            return None
+        return self._entries[start:end]
+
+    def top(self, limit: int) -> List[IndexedEntry]:
+        return self._entries[:limit]
+
+
+class LeaderboardIndex:
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._boards: Dict[BoardKey, RankedBoard] = {}
+        self.epoch = uuid.uuid4().hex[:8]
+        self.version = 0
+        # Called after each applied score (e.g. the live leaderboard feed)
+        self.listeners: List[Callable[[], None]] = []
+
+    def revision(self, window: LeaderboardWindow = LeaderboardWindow.all_time, now: Optional[int] = None) -> str:
+        # Daily/weekly boards also change when a new bucket starts
+        if now is None:
+            now = int(time.time() * 1000)
+        return f"{self.epoch}.{self.version}.{window_bucket(window, now)}"
+
+    def board(self, mode: Optional[str] = None, window: LeaderboardWindow = LeaderboardWindow.all_time, now: Optional[int] = None) -> RankedBoard:
+        """The board for the bucket containing `now` (ms); created empty if needed."""
+        if now is None:
+            now = int(time.time() * 1000)
+        bucket = window_bucket(window, now)
+        key = (mode, window, bucket)
+        board = self._boards.get(key)
+        if board is None:
+            # A new bucket has started: boards for earlier buckets of this window are dead
+            for stale in [k for k in self._boards if k[0] == mode and k[1] == window]:
+                del self._boards[stale]
+            since, until = bucket_bounds(window, bucket)
+            board = RankedBoard(self.capacity, mode=mode, since=since, until=until)
+            self._boards[key] = board
+        return board
+
+    async def read(
+        self,
+        db: AsyncSession,
+        limit: int,
+        mode: Optional[str] = None,
+        window: LeaderboardWindow = LeaderboardWindow.all_time,
+        after: Optional[Tuple[int, int, str]] = None,
+    ) -> list:
+        """Up to `limit` entries, optionally after the (score, timestamp, id) keyset cursor `after`."""
+        board = self.board(mode, window)
+        if not board.loaded:
+            await board.load(db)
+        page = board.page(limit, None if after is None else (-after[0], after[1], after[2]))
+        if page is not None:
+            return page
+        # Deeper than the in-memory board: keyset query, same cost at any depth
+        return await crud.get_leaderboard(
+            db, limit=limit, mode=mode, since=board.since, until=board.until, after=after
+        )
+
+    async def load(self, db: AsyncSession) -> None:
+        # Startup warm-up: the combined all-time board is the one every client reads
+        await self.board().load(db)
+
+    def add(self, row) -> None:
+        """Apply a committed leaderboard row to every live board it belongs to."""
+        entry = IndexedEntry.from_row(row)
+        for board in list(self._boards.values()):
+            board.add(entry)
+        self.version += 1
+        for listener in self.listeners:
+            listener()
+
+    def reset(self) -> None:
+        """Drop all state; the next read reloads from the database."""
+        self._boards = {}
+        self.epoch = uuid.uuid4().hex[:8]
+        self.version = 0
+
+
+leaderboard_index = LeaderboardIndex(settings.LEADERBOARD_INDEX_CAPACITY)
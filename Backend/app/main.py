@@ -2,12 +2,56 @@ from fastapi import FastAPI, HTTPException
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse, RedirectResponse
 from fastapi.middleware.cors import CORSMiddleware
-from .routers import auth, leaderboard, spectate
+from contextlib import asynccontextmanager
+import logging
+from .routers import auth, leaderboard, metrics, spectate, system
+from .core.database import AsyncSessionLocal, dispose_engines, engine
+from .event_bus import create_backend, event_bus
+from . import cluster  # noqa: F401  (registers the event bus handlers)
+from .leaderboard_index import leaderboard_index
+from .ranking import rank_engine
+from .relay import relay_hub
+from .verification import replay_verifier
+from .write_behind import score_writer
+from .profiling import QueryProfilingMiddleware, query_profiler
+from .metrics import MetricsMiddleware, snapshot_writer
+from .core.config import settings
+
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Joined before anything is loaded, so no event is missed in between
+    await event_bus.start(create_backend(engine))
+    if event_bus.backend.shared:
+        # Ends games relayed from a worker that died mid-game
+        relay_hub.start()
+    if settings.SCORE_WRITE_BEHIND:
+        # Replays any journaled scores before the indexes are loaded
+        await score_writer.start(AsyncSessionLocal)
+    # Warm the in-memory indexes so the first reader doesn't pay for the load.
+    # If the schema isn't there yet, the first read loads them lazily.
+    try:
+        async with AsyncSessionLocal() as db:
+            await leaderboard_index.load(db)
+            await rank_engine.load(db)
+    except Exception:
+        logger.warning("Could not warm leaderboard indexes at startup", exc_info=True)
+    if settings.METRICS_MULTIPROC_DIR:
+        snapshot_writer.start(settings.METRICS_MULTIPROC_DIR, settings.METRICS_SNAPSHOT_INTERVAL_SECONDS)
+    yield
+    await snapshot_writer.stop()
+    await score_writer.stop()
+    await relay_hub.stop()
+    await event_bus.stop()
+    replay_verifier.shutdown()
+    await dispose_engines()
 
 app = FastAPI(
     title="Snake Game Cosmic API",
     description="Backend API for the Snake Game Cosmic application.",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 # CORS (Allow all for development)
@@ -17,12 +61,20 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Server-Timing", "ETag"],
 )
+# A no-op unless QUERY_PROFILING is set
+app.add_middleware(QueryProfilingMiddleware)
+app.add_middleware(MetricsMiddleware)
+if settings.QUERY_PROFILING:
+    query_profiler.enable(settings.QUERY_SLOW_MS)
 
 # Include routers
 app.include_router(auth.router)
 app.include_router(leaderboard.router)
 app.include_router(spectate.router)
+app.include_router(system.router)
+app.include_router(metrics.router)
 
 
 
@@ -0,0 +1,301 @@
+import asyncio
+import bisect
+import glob
+import json
+import logging
+import os
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .core.database import pool_metrics
+
+logger = logging.getLogger(__name__)
+
+# Prometheus text-format metrics for GET /metrics, with no client library.
+#
+# Each uvicorn worker keeps its own counters as plain dicts: they're only
+# touched from the event loop, so there are no locks. Every sample (histogram
+# buckets included) is a sum across workers, so with several workers each one
+# periodically writes its samples to METRICS_MULTIPROC_DIR/worker-<pid>.json and
+# the worker that answers a scrape adds up the other workers' latest snapshots
+# and its own live values. Snapshots of workers that have exited are removed.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = Tuple[str, ...]
+# (sample name, ((label, value), ...)) -> value
+Samples = Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float]
+
+
+class Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Labels = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values: Dict[Labels, float] = {}
+
+    def samples(self) -> Iterable[Tuple[str, Tuple[Tuple[str, str], ...], float]]:
+        for labels, value in self._values.items():
+            yield self.name, tuple(zip(self.labelnames, labels)), value
+
+    def clear(self) -> None:
+        self._values.clear()
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, labels: Labels = (), amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def set(self, labels: Labels = (), value: float = 0.0) -> None:
+        # Only for counters mirrored from another monotonic source (see _collect_pools)
+        self._values[labels] = value
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def inc(self, labels: Labels = (), amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def dec(self, labels: Labels = (), amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) - amount
+
+    def set(self, labels: Labels = (), value: float = 0.0) -> None:
+        self._values[labels] = value
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Labels = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = buckets
+        # labels -> [count per bucket (the last is +Inf), sum]
+        self._series: Dict[Labels, list] = {}
+
+    def observe(self, labels: Labels, value: float) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def samples(self):
+        for labels, (counts, total) in self._series.items():
+            base = tuple(zip(self.labelnames, labels))
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                yield f"{self.name}_bucket", (*base, ("le", _format_value(bound))), cumulative
+            yield f"{self.name}_sum", base, total
+            yield f"{self.name}_count", base, cumulative
+
+    def clear(self) -> None:
+        self._series.clear()
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(int(value)) if value == int(value) else repr(value)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[Metric] = []
+        self._collectors: List[Callable[[], None]] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collect: Callable[[], None]) -> None:
+        # Called before each collection, to refresh gauges read from elsewhere
+        self._collectors.append(collect)
+
+    def collect(self) -> Samples:
+        for collect in self._collectors:
+            collect()
+        samples: Samples = {}
+        for metric in self._metrics:
+            for name, labels, value in metric.samples():
+                samples[(name, labels)] = value
+        return samples
+
+    def render(self, samples: Samples) -> str:
+        by_name: Dict[str, list] = {}
+        for (name, labels), value in samples.items():
+            by_name.setdefault(name, []).append((labels, value))
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            names = [metric.name] if metric.type != "histogram" else [f"{metric.name}_{suffix}" for suffix in ("bucket", "sum", "count")]
+            for name in names:
+                for labels, value in by_name.get(name, ()):
+                    label_text = ",".join(f'{key}="{_escape(val)}"' for key, val in labels)
+                    lines.append(f"{name}{{{label_text}}} {_format_value(value)}" if label_text else f"{name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        for metric in self._metrics:
+            metric.clear()
+
+
+registry = Registry()
+
+http_request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "Time to serve a request, by route template (streaming responses excluded)", ("method", "route"),
+))
+http_requests = registry.register(Counter("http_requests_total", "Requests served, by route template and status", ("method", "route", "status")))
+http_in_flight = registry.register(Gauge("http_requests_in_flight", "Requests currently being served"))
+spectate_connections = registry.register(Gauge("spectate_connections", "Open spectator streams", ("transport",)))
+spectate_frames = registry.register(Counter("spectate_frames_sent_total", "Frames sent to spectators; rate() gives frames per second", ("transport",)))
+db_pool_in_use = registry.register(Gauge("db_pool_connections_in_use", "Connections checked out of the pool", ("engine",)))
+db_pool_overflow = registry.register(Gauge("db_pool_overflow_connections", "Connections open beyond pool_size", ("engine",)))
+db_pool_size = registry.register(Gauge("db_pool_size", "Configured pool size", ("engine",)))
+db_pool_checkouts = registry.register(Counter("db_pool_checkouts_total", "Connections handed out by the pool", ("engine",)))
+db_pool_wait = registry.register(Counter("db_pool_checkout_wait_seconds_total", "Time spent waiting for a pooled connection", ("engine",)))
+db_pool_timeouts = registry.register(Counter("db_pool_checkout_timeouts_total", "Checkouts that gave up waiting", ("engine",)))
+
+
+def _collect_pools() -> None:
+    for name, metrics in pool_metrics.items():
+        stats = metrics.stats()
+        db_pool_in_use.set((name,), stats["in_use"])
+        db_pool_overflow.set((name,), stats["overflow"])
+        db_pool_size.set((name,), stats["size"])
+        db_pool_checkouts.set((name,), metrics.checkouts)
+        db_pool_wait.set((name,), metrics.wait_seconds)
+        db_pool_timeouts.set((name,), metrics.timeouts)
+
+
+registry.add_collector(_collect_pools)
+
+
+class SnapshotWriter:
+    """Shares this worker's samples with the others through METRICS_MULTIPROC_DIR."""
+
+    def __init__(self):
+        self.directory: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.directory, f"worker-{os.getpid()}.json")
+
+    def write(self) -> None:
+        samples = [[name, list(labels), value] for (name, labels), value in registry.collect().items()]
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(samples, f)
+        os.replace(tmp, self.path)
+
+    async def _run(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self.write()
+            except OSError:
+                logger.warning("Could not write metrics snapshot", exc_info=True)
+
+    def start(self, directory: str, interval: float) -> None:
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.write()
+        self._task = asyncio.create_task(self._run(interval))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.directory is not None:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+            self.directory = None
+
+    def other_workers(self) -> Iterable[Samples]:
+        if self.directory is None:
+            return
+        for path in glob.glob(os.path.join(self.directory, "worker-*.json")):
+            pid = int(os.path.basename(path)[len("worker-"):-len(".json")])
+            if pid == os.getpid():
+                continue
+            try:
+                os.kill(pid, 0)
+            except ProcessLookupError:
+                # That worker is gone; its counters restart with its replacement
+                os.remove(path)
+                continue
+            except PermissionError:
+                pass
+            try:
+                with open(path) as f:
+                    rows = json.load(f)
+            except (OSError, ValueError):
+                continue
+            yield {(name, tuple(tuple(pair) for pair in labels)): value for name, labels, value in rows}
+
+
+snapshot_writer = SnapshotWriter()
+
+
+def render_metrics() -> str:
+    samples = registry.collect()
+    for other in snapshot_writer.other_workers():
+        for key, value in other.items():
+            samples[key] = samples.get(key, 0.0) + value
+    return registry.render(samples)
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware: request latency per route template and requests in flight."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        start = time.perf_counter()
+        status = 500
+        streaming = False
+
+        async def send_and_observe(message):
+            nonlocal status, streaming
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                for key, value in message.get("headers", ()):
+                    if key == b"content-type" and value.startswith(b"text/event-stream"):
+                        # SSE responses last as long as the viewer stays; they're counted elsewhere
+                        streaming = True
+            await send(message)
+
+        http_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_and_observe)
+        finally:
+            http_in_flight.dec()
+            route = getattr(scope.get("route"), "path", None)
+            if route is None:
+                # Unmatched paths would make one series per URL
+                route = "unmatched"
+            method = scope["method"]
+            http_requests.inc((method, route, str(status)))
+            if not streaming:
+                http_request_duration.observe((method, route), time.perf_counter() - start)
@@ -1,11 +1,28 @@
-from pydantic import BaseModel, EmailStr, Field, ConfigDict
-from typing import List
+from pydantic import BaseModel, EmailStr, Field, ConfigDict, field_validator
+from typing import List, Optional
 from enum import Enum
 
+GRID_SIZE = 20
+# One point per food: nothing legitimate scores more than the grid has cells
+MAX_SCORE = GRID_SIZE * GRID_SIZE
+
 class GameMode(str, Enum):
     pass_through = "pass-through"
     walls = "walls"
 
+class LeaderboardWindow(str, Enum):
+    all_time = "all-time"
+    daily = "daily"
+    weekly = "weekly"
+
+class StreamProtocol(str, Enum):
+    full = "full"
+    delta = "delta"
+
+class StreamEncoding(str, Enum):
+    json = "json"
+    binary = "binary"
+
 class Direction(str, Enum):
     UP = "UP"
     DOWN = "DOWN"
@@ -13,8 +30,8 @@ class Direction(str, Enum):
     RIGHT = "RIGHT"
 
 class Coordinate(BaseModel):
-    x: int
-    y: int
+    x: int = Field(..., ge=0, lt=GRID_SIZE)
+    y: int = Field(..., ge=0, lt=GRID_SIZE)
 
 class User(BaseModel):
     id: str = Field(..., json_schema_extra={"example": "user_12345"})
@@ -23,6 +40,11 @@ class User(BaseModel):
 
     model_config = ConfigDict(from_attributes=True)
 
+class TokenUser(BaseModel):
+    # Identity carried by a signed token; enough to act as the user without a lookup
+    id: str
+    username: str
+
 class LeaderboardEntry(BaseModel):
     id: str
     username: str
@@ -38,10 +60,16 @@ class ActivePlayer(BaseModel):
     currentScore: int
     mode: GameMode
 
+class Heartbeat(BaseModel):
+    score: int = Field(ge=0)
+    mode: GameMode
+
 class GameFrame(BaseModel):
-    snake: List[Coordinate]
-    food: Coordinate
-    score: int
+    # Bounded so every frame fits the binary spectator encoding (frame_codec)
+    snake: List[Coordinate] = Field(..., max_length=GRID_SIZE * GRID_SIZE)
+    # None once the snake fills the grid
+    food: Optional[Coordinate]
+    score: int = Field(..., ge=0, le=MAX_SCORE)
     direction: Direction
 
 class LoginRequest(BaseModel):
@@ -53,9 +81,27 @@ class SignupRequest(BaseModel):
     email: EmailStr
     password: str
 
+class ReplayInput(BaseModel):
+    tick: int = Field(..., ge=0, description="Moves made before this direction was requested")
+    direction: Direction
+
+class Replay(BaseModel):
+    seed: int = Field(..., ge=0, le=0xFFFFFFFF, description="mulberry32 seed used for food placement")
+    # Stored as a uint32 in the replay record header
+    ticks: int = Field(..., ge=0, le=0xFFFFFFFF, description="Moves made in the game")
+    inputs: List[ReplayInput] = []
+
+    @field_validator("inputs")
+    @classmethod
+    def inputs_in_tick_order(cls, inputs: List[ReplayInput]) -> List[ReplayInput]:
+        if any(a.tick > b.tick for a, b in zip(inputs, inputs[1:])):
+            raise ValueError("inputs must be in tick order")
+        return inputs
+
 class SubmitScoreRequest(BaseModel):
-    score: int
+    score: int = Field(..., ge=0, le=MAX_SCORE)
     mode: GameMode
+    replay: Optional[Replay] = None
 
 class Token(BaseModel):
     access_token: str
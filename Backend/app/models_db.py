@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, BigInteger
+from sqlalchemy import Column, Integer, String, BigInteger, Index
 from .core.database import Base
 
 class User(Base):
@@ -17,3 +17,24 @@ class LeaderboardEntry(Base):
     score = Column(Integer, index=True)
     mode = Column(String, index=True) # 'pass-through' or 'walls'
     timestamp = Column(BigInteger)
+
+    __table_args__ = (
+        # Board order (score DESC, timestamp, id), overall and per mode; also
+        # serves keyset pagination without a sort step
+        Index("ix_leaderboard_score_timestamp_id", score.desc(), "timestamp", "id"),
+        Index("ix_leaderboard_mode_score", "mode", score.desc(), "timestamp", "id"),
+        # Daily/weekly boards: timestamp range within a mode (or across modes)
+        Index("ix_leaderboard_mode_timestamp_score", "mode", "timestamp", "score"),
+        Index("ix_leaderboard_timestamp_score", "timestamp", "score"),
+    )
+
+class PlayerStats(Base):
+    # Per-player, per-mode aggregates, maintained by crud.create_leaderboard_entry
+    __tablename__ = "player_stats"
+
+    username = Column(String, primary_key=True)
+    mode = Column(String, primary_key=True)
+    games_played = Column(Integer, nullable=False, default=0)
+    best_score = Column(Integer, nullable=False, default=0)
+    total_score = Column(BigInteger, nullable=False, default=0)
+    last_played = Column(BigInteger)
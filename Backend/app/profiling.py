@@ -0,0 +1,141 @@
+import contextvars
+import logging
+import time
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Per-request SQL profiling (QUERY_PROFILING). Cursor-execute hooks on every
+# Engine add each statement's count and duration to the current request's
+# RequestProfile, found through a contextvar (SQLAlchemy's greenlets run in the
+# request task's context). The middleware reports it as a Server-Timing header
+# and folds it into per-route totals for /system/queries.
+#
+# Disabled, the hooks aren't registered at all and the middleware is a single
+# attribute check per request.
+
+
+class RequestProfile:
+    __slots__ = ("queries", "db_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+
+    def server_timing(self) -> bytes:
+        return f'db;dur={self.db_seconds * 1000:.2f};desc="{self.queries} queries"'.encode()
+
+
+class RouteStats:
+    __slots__ = ("requests", "queries", "db_seconds", "max_queries")
+
+    def __init__(self):
+        self.requests = 0
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.max_queries = 0
+
+    def as_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "queries": self.queries,
+            "avg_queries": self.queries / self.requests,
+            "max_queries": self.max_queries,
+            "db_ms": self.db_seconds * 1000,
+            "avg_db_ms": self.db_seconds / self.requests * 1000,
+        }
+
+
+_current: contextvars.ContextVar[Optional[RequestProfile]] = contextvars.ContextVar("request_profile", default=None)
+
+
+class QueryProfiler:
+    def __init__(self):
+        self.enabled = False
+        self.slow_ms: Optional[float] = None
+        self.routes: dict[str, RouteStats] = {}
+
+    def enable(self, slow_ms: Optional[float] = None) -> None:
+        self.slow_ms = slow_ms
+        if not self.enabled:
+            event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+            event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+            self.enabled = True
+
+    def disable(self) -> None:
+        if self.enabled:
+            event.remove(Engine, "before_cursor_execute", _before_cursor_execute)
+            event.remove(Engine, "after_cursor_execute", _after_cursor_execute)
+            self.enabled = False
+
+    def record(self, route: str, profile: RequestProfile) -> None:
+        stats = self.routes.get(route)
+        if stats is None:
+            stats = self.routes[route] = RouteStats()
+        stats.requests += 1
+        stats.queries += profile.queries
+        stats.db_seconds += profile.db_seconds
+        stats.max_queries = max(stats.max_queries, profile.queries)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "slow_query_ms": self.slow_ms,
+            "routes": {route: stats.as_dict() for route, stats in sorted(self.routes.items())},
+        }
+
+    def reset(self) -> None:
+        self.routes = {}
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    profile = _current.get()
+    if profile is not None:
+        profile.queries += 1
+        profile.db_seconds += elapsed
+    slow_ms = query_profiler.slow_ms
+    if slow_ms is not None and elapsed * 1000 >= slow_ms:
+        # Statement only: bound parameters carry passwords, emails and tokens
+        logger.warning("Slow query (%.1f ms): %s", elapsed * 1000, statement)
+
+
+query_profiler = QueryProfiler()
+
+
+class QueryProfilingMiddleware:
+    """Pure ASGI middleware, so it doesn't wrap streaming responses the way BaseHTTPMiddleware does."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if not query_profiler.enabled or scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        profile = RequestProfile()
+        token = _current.set(profile)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                # Statements run while the body streams aren't in the header, only in the totals
+                message["headers"] = [*message.get("headers", []), (b"server-timing", profile.server_timing())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            # Routing stores the matched route in the scope; group by its path template.
+            # Unmatched paths share one key, or every probed URL would add a row
+            route = getattr(scope.get("route"), "path", "unmatched")
+            query_profiler.record(f"{scope['method']} {route}", profile)
@@ -0,0 +1,179 @@
+import asyncio
+import time
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import GameMode
+from . import crud
+
+# Rank engine for /auth/stats.
+# A player's rank is the number of leaderboard entries scoring strictly higher
+# than their best, plus one. Instead of COUNT(*) WHERE score > best on every
+# profile view, we keep a Fenwick tree of entry counts per score value
+# (globally and per GameMode) and answer ranks with an O(log max_score) prefix sum.
+
+# A load counts rows newer than this (relative to its start) one by one, along
+# with any row written through during the load, and everything else as a
+# histogram. Written-through rows are then de-duplicated against the load by
+# entry id, so a row committed around the query is counted exactly once.
+LOAD_OVERLAP_MS = 60_000
+
+
+# Submissions are capped at MAX_SCORE; the headroom is for rows already in the
+# table. Anything above the last bucket is counted in it.
+MAX_TREE_SIZE = 1 << 16
+
+
+class FenwickTree:
+    """Counts per non-negative integer score; grows (by doubling) on demand, up to max_size."""
+
+    def __init__(self, size: int = 1024, max_size: int = MAX_TREE_SIZE):
+        self.max_size = max_size
+        self._size = 1
+        while self._size < size:
+            self._size *= 2
+        self._counts = [0] * self._size
+        self._tree = [0] * (self._size + 1)
+        self.total = 0
+
+    def _grow(self, score: int) -> None:
+        size = self._size
+        while size <= score:
+            size *= 2
+        size = min(size, self.max_size)
+        self._counts.extend([0] * (size - self._size))
+        self._size = size
+        # O(n) rebuild from the raw counts
+        tree = [0] + self._counts[:]
+        for i in range(1, size + 1):
+            parent = i + (i & -i)
+            if parent <= size:
+                tree[parent] += tree[i]
+        self._tree = tree
+
+    def add(self, score: int, delta: int = 1) -> None:
+        score = min(max(score, 0), self.max_size - 1)
+        if score >= self._size:
+            self._grow(score)
+        self._counts[score] += delta
+        self.total += delta
+        i = score + 1
+        while i <= self._size:
+            self._tree[i] += delta
+            i += i & -i
+
+    def count_le(self, score: int) -> int:
+        if score < 0:
+            return 0
+        i = min(score + 1, self._size)
+        result = 0
+        while i > 0:
+            result += self._tree[i]
+            i -= i & -i
+        return result
+
+    def count_greater(self, score: int) -> int:
+        return self.total - self.count_le(score)
+
+
+class RankEngine:
+    def __init__(self):
+        self._global = FenwickTree()
+        self._modes: Dict[str, FenwickTree] = {mode.value: FenwickTree() for mode in GameMode}
+        self._loaded = False
+        self._loading = False
+        self._pending: List[Tuple[str, int, str, int]] = []
+        self._lock = asyncio.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    async def load(self, db: AsyncSession) -> None:
+        async with self._lock:
+            if self._loaded:
+                return
+            self._loading = True
+            try:
+                cutoff = int(time.time() * 1000) - LOAD_OVERLAP_MS
+                while True:
+                    seen = len(self._pending)
+                    ids = [entry_id for entry_id, _, _, timestamp in self._pending if timestamp < cutoff]
+                    rows = await crud.get_score_counts(db, since=cutoff, ids=ids)
+                    # An older row (a late write-behind flush, another worker's
+                    # event) written through while the query ran may or may not
+                    # be in its histogram: ask again, counting it by id
+                    if all(timestamp >= cutoff for _, _, _, timestamp in self._pending[seen:]):
+                        break
+                self._global = FenwickTree()
+                self._modes = {mode.value: FenwickTree() for mode in GameMode}
+                counted = set()
+                for entry_id, mode, score, count in rows:
+                    self._apply(score, mode, count)
+                    if entry_id is not None:
+                        counted.add(entry_id)
+                for entry_id, score, mode, _ in self._pending:
+                    if entry_id not in counted:
+                        counted.add(entry_id)
+                        self._apply(score, mode, 1)
+                self._loaded = True
+            finally:
+                self._pending = []
+                self._loading = False
+
+    def _apply(self, score: int, mode: str, count: int) -> None:
+        self._global.add(score, count)
+        if mode in self._modes:
+            self._modes[mode].add(score, count)
+
+    def add(self, row) -> None:
+        """Count a committed leaderboard row."""
+        mode = row.mode.value if hasattr(row.mode, "value") else row.mode
+        if self._loaded:
+            self._apply(row.score, mode, 1)
+        elif self._loading:
+            self._pending.append((row.id, row.score, mode, row.timestamp))
+
+    def rank(self, best_score: int, mode: Optional[str] = None) -> int:
+        """1-based rank of `best_score`; 0 means unranked (no positive score yet)."""
+        if best_score <= 0:
+            return 0
+        tree = self._global if mode is None else self._modes[mode]
+        return tree.count_greater(best_score) + 1
+
+    async def user_stats(self, db: AsyncSession, username: str) -> dict:
+        """games_played, best_score and rank (overall and per mode) in one call."""
+        if not self._loaded:
+            await self.load(db)
+        per_mode = await crud.get_user_stats(db, username)
+
+        modes = {}
+        for mode in GameMode:
+            row = per_mode.get(mode.value)
+            best = row.best_score if row else 0
+            modes[mode.value] = {
+                "games_played": row.games_played if row else 0,
+                "best_score": best,
+                "rank": self.rank(best, mode.value),
+            }
+        rows = per_mode.values()
+        best_score = max((m["best_score"] for m in modes.values()), default=0)
+        return {
+            "games_played": sum(row.games_played for row in rows),
+            "best_score": best_score,
+            "rank": self.rank(best_score),
+            "total_score": sum(row.total_score for row in rows),
+            "last_played": max((row.last_played for row in rows if row.last_played), default=None),
+            "modes": modes,
+        }
+
+    def reset(self) -> None:
+        self._global = FenwickTree()
+        self._modes = {mode.value: FenwickTree() for mode in GameMode}
+        self._pending = []
+        self._loaded = False
+        self._loading = False
+
+
+rank_engine = RankEngine()
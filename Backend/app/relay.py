@@ -0,0 +1,270 @@
+import asyncio
+import base64
+import time
+from typing import Dict, NamedTuple, Optional, Set, Union
+
+from .core.config import settings
+from .frame_codec import FrameEncoder
+from .models import GameFrame, GameMode, StreamEncoding, StreamProtocol
+
+# In-process pub/sub hub for live games.
+# A player's client publishes GameFrames over a WebSocket into its GameChannel.
+# For every wire format that has spectators the channel runs one FrameProducer,
+# which encodes each frame exactly once into a ready-to-write message and hands
+# that same object to every subscriber of the format. Producers start with their
+# first subscriber and are torn down when their last one disconnects.
+#
+# Each subscriber has a bounded queue and publish() never awaits: when a queue
+# is full, full-frame formats drop the oldest message, and delta formats (where
+# a lost diff would corrupt the stream) clear the queue and resync the
+# subscriber with a keyframe. One slow viewer can't stall the publisher.
+#
+# With several workers, games published on another worker arrive through the
+# event bus (see cluster.py) and are replayed here as "remote" channels, so
+# spectators can connect to any worker. A worker that dies mid-game never
+# sends the game's end, so a timer closes remote channels that have gone
+# REMOTE_GAME_TIMEOUT_SECONDS without a frame.
+
+Message = Union[str, bytes]
+
+
+class StreamFormat(NamedTuple):
+    protocol: StreamProtocol = StreamProtocol.full
+    encoding: StreamEncoding = StreamEncoding.json
+    # "sse": messages are complete `data: ...` events as bytes; "ws": raw payloads
+    transport: str = "sse"
+
+
+class Subscription:
+    def __init__(self, stream_format: StreamFormat, maxsize: int):
+        self.format = stream_format
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+        self.needs_keyframe = False
+
+    def push(self, message: Message) -> bool:
+        """Queue a message; False if the queue was full and nothing was queued."""
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    def drop_oldest(self) -> None:
+        self.queue.get_nowait()
+        self.dropped += 1
+
+    def clear(self) -> None:
+        while not self.queue.empty():
+            self.queue.get_nowait()
+            self.dropped += 1
+
+    async def get(self) -> Message:
+        return await self.queue.get()
+
+
+class FrameProducer:
+    """Encodes a channel's frames once for one StreamFormat and fans them out."""
+
+    def __init__(self, stream_format: StreamFormat):
+        self.format = stream_format
+        self.encoder = FrameEncoder(stream_format.protocol, stream_format.encoding, keyframe_interval=settings.SPECTATE_KEYFRAME_INTERVAL)
+        self.subscribers: Set[Subscription] = set()
+        self.encoded = 0
+        self.sent = 0
+
+    def _wire(self, payload: Message) -> Message:
+        if self.format.transport == "sse":
+            if isinstance(payload, bytes):
+                # SSE is text-only: binary messages travel base64-encoded
+                return b"data: " + base64.b64encode(payload) + b"\n\n"
+            # SSE format: data: <json>\n\n
+            return b"data: " + payload.encode() + b"\n\n"
+        return payload
+
+    def keyframe(self, frame: GameFrame) -> Message:
+        self.encoded += 1
+        return self._wire(self.encoder.keyframe(frame))
+
+    def publish(self, frame: GameFrame) -> None:
+        self.encoded += 1
+        message = self._wire(self.encoder.encode(frame))
+        keyframe = None
+        delta = self.format.protocol == StreamProtocol.delta
+        for subscription in self.subscribers:
+            outgoing = message
+            if subscription.needs_keyframe:
+                subscription.needs_keyframe = False
+                # Full-frame messages already stand alone
+                if delta:
+                    outgoing = keyframe = keyframe or self.keyframe(frame)
+            if not subscription.push(outgoing):
+                if delta:
+                    # A gap in a delta stream can't be patched over: resync
+                    subscription.clear()
+                    outgoing = keyframe = keyframe or self.keyframe(frame)
+                else:
+                    # Full frames supersede each other: keep the newest
+                    subscription.drop_oldest()
+                subscription.push(outgoing)
+            self.sent += 1
+
+    def end(self) -> None:
+        self.encoder.reset()
+        message = b"event: end\ndata: {}\n\n" if self.format.transport == "sse" else '{"event":"end"}'
+        for subscription in self.subscribers:
+            if not subscription.push(message):
+                subscription.drop_oldest()
+                subscription.push(message)
+            # The player's next game starts from a keyframe
+            subscription.needs_keyframe = True
+
+
+class GameChannel:
+    """One broadcaster per game."""
+
+    def __init__(self, player_id: str):
+        self.player_id = player_id
+        self.username: Optional[str] = None
+        self.mode: Optional[GameMode] = None
+        self.publishers = 0
+        self.last_frame: Optional[GameFrame] = None
+        self.last_frame_at = 0.0
+        self.frames_published = 0
+        self.producers: Dict[StreamFormat, FrameProducer] = {}
+        # Published on another worker; its frames come from the event bus
+        self.remote = False
+
+    @property
+    def live(self) -> bool:
+        return self.publishers > 0
+
+    @property
+    def subscriber_count(self) -> int:
+        return sum(len(producer.subscribers) for producer in self.producers.values())
+
+    def publish(self, frame: GameFrame) -> None:
+        self.last_frame = frame
+        self.last_frame_at = time.monotonic()
+        self.frames_published += 1
+        for producer in self.producers.values():
+            producer.publish(frame)
+
+    def end(self) -> None:
+        for producer in self.producers.values():
+            producer.end()
+
+
+class RelayHub:
+    def __init__(self, queue_size: int, remote_timeout: float = 30.0):
+        self.queue_size = queue_size
+        self.remote_timeout = remote_timeout
+        self._channels: Dict[str, GameChannel] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def _channel(self, player_id: str) -> GameChannel:
+        channel = self._channels.get(player_id)
+        if channel is None:
+            channel = self._channels[player_id] = GameChannel(player_id)
+        return channel
+
+    def _discard_if_idle(self, channel: GameChannel) -> None:
+        if not channel.live and not channel.producers:
+            self._channels.pop(channel.player_id, None)
+
+    def open_game(self, player_id: str, username: str, mode: GameMode) -> GameChannel:
+        """Called when a player's client connects to publish frames."""
+        channel = self._channel(player_id)
+        if channel.remote:
+            # The player reconnected here; the game on the other worker is superseded
+            channel.publishers = 0
+            channel.remote = False
+        channel.username = username
+        channel.mode = mode
+        channel.publishers += 1
+        channel.last_frame = None
+        return channel
+
+    def close_game(self, channel: GameChannel) -> None:
+        channel.publishers -= 1
+        if not channel.live:
+            channel.end()
+            channel.remote = False
+        self._discard_if_idle(channel)
+
+    def publish_remote(self, player_id: str, username: str, mode: GameMode, frame: GameFrame) -> None:
+        """A frame of a game published on another worker; the first one opens the channel."""
+        channel = self._channel(player_id)
+        if not channel.live:
+            self.open_game(player_id, username, mode)
+            channel.remote = True
+        channel.publish(frame)
+
+    def close_remote(self, player_id: str) -> None:
+        channel = self._channels.get(player_id)
+        if channel is not None and channel.remote:
+            self.close_game(channel)
+
+    def expire_remote(self) -> None:
+        cutoff = time.monotonic() - self.remote_timeout
+        for channel in list(self._channels.values()):
+            if channel.remote and channel.live and channel.last_frame_at < cutoff:
+                self.close_game(channel)
+
+    async def _run(self) -> None:
+        # A quiet game ends between one and one and a half timeouts after its last frame
+        while True:
+            await asyncio.sleep(self.remote_timeout / 2)
+            self.expire_remote()
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def publish(self, player_id: str, frame: GameFrame) -> None:
+        channel = self._channels.get(player_id)
+        if channel is not None:
+            channel.publish(frame)
+
+    def subscribe(self, player_id: str, stream_format: StreamFormat = StreamFormat()) -> Subscription:
+        """Spectators may subscribe before the game starts; they get frames once it does."""
+        channel = self._channel(player_id)
+        producer = channel.producers.get(stream_format)
+        if producer is None:
+            producer = channel.producers[stream_format] = FrameProducer(stream_format)
+        subscription = Subscription(stream_format, self.queue_size)
+        producer.subscribers.add(subscription)
+        if channel.last_frame is not None:
+            subscription.push(producer.keyframe(channel.last_frame))
+        else:
+            subscription.needs_keyframe = True
+        return subscription
+
+    def unsubscribe(self, player_id: str, subscription: Subscription) -> None:
+        channel = self._channels.get(player_id)
+        if channel is None:
+            return
+        producer = channel.producers.get(subscription.format)
+        if producer is not None:
+            producer.subscribers.discard(subscription)
+            if not producer.subscribers:
+                del channel.producers[subscription.format]
+        self._discard_if_idle(channel)
+
+    def is_live(self, player_id: str) -> bool:
+        channel = self._channels.get(player_id)
+        return channel is not None and channel.live
+
+    def reset(self) -> None:
+        self._channels = {}
+
+
+relay_hub = RelayHub(settings.SPECTATE_QUEUE_SIZE, settings.REMOTE_GAME_TIMEOUT_SECONDS)
@@ -0,0 +1,107 @@
+from collections import OrderedDict
+from typing import Dict, Iterator, NamedTuple, Optional
+
+from .core.config import settings
+from .engine import DIRECTIONS, GameSnapshot, SnakeGame
+from .replay_store import ReplayRecord
+
+# Plays stored replays back as a lazy sequence of game states for
+# GET /leaderboard/{entryId}/replay.
+#
+# A ReplayCursor steps one SnakeGame through the record's varint inputs,
+# decoding them as it goes, so a game is never materialized as a list of
+# frames. Every REPLAY_CHECKPOINT_INTERVAL ticks the cursor saves a checkpoint
+# (engine snapshot + position in the input stream) into a small LRU cache per
+# entry, so seeking with from_tick resumes from the nearest checkpoint instead
+# of re-simulating from tick 0. Checkpoints are filled in by whoever plays or
+# seeks through that part of the game first.
+
+
+class Checkpoint(NamedTuple):
+    game: GameSnapshot
+    offset: int  # byte offset of the next undecoded input
+    input_tick: int  # tick of the input before that one
+
+
+class ReplayCheckpoints:
+    def __init__(self, capacity: int, interval: int):
+        self.capacity = capacity
+        self.interval = interval
+        self._entries: "OrderedDict[str, Dict[int, Checkpoint]]" = OrderedDict()
+
+    def get(self, entry_id: str) -> Dict[int, Checkpoint]:
+        checkpoints = self._entries.get(entry_id)
+        if checkpoints is None:
+            checkpoints = self._entries[entry_id] = {}
+            if len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+        else:
+            self._entries.move_to_end(entry_id)
+        return checkpoints
+
+    def reset(self) -> None:
+        self._entries = OrderedDict()
+
+
+class ReplayCursor:
+    def __init__(self, entry_id: str, record: ReplayRecord, checkpoints: ReplayCheckpoints):
+        self.record = record
+        self.interval = checkpoints.interval
+        self._checkpoints = checkpoints.get(entry_id)
+        self.game = SnakeGame(record.mode, record.seed)
+        self._offset = 0
+        self._input_tick = 0
+        self._pending = self._decode()
+
+    def _decode(self) -> Optional[tuple]:
+        """Next (tick, direction code) from the varint body, or None at the end."""
+        # Where the pending input starts, for checkpoints
+        self._pending_at = (self._offset, self._input_tick)
+        body, offset = self.record.body, self._offset
+        if offset >= len(body):
+            return None
+        value = shift = 0
+        while True:
+            byte = body[offset]
+            offset += 1
+            value |= (byte & 0x7F) << shift
+            if not byte & 0x80:
+                break
+            shift += 7
+        self._offset = offset
+        self._input_tick += value >> 2
+        return self._input_tick, value & 3
+
+    @property
+    def finished(self) -> bool:
+        return not self.game.alive or self.game.tick >= self.record.ticks
+
+    def step(self) -> bool:
+        """Advance one tick; False once the game is over."""
+        if self.finished:
+            return False
+        game = self.game
+        while self._pending is not None and self._pending[0] <= game.tick:
+            game.turn(DIRECTIONS[self._pending[1]])
+            self._pending = self._decode()
+        alive = game.step()
+        if alive and game.tick % self.interval == 0 and game.tick not in self._checkpoints:
+            offset, input_tick = self._pending_at
+            self._checkpoints[game.tick] = Checkpoint(game.snapshot(), offset, input_tick)
+        return alive
+
+    def seek(self, tick: int) -> Iterator[None]:
+        """Move to `tick` (or the end of the game), yielding every checkpoint interval."""
+        known = [t for t in self._checkpoints if t <= tick]
+        if known and max(known) > self.game.tick:
+            start = max(known)
+            checkpoint = self._checkpoints[start]
+            self.game = SnakeGame.restore(self.record.mode, self.record.seed, checkpoint.game)
+            self._offset, self._input_tick = checkpoint.offset, checkpoint.input_tick
+            self._pending = self._decode()
+        while self.game.tick < tick and self.step():
+            if self.game.tick % self.interval == 0:
+                yield
+
+
+replay_checkpoints = ReplayCheckpoints(settings.REPLAY_CHECKPOINT_CACHE, settings.REPLAY_CHECKPOINT_INTERVAL)
@@ -0,0 +1,190 @@
+import fcntl
+import mmap
+import os
+import struct
+import threading
+from typing import Dict, Iterable, Iterator, NamedTuple, Optional, Tuple
+
+from .core.config import settings
+from .models import GameMode
+
+# Binary replays and their on-disk store.
+#
+# Record (little endian):
+#     4s magic b"SNKR" | B version | B mode | I seed | I score | I ticks | I inputs
+#     then one unsigned LEB128 varint per input: (tick - previous tick) << 2 | direction
+# Direction codes are app.engine's (UP=0, DOWN=1, LEFT=2, RIGHT=3). A player
+# turns every few ticks, so nearly every input is a single byte: about 80
+# bytes per minute of play at ~70 turns/minute, header included, against
+# ~2 KB/minute as JSON (benchmarks/bench_replay_format.py).
+#
+# Records are appended to segment files (segment-NNNNNN.bin), rotated at
+# REPLAY_SEGMENT_BYTES, and located through an append-only index of
+# (entry id, segment, offset, length) that is loaded into a dict on open.
+# Index records are B id length | I segment | Q offset | I length, then the id.
+# Readers get a memoryview straight into an mmap of the segment, so streaming
+# a replay to a spectator or verifier doesn't copy it.
+#
+# Every worker process appends to the same files. Appends hold an flock on
+# replays.lock and take the offset from the segment's actual end, and a
+# lookup that misses reads whatever index records other workers added since.
+
+MAGIC = b"SNKR"
+VERSION = 1
+MODES = {GameMode.pass_through: 0, GameMode.walls: 1}
+MODE_CODES = {code: mode for mode, code in MODES.items()}
+
+_HEADER = struct.Struct("<4sBBIIII")
+_INDEX = struct.Struct("<BIQI")
+
+
+class ReplayRecord(NamedTuple):
+    mode: GameMode
+    seed: int
+    score: int
+    ticks: int
+    input_count: int
+    body: memoryview
+
+    def inputs(self) -> Iterator[Tuple[int, int]]:
+        """(tick, direction code) pairs, decoded lazily from the varint body."""
+        tick = value = shift = 0
+        for byte in self.body:
+            value |= (byte & 0x7F) << shift
+            if byte & 0x80:
+                shift += 7
+                continue
+            tick += value >> 2
+            yield tick, value & 3
+            value = shift = 0
+
+
+def encode_replay(mode: GameMode, seed: int, score: int, ticks: int, inputs: Iterable[Tuple[int, int]]) -> bytes:
+    body = bytearray()
+    previous = count = 0
+    for tick, direction in inputs:
+        value = (tick - previous) << 2 | direction
+        previous = tick
+        count += 1
+        while value > 0x7F:
+            body.append(value & 0x7F | 0x80)
+            value >>= 7
+        body.append(value)
+    return _HEADER.pack(MAGIC, VERSION, MODES[mode], seed, score, ticks, count) + body
+
+
+def decode_replay(data) -> ReplayRecord:
+    view = memoryview(data)
+    magic, version, mode, seed, score, ticks, count = _HEADER.unpack_from(view)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Not a replay record")
+    return ReplayRecord(MODE_CODES[mode], seed, score, ticks, count, view[_HEADER.size:])
+
+
+class ReplayStore:
+    def __init__(self, directory: str, segment_bytes: int):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self._index: Dict[str, Tuple[int, int, int]] = {}
+        self._index_read = 0
+        self._maps: Dict[int, mmap.mmap] = {}
+        self._segment = 0
+        self._lock = threading.Lock()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _segment_path(self, segment: int) -> str:
+        return self._path(f"segment-{segment:06d}.bin")
+
+    def _load(self) -> None:
+        """Read the index records appended since the last load, by any process."""
+        try:
+            with open(self._path("replays.idx"), "rb") as f:
+                f.seek(self._index_read)
+                data = f.read()
+        except FileNotFoundError:
+            return
+        offset = 0
+        while offset + _INDEX.size <= len(data):
+            id_length, segment, start, length = _INDEX.unpack_from(data, offset)
+            end = offset + _INDEX.size + id_length
+            if end > len(data):
+                break
+            self._index[data[offset + _INDEX.size:end].decode()] = (segment, start, length)
+            self._segment = max(self._segment, segment)
+            offset = end
+        # A partial record at the end is picked up by a later load, or cut off
+        # by the next append if a crash left it torn
+        self._index_read += offset
+
+    def _locate(self, entry_id: str) -> Optional[Tuple[int, int, int]]:
+        with self._lock:
+            location = self._index.get(entry_id)
+            if location is None:
+                self._load()
+                location = self._index.get(entry_id)
+            return location
+
+    def append(self, entry_id: str, data: bytes) -> None:
+        key = entry_id.encode()
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self._path("replays.lock"), "ab") as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                self._load()
+                segment = self._segment
+                # A crash between data and index can leave a newer, unindexed segment
+                while os.path.exists(self._segment_path(segment + 1)):
+                    segment += 1
+                f = open(self._segment_path(segment), "ab")
+                start = f.seek(0, os.SEEK_END)
+                if start and start + len(data) > self.segment_bytes:
+                    f.close()
+                    segment += 1
+                    f = open(self._segment_path(segment), "ab")
+                    start = f.seek(0, os.SEEK_END)
+                with f:
+                    f.write(data)
+                # Index after data, so an indexed record is always complete
+                with open(self._path("replays.idx"), "ab") as f:
+                    if f.seek(0, os.SEEK_END) > self._index_read:
+                        f.truncate(self._index_read)
+                    record = _INDEX.pack(len(key), segment, start, len(data)) + key
+                    f.write(record)
+            self._index_read += len(record)
+            self._segment = segment
+            self._index[entry_id] = (segment, start, len(data))
+
+    def get(self, entry_id: str) -> Optional[memoryview]:
+        """The stored record, as a view into the mapped segment."""
+        location = self._locate(entry_id)
+        if location is None:
+            return None
+        segment, start, length = location
+        mapped = self._maps.get(segment)
+        if mapped is None or len(mapped) < start + length:
+            # The active segment grew since it was mapped
+            with open(self._segment_path(segment), "rb") as f:
+                mapped = self._maps[segment] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return memoryview(mapped)[start:start + length]
+
+    def read(self, entry_id: str) -> Optional[ReplayRecord]:
+        data = self.get(entry_id)
+        return decode_replay(data) if data is not None else None
+
+    def __contains__(self, entry_id: str) -> bool:
+        return self._locate(entry_id) is not None
+
+    def reset(self, directory: Optional[str] = None) -> None:
+        # Outstanding memoryviews keep their mmap alive; just forget ours
+        with self._lock:
+            self._maps = {}
+            self._index = {}
+            self._index_read = 0
+            self._segment = 0
+            if directory is not None:
+                self.directory = directory
+
+
+replay_store = ReplayStore(settings.REPLAY_STORE_DIR, settings.REPLAY_SEGMENT_BYTES)
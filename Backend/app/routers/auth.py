@@ -1,10 +1,12 @@
 from fastapi import APIRouter, HTTPException, Depends, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from ..models import LoginRequest, SignupRequest
+from ..models import LoginRequest, SignupRequest, TokenUser, User
 from ..models_db import User as DBUser
-from ..core.database import get_db
+from ..core.database import get_db, get_read_db
 from .. import crud
-from ..dependencies import get_current_user
+from ..core.security import create_token
+from ..dependencies import get_current_profile, get_current_user
+from ..ranking import rank_engine
 import uuid
 
 # Simple password hashing for demo (in extracting from MockDB)
@@ -19,7 +21,7 @@ def verify_password(plain: str, hashed: str) -> bool:
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
 @router.post("/login")
-async def login(request: LoginRequest, db: AsyncSession = Depends(get_db)):
+async def login(request: LoginRequest, db: AsyncSession = Depends(get_read_db)):
     user = await crud.get_user_by_email(db, request.email)
     if not user:
         raise HTTPException(status_code=400, detail="Invalid credentials")
@@ -29,8 +31,7 @@ async def login(request: LoginRequest, db: AsyncSession = Depends(get_db)):
     if user.password_hash != request.password:
          raise HTTPException(status_code=400, detail="Invalid credentials")
 
-    # Mock token generation: using user_id as token
-    return {"user": user, "token": user.id}
+    return {"user": user, "token": create_token(user.id, user.username)}
 
 @router.post("/signup", status_code=201)
 async def signup(request: SignupRequest, db: AsyncSession = Depends(get_db)):
@@ -46,19 +47,19 @@ async def signup(request: SignupRequest, db: AsyncSession = Depends(get_db)):
             password_hash=request.password # Storing plain as hash for now
         )
         await crud.create_user(db, new_user)
-        return {"user": new_user, "token": new_user.id}
+        return {"user": new_user, "token": create_token(new_user.id, new_user.username)}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/me")
-async def get_me(current_user: DBUser = Depends(get_current_user)):
+async def get_me(current_user: User = Depends(get_current_profile)):
     return current_user
 
 @router.get("/stats")
-async def get_my_stats(current_user: DBUser = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
-    stats = await crud.get_user_stats(db, current_user.username)
-    return stats
+async def get_my_stats(current_user: TokenUser = Depends(get_current_user), db: AsyncSession = Depends(get_read_db)):
+    return await rank_engine.user_stats(db, current_user.username)
 
 @router.post("/logout")
-async def logout(current_user: DBUser = Depends(get_current_user)):
+async def logout(current_user: TokenUser = Depends(get_current_user)):
+    # Signed tokens are stateless: the client discards it, and it lapses at expiry
     return {"description": "Logout successful"}
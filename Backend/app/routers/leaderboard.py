@@ -1,32 +1,236 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
-from ..models import SubmitScoreRequest, LeaderboardEntry
-from ..models_db import LeaderboardEntry as DBLeaderboardEntry, User as DBUser
-from ..core.database import get_db
+from typing import AsyncGenerator, Dict, List, Optional, Tuple
+from pydantic import TypeAdapter
+from ..models import SubmitScoreRequest, LeaderboardEntry, GameMode, LeaderboardWindow, TokenUser
+from ..models_db import LeaderboardEntry as DBLeaderboardEntry
+from ..core.database import get_db, get_read_db
+from ..core.config import settings
 from .. import crud
+from ..cluster import share_scores
 from ..dependencies import get_current_user
+from ..leaderboard_index import IndexedEntry, leaderboard_index
+from ..leaderboard_feed import leaderboard_feed
+from ..ranking import rank_engine
+from ..verification import InvalidReplay, VerifierBusy, replay_verifier
+from ..replay_store import ReplayRecord, encode_replay, replay_store
+from ..replay_player import ReplayCursor, replay_checkpoints
+from ..engine import DIRECTION_CODES
+from ..write_behind import ScoreQueueFull, score_writer
+import asyncio
+import base64
+import hashlib
+import json
+import struct
 import uuid
 import time
 
 router = APIRouter(prefix="/leaderboard", tags=["Leaderboard"])
 
+# Keyset pagination cursors are opaque to clients: base64url(JSON [score, timestamp, id])
+def encode_cursor(entry) -> str:
+    raw = json.dumps([entry.score, entry.timestamp, entry.id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        score, timestamp, entry_id = json.loads(raw)
+        if not (isinstance(score, int) and isinstance(timestamp, int) and isinstance(entry_id, str)):
+            raise ValueError(cursor)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return score, timestamp, entry_id
+
+# First pages of GET /leaderboard, pre-rendered per (mode, window, limit) as
+# (index revision, etag, JSON body, next cursor). A new score or a new
+# daily/weekly bucket moves the revision on and the page is re-rendered on the
+# next read; otherwise the hot path does no validation and no encoding.
+# The ETag hashes the rendered page rather than naming the revision, so every
+# worker serving the same page sends the same validator.
+RenderedPage = Tuple[str, str, bytes, Optional[str]]
+rendered_pages: Dict[Tuple[Optional[GameMode], LeaderboardWindow, int], RenderedPage] = {}
+entries_adapter = TypeAdapter(List[LeaderboardEntry])
+
+def render_page(window: LeaderboardWindow, entries: list, next_cursor: Optional[str]) -> Tuple[str, bytes]:
+    """(etag, body) for a page; same bytes response_model would produce."""
+    body = entries_adapter.dump_json(entries_adapter.validate_python(entries, from_attributes=True))
+    digest = hashlib.blake2b(body, digest_size=12)
+    digest.update(f"|{window.value}|{next_cursor or ''}".encode())
+    return f'"{digest.hexdigest()}"', body
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    return if_none_match.strip() == "*" or etag in (tag.strip() for tag in if_none_match.split(","))
+
 @router.get("", response_model=List[LeaderboardEntry]) # Actually, Schema model should be used in response_model, not DB model. 
 # But Pydantic V2 often handles ORM models if from_attributes=True. 
 # Let's check models.py LeaderboardEntry.
-async def get_leaderboard(db: AsyncSession = Depends(get_db)):
-    # crud.get_leaderboard returns DBLeaderboardEntry objects.
-    # FastAPI response_model (List[LeaderboardEntry]) refers to Pydantic model.
-    return await crud.get_leaderboard(db)
+async def get_leaderboard(
+    mode: Optional[GameMode] = None,
+    window: LeaderboardWindow = LeaderboardWindow.all_time,
+    limit: int = Query(settings.LEADERBOARD_DEFAULT_LIMIT, ge=1, le=settings.LEADERBOARD_MAX_LIMIT),
+    cursor: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_read_db),
+):
+    if cursor is None:
+        key = (mode, window, limit)
+        revision = leaderboard_index.revision(window)
+        page = rendered_pages.get(key)
+        if page is None or page[0] != revision:
+            entries, next_cursor = await read_page(db, mode, window, limit, None)
+            etag, body = render_page(window, entries, next_cursor)
+            page = rendered_pages[key] = (revision, etag, body, next_cursor)
+        _, etag, body, next_cursor = page
+    else:
+        # Later pages aren't cached
+        entries, next_cursor = await read_page(db, mode, window, limit, decode_cursor(cursor))
+        etag, body = render_page(window, entries, next_cursor)
+
+    headers = {
+        "ETag": etag,
+        "Cache-Control": (
+            f"public, max-age={settings.LEADERBOARD_CACHE_MAX_AGE}, "
+            f"stale-while-revalidate={settings.LEADERBOARD_CACHE_STALE_WHILE_REVALIDATE}"
+        ),
+    }
+    # An unchanged first page is answered with a bare 304: no query, no serialization
+    if if_none_match and etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    if next_cursor is not None:
+        # The body stays a plain list for existing clients; the cursor travels in a header
+        headers["X-Next-Cursor"] = next_cursor
+    return Response(content=body, media_type="application/json", headers=headers)
+
+async def read_page(db: AsyncSession, mode: Optional[GameMode], window: LeaderboardWindow, limit: int, after: Optional[tuple]) -> Tuple[list, Optional[str]]:
+    # Served from the in-memory index; the database is only read once per board to build it.
+    # IndexedEntry exposes the same attributes as the ORM row, so response_model still applies.
+    # One extra row tells us whether there is a next page
+    entries = await leaderboard_index.read(
+        db, limit=limit + 1, mode=mode.value if mode else None, window=window, after=after
+    )
+    if len(entries) > limit:
+        entries = entries[:limit]
+        return entries, encode_cursor(entries[-1])
+    return entries, None
+
+async def leaderboard_event_stream(
+    mode: Optional[str], limit: int, subscription, keepalive: float = settings.SPECTATE_KEEPALIVE_SECONDS
+) -> AsyncGenerator[bytes, None]:
+    # A snapshot event first, then coalesced update events (see leaderboard_feed)
+    try:
+        while True:
+            try:
+                yield await asyncio.wait_for(subscription.get(), timeout=keepalive)
+            except asyncio.TimeoutError:
+                yield b": keepalive\n\n"
+    finally:
+        leaderboard_feed.unsubscribe(mode, limit, subscription)
+
+@router.get("/stream")
+async def stream_leaderboard(
+    mode: Optional[GameMode] = None,
+    limit: int = Query(settings.LEADERBOARD_STREAM_DEFAULT_LIMIT, ge=1, le=settings.LEADERBOARD_STREAM_MAX_LIMIT),
+    db: AsyncSession = Depends(get_read_db),
+):
+    # Live top N (all-time): pushes rank changes instead of being polled
+    entries, _ = await read_page(db, mode, LeaderboardWindow.all_time, limit, None)
+    mode_value = mode.value if mode else None
+    subscription = leaderboard_feed.subscribe(mode_value, limit, [IndexedEntry.from_row(entry) for entry in entries])
+    return StreamingResponse(
+        leaderboard_event_stream(mode_value, limit, subscription),
+        media_type="text/event-stream"
+    )
+
+async def replay_event_stream(entry_id: str, record: ReplayRecord, from_tick: int, speed: float) -> AsyncGenerator[bytes, None]:
+    cursor = ReplayCursor(entry_id, record, replay_checkpoints)
+    for _ in cursor.seek(from_tick):
+        # Long seeks yield to other requests between checkpoint intervals
+        await asyncio.sleep(0)
+    while True:
+        # Same events as the live spectate stream: data: <GameFrame json>\n\n
+        yield b"data: " + cursor.game.to_frame().model_dump_json().encode() + b"\n\n"
+        # Paced like the original game, which ticks at its current speed
+        delay = cursor.game.interval_ms / 1000 / speed
+        if not cursor.step():
+            break
+        await asyncio.sleep(delay)
+    yield b"event: end\ndata: {}\n\n"
+
+@router.get("/{entryId}/replay")
+async def stream_replay(
+    entryId: str,
+    speed: float = Query(1.0, gt=0, le=settings.REPLAY_MAX_SPEED),
+    from_tick: int = Query(0, ge=0),
+):
+    record = replay_store.read(entryId)
+    if record is None:
+        raise HTTPException(status_code=404, detail="No replay stored for this entry")
+    return StreamingResponse(
+        replay_event_stream(entryId, record, from_tick, speed),
+        media_type="text/event-stream"
+    )
+
+async def verify_score(request: SubmitScoreRequest) -> Optional[bytes]:
+    """The submission's binary replay record once verified, or None when there's nothing to verify."""
+    if settings.SCORE_VERIFICATION == "off":
+        return None
+    if request.replay is None:
+        if settings.SCORE_VERIFICATION == "required":
+            raise HTTPException(status_code=422, detail="A replay is required to submit a score")
+        return None
+    replay = request.replay
+    if replay.ticks > settings.REPLAY_MAX_TICKS:
+        raise HTTPException(status_code=422, detail=f"Replay longer than {settings.REPLAY_MAX_TICKS} ticks")
+    try:
+        data = encode_replay(
+            request.mode, replay.seed, request.score, replay.ticks,
+            ((i.tick, DIRECTION_CODES[i.direction]) for i in replay.inputs),
+        )
+    except struct.error as e:
+        # A field the record header can't hold
+        raise HTTPException(status_code=422, detail=f"Replay can't be encoded: {e}")
+    try:
+        matches = await replay_verifier.verify(data)
+    except VerifierBusy:
+        raise HTTPException(status_code=429, detail="Score verification is busy, retry shortly", headers={"Retry-After": "1"})
+    except InvalidReplay as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if not matches:
+        raise HTTPException(status_code=422, detail="Replay does not reproduce the submitted score")
+    return data
 
 @router.post("", status_code=201)
-async def submit_score(request: SubmitScoreRequest, current_user: DBUser = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+async def submit_score(request: SubmitScoreRequest, response: Response, current_user: TokenUser = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    replay = await verify_score(request)
+    if score_writer.enabled:
+        # Write-behind: journaled and queued now, inserted with the next batch.
+        # While the writer drains at shutdown, submissions take the direct path below.
+        entry = IndexedEntry(
+            f"entry_{uuid.uuid4().hex}", current_user.username, request.score, request.mode.value, int(time.time() * 1000)
+        )
+        try:
+            await score_writer.submit(entry)
+        except ScoreQueueFull:
+            raise HTTPException(status_code=503, detail="Score ingestion is backed up, retry shortly", headers={"Retry-After": "1"})
+        if replay is not None:
+            replay_store.append(entry.id, replay)
+        response.status_code = status.HTTP_202_ACCEPTED
+        return {"description": "Score accepted", "id": entry.id}
+
     entry = DBLeaderboardEntry(
-        id=f"entry_{uuid.uuid4().hex[:8]}",
+        id=f"entry_{uuid.uuid4().hex}",
         username=current_user.username,
         score=request.score,
         mode=request.mode,
         timestamp=int(time.time() * 1000)
     )
     await crud.create_leaderboard_entry(db, entry)
-    return {"description": "Score submitted successfully"}
+    if replay is not None:
+        # A few hundred bytes appended to the active segment
+        replay_store.append(entry.id, replay)
+    leaderboard_index.add(entry)
+    rank_engine.add(entry)
+    share_scores([entry])
+    return {"description": "Score submitted successfully", "id": entry.id}
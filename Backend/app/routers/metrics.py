@@ -0,0 +1,12 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from ..metrics import render_metrics
+
+router = APIRouter(tags=["System"])
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    # Prometheus text exposition format, summed across workers (METRICS_MULTIPROC_DIR)
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
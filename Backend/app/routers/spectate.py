@@ -1,66 +1,144 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, Depends, Query, WebSocket, WebSocketDisconnect, status
 from fastapi.responses import StreamingResponse
-from typing import List, Generator
-from sqlalchemy.ext.asyncio import AsyncSession
-from ..models import ActivePlayer, GameFrame, Coordinate, Direction, GameMode
-from ..core.database import get_db
-from .. import crud
+from pydantic import ValidationError
+from typing import AsyncGenerator, List, Optional
+from ..models import ActivePlayer, GameFrame, GameMode, Heartbeat, StreamProtocol, StreamEncoding, TokenUser
+from ..core.config import settings
+from ..dependencies import get_current_user, get_user_from_token
+from ..relay import relay_hub, StreamFormat
+from ..active_players import active_players
+from ..cluster import share_frame, share_game_end, share_heartbeat
+from ..metrics import spectate_connections, spectate_frames
 import asyncio
-import random
 
 router = APIRouter(prefix="/players", tags=["Spectate"])
 
 @router.get("/active", response_model=List[ActivePlayer])
-async def get_active_players():
-    # Mock implementation: return dummy active players
-    # In a real app, this would query a Redis set or similar game state store
+async def get_active_players(
+    mode: Optional[GameMode] = None,
+    limit: int = Query(settings.ACTIVE_PLAYERS_DEFAULT_LIMIT, ge=1, le=settings.ACTIVE_PLAYERS_MAX_LIMIT),
+):
+    # Players who heartbeated (or relayed a frame) recently, highest current score first
     return [
-        ActivePlayer(
-            id="user_demo_1",
-            username="CosmicGamer",
-            currentScore=random.randint(50, 200),
-            mode=GameMode.pass_through
-        ),
-        ActivePlayer(
-            id="user_demo_2",
-            username="StarSnake",
-            currentScore=random.randint(20, 100),
-            mode=GameMode.walls
-        )
+        ActivePlayer(id=player.id, username=player.username, currentScore=player.score, mode=player.mode)
+        for player in active_players.active(mode.value if mode else None, limit)
     ]
 
-async def game_stream_generator(player_id: str) -> Generator[str, None, None]:
-    # Mock data stream generator
-    snake = [Coordinate(x=10, y=10), Coordinate(x=10, y=11), Coordinate(x=10, y=12)]
-    food = Coordinate(x=15, y=15)
-    score = 100
-    
-    while True:
-        # Simulate game update
-        snake[0].y += 1 # Move head down (simplified)
-        snake.pop() # Remove tail
-        snake.insert(0, Coordinate(x=snake[0].x, y=snake[0].y + 1)) # Add new head
-        
-        frame = GameFrame(
-            snake=snake,
-            food=food,
-            score=score,
-            direction=Direction.DOWN
-        )
-        
-        # SSE format: data: <json>\n\n
-        yield f"data: {frame.model_dump_json()}\n\n"
-        await asyncio.sleep(0.5) # 2 FPS for spectating demo
+@router.post("/heartbeat", status_code=status.HTTP_204_NO_CONTENT)
+async def heartbeat(request: Heartbeat, current_user: TokenUser = Depends(get_current_user)):
+    # Sent by game clients every few seconds while a game is running
+    active_players.heartbeat(current_user.id, current_user.username, request.mode.value, request.score)
+    share_heartbeat(current_user.id, current_user.username, request.mode, request.score)
+
+@router.websocket("/{playerId}/play")
+async def publish_game(
+    websocket: WebSocket,
+    playerId: str,
+    token: str = "",
+    mode: GameMode = GameMode.pass_through,
+):
+    # Browsers can't set headers on a WebSocket, so the bearer token comes as ?token=
+    user = get_user_from_token(token) if token else None
+    if user is None or user.id != playerId:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    channel = relay_hub.open_game(playerId, user.username, mode)
+    active_players.heartbeat(playerId, user.username, mode.value, 0)
+    try:
+        await websocket.accept()
+        while True:
+            message = await websocket.receive_text()
+            try:
+                frame = GameFrame.model_validate_json(message)
+            except ValidationError:
+                continue
+            channel.publish(frame)
+            active_players.heartbeat(playerId, user.username, mode.value, frame.score)
+            share_frame(playerId, user.username, mode, frame)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        relay_hub.close_game(channel)
+        # A reconnected client may already be publishing on a new socket
+        if not channel.live:
+            active_players.remove(playerId)
+            share_game_end(playerId)
+
+async def frame_event_stream(
+    player_id: str,
+    protocol: StreamProtocol = StreamProtocol.full,
+    encoding: StreamEncoding = StreamEncoding.json,
+    keepalive: float = settings.SPECTATE_KEEPALIVE_SECONDS,
+) -> AsyncGenerator[bytes, None]:
+    # Messages arrive already encoded and SSE-framed by the channel's FrameProducer,
+    # shared by every spectator watching in the same format.
+    subscription = relay_hub.subscribe(player_id, StreamFormat(protocol, encoding, "sse"))
+    spectate_connections.inc(("sse",))
+    try:
+        while True:
+            try:
+                message = await asyncio.wait_for(subscription.get(), timeout=keepalive)
+            except asyncio.TimeoutError:
+                # SSE comment: keeps proxies from closing an idle stream
+                yield b": keepalive\n\n"
+                continue
+            spectate_frames.inc(("sse",))
+            yield message
+    finally:
+        spectate_connections.dec(("sse",))
+        relay_hub.unsubscribe(player_id, subscription)
 
 @router.get("/{playerId}/watch")
-async def watch_player(playerId: str, db: AsyncSession = Depends(get_db)):
-    # For now, allow watching any ID for demo purposes, or check if user exists
-    # If we want to check validation:
-    # user = await crud.get_user(db, playerId)
-    # if not user and not playerId.startswith("user_demo"):
-    #    raise HTTPException(status_code=404, detail="Player not found")
-        
+async def watch_player(
+    playerId: str,
+    protocol: StreamProtocol = StreamProtocol.full,
+    encoding: StreamEncoding = StreamEncoding.json,
+):
+    # protocol=delta sends keyframes plus small diffs; encoding=binary packs them (see frame_codec).
+    # When the player's game ends an `end` event is sent and the stream waits for the next one.
     return StreamingResponse(
-        game_stream_generator(playerId), 
+        frame_event_stream(playerId, protocol, encoding),
         media_type="text/event-stream"
     )
+
+@router.websocket("/{playerId}/ws")
+async def watch_player_ws(
+    websocket: WebSocket,
+    playerId: str,
+    protocol: StreamProtocol = StreamProtocol.full,
+    encoding: StreamEncoding = StreamEncoding.json,
+):
+    subscription = relay_hub.subscribe(playerId, StreamFormat(protocol, encoding, "ws"))
+    spectate_connections.inc(("ws",))
+
+    async def forward() -> None:
+        while True:
+            message = await subscription.get()
+            if isinstance(message, bytes):
+                await websocket.send_bytes(message)
+            else:
+                await websocket.send_text(message)
+            spectate_frames.inc(("ws",))
+
+    async def until_disconnect() -> None:
+        # Spectators send nothing; reading is how a closed socket is noticed
+        # while no frames are flowing
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+
+    try:
+        await websocket.accept()
+        tasks = [asyncio.create_task(forward()), asyncio.create_task(until_disconnect())]
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks:
+                task.cancel()
+        for task in done:
+            task.result()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        spectate_connections.dec(("ws",))
+        relay_hub.unsubscribe(playerId, subscription)
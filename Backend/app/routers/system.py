@@ -0,0 +1,53 @@
+from fastapi import APIRouter
+
+from ..active_players import active_players
+from ..core.database import pool_metrics
+from ..dependencies import user_cache
+from ..event_bus import event_bus
+from ..profiling import query_profiler
+from ..verification import replay_verifier
+from ..write_behind import score_writer
+
+router = APIRouter(prefix="/system", tags=["System"])
+
+
+@router.get("/verification")
+async def get_verification_stats():
+    # Replay verification pool: throughput, queue depth and outcomes
+    return replay_verifier.stats()
+
+
+@router.get("/ingest")
+async def get_ingest_stats():
+    # Write-behind score queue (SCORE_WRITE_BEHIND)
+    return score_writer.stats()
+
+
+@router.get("/user-cache")
+async def get_user_cache_stats():
+    # User id -> profile cache used by /auth/me
+    return user_cache.stats()
+
+
+@router.get("/pool")
+async def get_pool_stats():
+    # Connection pools: checkout wait times, in-use and overflow (per engine)
+    return {name: metrics.stats() for name, metrics in pool_metrics.items()}
+
+
+@router.get("/queries")
+async def get_query_stats():
+    # Per-route SQL query counts and DB time (QUERY_PROFILING)
+    return query_profiler.stats()
+
+
+@router.get("/events")
+async def get_event_bus_stats():
+    # Cross-worker event bus: backend, and events sent, received and dropped by this worker
+    return event_bus.stats()
+
+
+@router.get("/players")
+async def get_active_player_stats():
+    # Active-player registry: players per mode, heartbeats and expirations
+    return active_players.stats()
@@ -0,0 +1,110 @@
+import asyncio
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Tuple
+
+from .core.config import settings
+from .engine import run_replay
+from .replay_store import decode_replay
+
+# Replay verification for POST /leaderboard.
+# A replay (seed + direction changes, as a binary record) is re-simulated with app.engine in a
+# process pool, so a long game never blocks the event loop, and the score is
+# only accepted if the simulation reaches the same one. Work is bounded: once
+# REPLAY_VERIFY_MAX_PENDING replays are queued or running, verify() raises
+# VerifierBusy and the router answers 429.
+
+# Completions counted for the throughput figure
+RATE_WINDOW_SECONDS = 60.0
+
+
+class VerifierBusy(Exception):
+    pass
+
+
+class InvalidReplay(ValueError):
+    pass
+
+
+def simulate(data: bytes) -> Tuple[int, int]:
+    """Worker entry point: re-simulates a binary replay record. (score, ticks)."""
+    record = decode_replay(data)
+    game = run_replay(record.mode, record.seed, record.inputs(), record.ticks)
+    return game.score, game.tick
+
+
+class ReplayVerifier:
+    def __init__(self, workers: Optional[int], max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.pending = 0
+        self.verified = 0
+        self.rejected = 0
+        self.ticks_simulated = 0
+        self.busy_seconds = 0.0
+        self._completed_at: deque = deque()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        # Started on first use so importing the app (tests, scripts) doesn't start workers.
+        # The server has threads (aiosqlite, the default executor), so don't fork it.
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("forkserver"))
+        return self._executor
+
+    async def verify(self, data: bytes) -> bool:
+        """Whether a binary replay record (app.replay_store) reaches the score in its header."""
+        record = decode_replay(data)
+        if record.ticks > settings.REPLAY_MAX_TICKS:
+            raise InvalidReplay(f"Replay longer than {settings.REPLAY_MAX_TICKS} ticks")
+        if self.pending >= self.max_pending:
+            raise VerifierBusy()
+
+        self.pending += 1
+        started = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            # The compact record is what crosses the process boundary
+            simulated, ticks = await loop.run_in_executor(self._pool(), simulate, data)
+        finally:
+            self.pending -= 1
+        self.busy_seconds += time.perf_counter() - started
+        self.ticks_simulated += ticks
+        self._completed_at.append(time.monotonic())
+
+        if simulated == record.score:
+            self.verified += 1
+            return True
+        self.rejected += 1
+        return False
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        while self._completed_at and self._completed_at[0] < now - RATE_WINDOW_SECONDS:
+            self._completed_at.popleft()
+        # ProcessPoolExecutor's own default
+        workers = self.workers or os.cpu_count() or 1
+        completed = self.verified + self.rejected
+        return {
+            "mode": settings.SCORE_VERIFICATION,
+            "workers": workers,
+            "pending": self.pending,
+            "queued": max(0, self.pending - workers),
+            "max_pending": self.max_pending,
+            "verified": self.verified,
+            "rejected": self.rejected,
+            "per_second": len(self._completed_at) / RATE_WINDOW_SECONDS,
+            "avg_ms": self.busy_seconds / completed * 1000 if completed else 0.0,
+            "ticks_simulated": self.ticks_simulated,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+
+replay_verifier = ReplayVerifier(settings.REPLAY_VERIFY_WORKERS, settings.REPLAY_VERIFY_MAX_PENDING)
@@ -0,0 +1,361 @@
+import asyncio
+import contextlib
+import fcntl
+import glob
+import json
+import logging
+import os
+from typing import Dict, List, Optional
+
+from sqlalchemy import exc
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from .cluster import share_scores
+from .core.config import settings
+from .leaderboard_index import IndexedEntry, leaderboard_index
+from .ranking import rank_engine
+from . import crud
+
+logger = logging.getLogger(__name__)
+
+# Write-behind ingestion for POST /leaderboard (SCORE_WRITE_BEHIND).
+#
+# A validated submission is appended to a local journal and queued, and the
+# request returns 202 right away. A background task flushes the queue with one
+# multi-row INSERT (plus one player_stats upsert) every SCORE_FLUSH_INTERVAL_MS
+# or SCORE_FLUSH_MAX_ROWS rows, whichever comes first, and only then applies
+# the rows to the in-memory leaderboard and rank indexes.
+#
+# SCORE_JOURNAL picks the durability of an acknowledged score:
+#   "fsync": the journal line is fsync'd before the 202 (concurrent requests
+#            share one fsync), so it survives a machine crash
+#   "write": written to the OS, survives a process crash
+#   "off"  : no journal; queued scores are lost if the process dies
+# Journal files rotate on every flush and are deleted once all their rows are
+# committed. On startup, leftover journals are replayed, skipping ids that
+# already made it to the database.
+#
+# Every worker process journals to its own files (scores-<pid>-<generation>.log)
+# and holds an flock on scores-<pid>.lock while it runs. A starting worker
+# locks SCORE_JOURNAL_DIR itself and replays only orphaned journals, the ones
+# whose owner's lock is free because that process is gone.
+#
+# Only transient database errors (lost connections, locks, pool timeouts) are
+# retried. A batch the database rejects outright (a duplicate id, a value out of
+# range) is bisected until the offending rows are isolated; those are appended
+# to SCORE_JOURNAL_DIR/dead-letter.log and the rest are committed. At most
+# SCORE_QUEUE_MAX_ROWS scores wait in the queue; beyond that POST /leaderboard
+# answers 503.
+
+JOURNAL_PREFIX = "scores-"
+DEAD_LETTER_FILE = "dead-letter.log"
+
+
+class ScoreQueueFull(Exception):
+    pass
+
+
+def is_transient(error: Exception) -> bool:
+    if isinstance(error, exc.DBAPIError):
+        return error.connection_invalidated or isinstance(error, (exc.OperationalError, exc.InterfaceError))
+    return isinstance(error, (exc.TimeoutError, OSError))
+
+
+class ScoreJournal:
+    def __init__(self, directory: str, fsync: bool, owner: Optional[str] = None):
+        self.directory = directory
+        self.fsync = fsync
+        self.owner = owner or str(os.getpid())
+        self.generation = 0
+        self._file = None
+        self._lock_fd: Optional[int] = None
+        self._abandoned: Dict[str, bool] = {}
+        self._outstanding: Dict[int, int] = {}
+        self._written = 0
+        self._synced = 0
+        self._syncing: Optional[asyncio.Future] = None
+
+    def _path(self, generation: int) -> str:
+        return os.path.join(self.directory, f"{JOURNAL_PREFIX}{self.owner}-{generation:08d}.log")
+
+    def _lock_path(self, owner: str) -> str:
+        return os.path.join(self.directory, f"{JOURNAL_PREFIX}{owner}.lock")
+
+    def existing(self) -> List[str]:
+        return sorted(glob.glob(os.path.join(self.directory, f"{JOURNAL_PREFIX}{self.owner}-*.log")))
+
+    def lock_directory(self) -> int:
+        """Block until no other worker is recovering or starting; close the fd to release."""
+        os.makedirs(self.directory, exist_ok=True)
+        fd = os.open(self.directory, os.O_RDONLY)
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        return fd
+
+    def _is_abandoned(self, owner: str) -> bool:
+        if owner not in self._abandoned:
+            try:
+                fd = os.open(self._lock_path(owner), os.O_RDWR)
+            except FileNotFoundError:
+                self._abandoned[owner] = True
+            else:
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    self._abandoned[owner] = True
+                except BlockingIOError:
+                    self._abandoned[owner] = False
+                finally:
+                    os.close(fd)
+        return self._abandoned[owner]
+
+    def orphaned(self) -> List[str]:
+        """Journals no running worker owns, including this pid's from an earlier process. Call with the directory locked."""
+        paths = []
+        for path in glob.glob(os.path.join(self.directory, f"{JOURNAL_PREFIX}*.log")):
+            owner = os.path.basename(path)[len(JOURNAL_PREFIX):-4].rpartition("-")[0]
+            if owner == self.owner or self._is_abandoned(owner):
+                paths.append(path)
+        return sorted(paths)
+
+    def discard(self, paths: List[str]) -> None:
+        """Delete recovered journals and the locks their dead owners left."""
+        for path in paths:
+            os.remove(path)
+        for owner, abandoned in self._abandoned.items():
+            if abandoned:
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(self._lock_path(owner))
+        self._abandoned = {}
+
+    def open(self) -> None:
+        """Start journaling; call with the directory locked, after recovery."""
+        self._lock_fd = os.open(self._lock_path(self.owner), os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+        self._file = open(self._path(self.generation), "a")
+
+    async def append(self, entry: IndexedEntry) -> int:
+        """Journal one entry; returns its generation for release()."""
+        self._file.write(json.dumps(list(entry), separators=(",", ":")) + "\n")
+        self._file.flush()
+        generation = self.generation
+        self._outstanding[generation] = self._outstanding.get(generation, 0) + 1
+        self._written += 1
+        if self.fsync:
+            await self._sync(self._written)
+        return generation
+
+    async def _sync(self, target: int) -> None:
+        # Group commit: one fsync covers every line written before it started
+        while self._synced < target:
+            if self._syncing is None:
+                self._syncing = asyncio.ensure_future(self._fsync())
+            await asyncio.shield(self._syncing)
+
+    async def _fsync(self) -> None:
+        upto, fd = self._written, self._file.fileno()
+        try:
+            await asyncio.to_thread(os.fsync, fd)
+            self._synced = upto
+        finally:
+            self._syncing = None
+
+    def rotate(self) -> None:
+        if not self._outstanding.get(self.generation):
+            return
+        if self.fsync and (self._syncing is not None or self._synced < self._written):
+            # Lines in the current file are still waiting for their fsync; rotate on a later flush
+            return
+        self._file.close()
+        self.generation += 1
+        self._file = open(self._path(self.generation), "a")
+
+    def release(self, generations: List[int]) -> None:
+        """Rows from these generations are committed; delete journals that are fully committed."""
+        for generation in generations:
+            self._outstanding[generation] -= 1
+        for generation, count in list(self._outstanding.items()):
+            if count == 0 and generation != self.generation:
+                del self._outstanding[generation]
+                os.remove(self._path(generation))
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        # Journals with uncommitted rows are kept, and recovered by the next
+        # worker to start once this one's lock is released
+        if not any(self._outstanding.values()):
+            for path in self.existing():
+                os.remove(path)
+            os.remove(self._lock_path(self.owner))
+        self._outstanding = {}
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+
+class ScoreWriter:
+    def __init__(self):
+        self.queue: Optional[asyncio.Queue] = None
+        self.journal: Optional[ScoreJournal] = None
+        self._session_factory: Optional[async_sessionmaker] = None
+        self._task: Optional[asyncio.Task] = None
+        self._accepting = False
+        # Submissions being journaled; their queue slots are already taken
+        self._reserved = 0
+        self.flushed = 0
+        self.batches = 0
+        self.dead_lettered = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._accepting
+
+    async def start(self, session_factory: async_sessionmaker) -> None:
+        self._session_factory = session_factory
+        if settings.SCORE_JOURNAL != "off":
+            self.journal = ScoreJournal(settings.SCORE_JOURNAL_DIR, fsync=settings.SCORE_JOURNAL == "fsync")
+            directory = await asyncio.to_thread(self.journal.lock_directory)
+            try:
+                await self.recover()
+                self.journal.open()
+            finally:
+                os.close(directory)
+        self.queue = asyncio.Queue(maxsize=settings.SCORE_QUEUE_MAX_ROWS)
+        self._task = asyncio.create_task(self._run())
+        self._accepting = True
+
+    async def recover(self) -> int:
+        """Insert rows left in journals by workers that are gone; returns how many were missing."""
+        entries: Dict[str, IndexedEntry] = {}
+        paths = self.journal.orphaned()
+        for path in paths:
+            with open(path) as f:
+                for line in f:
+                    try:
+                        entry = IndexedEntry(*json.loads(line))
+                    except (ValueError, TypeError):
+                        # Torn last line from a crash mid-write
+                        continue
+                    entries[entry.id] = entry
+        missing = []
+        async with self._session_factory() as db:
+            ids = list(entries)
+            for i in range(0, len(ids), 500):
+                chunk = ids[i:i + 500]
+                present = await crud.get_existing_entry_ids(db, chunk)
+                missing.extend(entries[entry_id] for entry_id in chunk if entry_id not in present)
+        for i in range(0, len(missing), settings.SCORE_FLUSH_MAX_ROWS):
+            await self._insert(missing[i:i + settings.SCORE_FLUSH_MAX_ROWS])
+        self.journal.discard(paths)
+        if missing:
+            logger.info("Recovered %d journaled scores", len(missing))
+        return len(missing)
+
+    async def submit(self, entry: IndexedEntry) -> None:
+        """Returns once the entry is journaled (per SCORE_JOURNAL) and queued; ScoreQueueFull if there's no room."""
+        # The slot is taken before journaling, so a journaled entry always fits in the queue
+        if self.queue.qsize() + self._reserved >= self.queue.maxsize:
+            raise ScoreQueueFull()
+        self._reserved += 1
+        try:
+            generation = await self.journal.append(entry) if self.journal is not None else 0
+        finally:
+            self._reserved -= 1
+        self.queue.put_nowait((entry, generation))
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        interval = settings.SCORE_FLUSH_INTERVAL_MS / 1000
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + interval
+            while len(batch) < settings.SCORE_FLUSH_MAX_ROWS:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self._flush(batch)
+
+    async def _flush(self, batch: list) -> None:
+        if self.journal is not None:
+            self.journal.rotate()
+        entries = await self._insert([entry for entry, _ in batch])
+        for entry in entries:
+            leaderboard_index.add(entry)
+            rank_engine.add(entry)
+        share_scores(entries)
+        if self.journal is not None:
+            self.journal.release([generation for _, generation in batch])
+        self.flushed += len(entries)
+        self.batches += 1
+        for _ in batch:
+            self.queue.task_done()
+
+    async def _insert(self, entries: List[IndexedEntry]) -> List[IndexedEntry]:
+        """Commit `entries`; returns the ones that made it (the rest are dead-lettered)."""
+        delay = 0.1
+        while True:
+            try:
+                async with self._session_factory() as db:
+                    await crud.create_leaderboard_entries(db, entries)
+                return entries
+            except Exception as error:
+                if not is_transient(error):
+                    rejected = error
+                    break
+                # Rows stay journaled and queued in memory; keep retrying
+                logger.exception("Flushing %d scores failed, retrying in %.1fs", len(entries), delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 5.0)
+        if len(entries) == 1:
+            self._dead_letter(entries[0], rejected)
+            return []
+        middle = len(entries) // 2
+        return await self._insert(entries[:middle]) + await self._insert(entries[middle:])
+
+    def _dead_letter(self, entry: IndexedEntry, error: Exception) -> None:
+        logger.error("Score %s rejected by the database, moved to the dead-letter log: %s", entry.id, error)
+        line = json.dumps([*entry, str(error)], separators=(",", ":"))
+        try:
+            os.makedirs(settings.SCORE_JOURNAL_DIR, exist_ok=True)
+            with open(os.path.join(settings.SCORE_JOURNAL_DIR, DEAD_LETTER_FILE), "a") as f:
+                f.write(line + "\n")
+        except OSError:
+            # Keep the flusher running; the row survives in the log output
+            logger.exception("Could not write the dead-letter log, dropping %s", line)
+        self.dead_lettered += 1
+
+    async def stop(self) -> None:
+        """Stop accepting, flush everything queued, then stop the flusher."""
+        if self._task is None:
+            return
+        self._accepting = False
+        try:
+            await asyncio.wait_for(self.queue.join(), settings.SCORE_DRAIN_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            logger.warning("%d scores not flushed at shutdown; they stay in the journal", self.queue.qsize())
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self._accepting,
+            "queued": self.queue.qsize() if self.queue is not None else 0,
+            "flushed": self.flushed,
+            "batches": self.batches,
+            "dead_lettered": self.dead_lettered,
+            "journal": settings.SCORE_JOURNAL,
+        }
+
+
+score_writer = ScoreWriter()
@@ -0,0 +1,15 @@
+import asyncio
+from app.core.database import AsyncSessionLocal
+from app.crud import rebuild_player_stats
+
+# Rebuild the player_stats aggregate table from the leaderboard table.
+# The Alembic migration backfills once; run this to repair drift on an existing database.
+
+async def backfill():
+    async with AsyncSessionLocal() as session:
+        print("Rebuilding player_stats from leaderboard...")
+        rows = await rebuild_player_stats(session)
+        print(f"Done. {rows} player/mode rows written.")
+
+if __name__ == "__main__":
+    asyncio.run(backfill())
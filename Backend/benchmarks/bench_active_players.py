@@ -0,0 +1,80 @@
+"""Active-player registry at tens of thousands of players: heartbeats, reads and expiry.
+
+Players heartbeat in a steady round robin over a simulated clock (every player
+once per --interval seconds) while reads ask for the top --limit, with and
+without a mode filter. Then everybody stops and expiry is compared with a
+periodic full scan: the scan walks every player on every tick, while the wheel
+only touches the players expiring in that tick (the p50 is a tick with nobody
+due; the p99 includes removing a whole slice).
+
+Usage (from Backend/):
+    uv run python -m benchmarks.bench_active_players --players 50000 --limit 100
+"""
+import argparse
+import random
+import time
+
+from app.active_players import ActivePlayerRegistry
+
+from .common import MODES, report
+
+
+class SimulatedClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def main(players: int, interval: float, timeout: float, limit: int, rounds: int):
+    rng = random.Random(1)
+    clock = SimulatedClock()
+    registry = ActivePlayerRegistry(timeout=timeout, resolution=1.0, clock=clock)
+    modes = {f"p{i}": rng.choice(MODES) for i in range(players)}
+    step = interval / players
+
+    heartbeat = []
+    for _ in range(rounds):
+        for player_id, mode in modes.items():
+            clock.now += step
+            t0 = time.perf_counter()
+            registry.heartbeat(player_id, player_id, mode, rng.randrange(10_000))
+            heartbeat.append(time.perf_counter() - t0)
+    print(f"{players:,} players, heartbeat every {interval:.0f}s, timeout {timeout:.0f}s")
+    print(f"  {len(heartbeat) / sum(heartbeat):,.0f} heartbeats/s")
+    report("  heartbeat", heartbeat)
+
+    for label, mode in (("top, all modes", None), ("top, one mode", MODES[0])):
+        samples = []
+        for _ in range(200):
+            t0 = time.perf_counter()
+            registry.active(mode, limit)
+            samples.append(time.perf_counter() - t0)
+        report(f"  {label}", samples)
+
+    # Everybody stops: once the timeout passes, each tick expires one slice of them
+    wheel, scan = [], []
+    for _ in range(int(timeout + interval) + 2):
+        clock.now += 1.0
+        snapshot = {player.id: player.last_seen for player in registry._players.values()}
+        t0 = time.perf_counter()
+        [player_id for player_id, last_seen in snapshot.items() if clock.now - last_seen >= timeout]
+        scan.append(time.perf_counter() - t0)
+        t0 = time.perf_counter()
+        len(registry)
+        wheel.append(time.perf_counter() - t0)
+    print(f"  expired {registry.expired:,} players over {len(wheel)} ticks")
+    report("  expiry per tick: full scan", scan)
+    report("  expiry per tick: wheel", wheel)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--players", type=int, default=50_000)
+    parser.add_argument("--interval", type=float, default=5.0)
+    parser.add_argument("--timeout", type=float, default=15.0)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+    main(args.players, args.interval, args.timeout, args.limit, args.rounds)
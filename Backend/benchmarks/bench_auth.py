@@ -0,0 +1,72 @@
+"""Cost of authenticating one request: verifying a signed token vs the users-table SELECT.
+
+The SELECT is what get_current_user did when the token was the raw user id
+(crud.get_user on a fresh session per request, as get_db provides).
+
+Usage (from Backend/):
+    uv run python -m benchmarks.bench_auth --requests 20000
+    uv run python -m benchmarks.bench_auth --db-url postgresql+asyncpg://user:pw@localhost/bench
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app import crud
+from app.core.database import Base
+from app.core.security import create_token, verify_token
+from app.models_db import User
+
+from .common import report
+
+
+async def main(requests: int, users: int, db_url: str | None):
+    tmp = None
+    if db_url is None:
+        tmp = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+        db_url = f"sqlite+aiosqlite:///{tmp.name}"
+    engine = create_async_engine(db_url)
+    Session = async_sessionmaker(bind=engine, class_=AsyncSession)
+    ids = [f"user_{i:08x}" for i in range(users)]
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+            await conn.execute(insert(User), [
+                {"id": user_id, "username": f"player{i}", "email": f"p{i}@example.com", "password_hash": "x"}
+                for i, user_id in enumerate(ids)
+            ])
+        print(f"{engine.dialect.name}: {users:,} users, {requests:,} authenticated requests")
+
+        latencies = []
+        for i in range(requests):
+            t0 = time.perf_counter()
+            async with Session() as db:
+                assert await crud.get_user(db, user_id=ids[i % users]) is not None
+            latencies.append(time.perf_counter() - t0)
+        report("  SELECT by id", latencies)
+
+        tokens = [create_token(user_id, f"player{i}") for i, user_id in enumerate(ids)]
+        latencies = []
+        for i in range(requests):
+            t0 = time.perf_counter()
+            assert verify_token(tokens[i % users]) is not None
+            latencies.append(time.perf_counter() - t0)
+        report("  verify signed token", latencies)
+    finally:
+        await engine.dispose()
+        if tmp is not None:
+            os.unlink(tmp.name)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--db-url", default=None, help="defaults to a temporary SQLite file")
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.users, args.db_url))
@@ -0,0 +1,48 @@
+"""Game-ticks per second of the NumPy batch engine for several batch sizes (needs the `sim` extra).
+
+Every game gets a random turn request each tick with probability 1/4, and dead
+games are restarted so the batch stays full.
+
+Usage (from Backend/):
+    uv run --extra sim python -m benchmarks.bench_batch_engine --games 100 1000 10000 --steps 500
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+from app.batch_engine import BatchSnakeGame
+from app.models import GameMode
+
+
+def run(mode: GameMode, games: int, steps: int) -> float:
+    rng = np.random.default_rng(1)
+    turns = np.where(rng.random((64, games)) < 0.25, rng.integers(0, 4, (64, games)), -1).astype(np.int8)
+    batch = BatchSnakeGame(mode, list(range(games)))
+    ticks = 0
+    start = time.perf_counter()
+    for i in range(steps):
+        batch.turn(turns[i & 63])
+        alive = batch.step()
+        ticks += games
+        if not alive.all():
+            batch.restart(~alive)
+    return ticks / (time.perf_counter() - start)
+
+
+def main(sizes, steps: int):
+    for mode in GameMode:
+        for games in sizes:
+            rate = run(mode, games, steps)
+            print(f"{mode.value:<13} {games:>7,} games  {rate:14,.0f} game-ticks/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--games", type=int, nargs="+", default=[100, 1_000, 10_000])
+    parser.add_argument("--steps", type=int, default=500)
+    args = parser.parse_args()
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, {sorted(os.sched_getaffinity(0))[0]})
+    main(args.games, args.steps)
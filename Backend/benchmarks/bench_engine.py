@@ -0,0 +1,70 @@
+"""Ticks per second of the scalar snake engine on one core.
+
+Every tick a seeded policy steers toward the food, with a random turn now
+and then so games don't settle into the same path. Snakes eat, grow,
+place new food and eventually run into themselves (or a wall), and are
+restarted on death, so the number includes turn handling, eating/food
+placement and game setup. The policy's own cost is included too.
+
+Usage (from Backend/):
+    uv run python -m benchmarks.bench_engine --ticks 2000000
+"""
+import argparse
+import os
+import random
+import time
+
+from app.engine import SnakeGame
+from app.models import GRID_SIZE, Direction, GameMode
+
+TARGET = 1_000_000
+
+
+def run(mode: GameMode, ticks: int, wander: float) -> tuple:
+    rng = random.Random(1)
+    directions = list(Direction)
+    games = eaten = 0
+    done = 0
+    start = time.perf_counter()
+    while done < ticks:
+        game = SnakeGame(mode, seed=games)
+        games += 1
+        step, turn = game.step, game.turn
+        i, budget = 0, ticks - done
+        while step() and i < budget:
+            i += 1
+            food = game.food
+            if food < 0 or rng.random() < wander:
+                turn(rng.choice(directions))
+                continue
+            head = game.head
+            hx, hy, fx, fy = head % GRID_SIZE, head // GRID_SIZE, food % GRID_SIZE, food // GRID_SIZE
+            vertical = Direction.DOWN if fy > hy else Direction.UP
+            if hx == fx:
+                # Food straight behind: go round it
+                turn(vertical) or turn(Direction.RIGHT)
+            elif not turn(Direction.RIGHT if fx > hx else Direction.LEFT):
+                turn(vertical)
+        done += i + 1
+        eaten += game.score
+    return done / (time.perf_counter() - start), games, eaten
+
+
+def main(ticks: int, wander: float):
+    for mode in GameMode:
+        rate, games, eaten = run(mode, ticks, wander)
+        verdict = "meets" if rate >= TARGET else "misses"
+        print(
+            f"{mode.value:<13} {rate:12,.0f} ticks/s  ({games:,} games, {eaten / games:.1f} food/game)"
+            f"  {verdict} the {TARGET:,} ticks/s target"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--ticks", type=int, default=2_000_000)
+    parser.add_argument("--wander", type=float, default=0.1, help="chance of a random turn instead of steering")
+    args = parser.parse_args()
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, {sorted(os.sched_getaffinity(0))[0]})
+    main(args.ticks, args.wander)
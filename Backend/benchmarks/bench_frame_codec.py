@@ -0,0 +1,82 @@
+"""Bytes per spectator per second and encode cost for each spectate wire format.
+
+Usage (from Backend/):
+    uv run python -m benchmarks.bench_frame_codec --fps 10 --lengths 10 50 150
+"""
+import argparse
+import base64
+import random
+import time
+
+from app.frame_codec import FrameEncoder
+from app.models import Direction, GameFrame, StreamEncoding, StreamProtocol
+
+GRID = 20
+MOVES = {Direction.UP: (0, -1), Direction.DOWN: (0, 1), Direction.LEFT: (-1, 0), Direction.RIGHT: (1, 0)}
+
+FORMATS = [
+    ("full/json (SSE)", StreamProtocol.full, StreamEncoding.json, "sse"),
+    ("delta/json (SSE)", StreamProtocol.delta, StreamEncoding.json, "sse"),
+    ("delta/binary (SSE, base64)", StreamProtocol.delta, StreamEncoding.binary, "sse"),
+    ("delta/binary (WebSocket)", StreamProtocol.delta, StreamEncoding.binary, "ws"),
+]
+
+
+def frames(length: int, count: int, seed: int = 1):
+    """A snake of fixed `length` wandering the torus; eats (score/food change) every ~10 ticks."""
+    rng = random.Random(seed)
+    snake = [(10 - i % GRID, 10) for i in range(length)]
+    food, score, direction = (3, 3), 0, Direction.RIGHT
+    for _ in range(count):
+        if rng.random() < 0.15:
+            direction = rng.choice([d for d in MOVES if MOVES[d] != tuple(-v for v in MOVES[direction])])
+        dx, dy = MOVES[direction]
+        snake = [((snake[0][0] + dx) % GRID, (snake[0][1] + dy) % GRID)] + snake[:-1]
+        if rng.random() < 0.1:
+            score += 1
+            food = (rng.randrange(GRID), rng.randrange(GRID))
+        yield GameFrame(
+            snake=[{"x": x, "y": y} for x, y in snake],
+            food={"x": food[0], "y": food[1]},
+            score=score,
+            direction=direction,
+        )
+
+
+def wire_size(message, transport: str) -> int:
+    if transport == "sse":
+        if isinstance(message, bytes):
+            message = base64.b64encode(message).decode()
+        return len(f"data: {message}\n\n".encode())
+    # WebSocket server->client framing: 2 bytes header (+2 for payloads >= 126 bytes)
+    payload = len(message if isinstance(message, bytes) else message.encode())
+    return payload + (2 if payload < 126 else 4)
+
+
+def main(fps: float, seconds: float, lengths):
+    count = int(fps * seconds)
+    for length in lengths:
+        sample = list(frames(length, count))
+        print(f"snake length {length}, {fps:g} fps, {count} frames")
+        baseline = None
+        for label, protocol, encoding, transport in FORMATS:
+            encoder = FrameEncoder(protocol, encoding)
+            start = time.perf_counter()
+            messages = [encoder.encode(frame) for frame in sample]
+            encode_us = (time.perf_counter() - start) / count * 1e6
+            total = sum(wire_size(m, transport) for m in messages)
+            per_second = total / seconds
+            baseline = baseline or per_second
+            print(
+                f"  {label:<28} {per_second:10,.0f} B/s per spectator  "
+                f"({baseline / per_second:5.1f}x smaller)  encode {encode_us:6.1f}us/frame"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--fps", type=float, default=10.0)
+    parser.add_argument("--seconds", type=float, default=60.0)
+    parser.add_argument("--lengths", type=int, nargs="+", default=[10, 50, 150])
+    args = parser.parse_args()
+    main(args.fps, args.seconds, args.lengths)
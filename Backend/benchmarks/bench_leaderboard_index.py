@@ -0,0 +1,72 @@
+"""Compare GET /leaderboard read latency: SQL ORDER BY ... LIMIT vs the in-memory index.
+
+Usage (from Backend/):
+    uv run python -m benchmarks.bench_leaderboard_index --rows 1000000 --reads 2000
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from app import crud
+from app.core.database import Base
+from app.leaderboard_index import RankedBoard
+
+from .common import populate_leaderboard, percentile, report
+
+
+async def main(rows: int, reads: int, limit: int, db_url: str | None):
+    tmp = None
+    if db_url is None:
+        tmp = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+        db_url = f"sqlite+aiosqlite:///{tmp.name}"
+
+    engine = create_async_engine(db_url)
+    Session = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+
+        start = time.perf_counter()
+        await populate_leaderboard(engine, rows)
+        print(f"populated {rows:,} rows in {time.perf_counter() - start:.1f}s")
+
+        async with Session() as db:
+            sql = []
+            for _ in range(reads):
+                t0 = time.perf_counter()
+                await crud.get_leaderboard(db, limit=limit)
+                sql.append(time.perf_counter() - t0)
+
+            index = RankedBoard(capacity=10000)
+            t0 = time.perf_counter()
+            await index.load(db)
+            print(f"index load: {(time.perf_counter() - t0) * 1000:.1f}ms ({len(index):,} entries)")
+
+        mem = []
+        for _ in range(reads):
+            t0 = time.perf_counter()
+            index.top(limit)
+            mem.append(time.perf_counter() - t0)
+
+        report("sql ORDER BY LIMIT", sql)
+        report("in-memory index", mem)
+        print(f"p50 speedup: {percentile(sql, 50) / percentile(mem, 50):,.0f}x")
+    finally:
+        await engine.dispose()
+        if tmp is not None:
+            os.unlink(tmp.name)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--reads", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--db-url", default=None, help="defaults to a temporary SQLite file")
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.reads, args.limit, args.db_url))
@@ -0,0 +1,95 @@
+"""Page through the whole leaderboard with keyset cursors, and compare page cost by depth with OFFSET.
+
+Usage (from Backend/):
+    uv run python -m benchmarks.bench_leaderboard_pagination --rows 1000000 --page-size 100
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from app import crud
+from app.core.database import Base
+from app.models_db import LeaderboardEntry
+
+from .common import populate_leaderboard, report
+
+
+async def offset_page(db, offset: int, limit: int):
+    result = await db.execute(
+        select(LeaderboardEntry)
+        .order_by(LeaderboardEntry.score.desc(), LeaderboardEntry.timestamp.asc(), LeaderboardEntry.id.asc())
+        .offset(offset)
+        .limit(limit)
+    )
+    return result.scalars().all()
+
+
+async def main(rows: int, page_size: int, samples: int, db_url: str | None):
+    tmp = None
+    if db_url is None:
+        tmp = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+        db_url = f"sqlite+aiosqlite:///{tmp.name}"
+
+    engine = create_async_engine(db_url)
+    Session = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+        await populate_leaderboard(engine, rows)
+
+        depths = [d for d in (0, 10_000, 100_000, 500_000, rows - page_size) if 0 <= d < rows]
+
+        # Full keyset traversal, recording per-page latency around the sample depths
+        keyset_by_depth = {d: [] for d in depths}
+        all_pages = []
+        async with Session() as db:
+            start = time.perf_counter()
+            after, position = None, 0
+            while True:
+                t0 = time.perf_counter()
+                page = await crud.get_leaderboard(db, limit=page_size, after=after)
+                elapsed = time.perf_counter() - t0
+                db.expunge_all()
+                all_pages.append(elapsed)
+                for d in depths:
+                    if d <= position < d + samples * page_size:
+                        keyset_by_depth[d].append(elapsed)
+                if len(page) < page_size:
+                    break
+                last = page[-1]
+                after = (last.score, last.timestamp, last.id)
+                position += page_size
+            total = time.perf_counter() - start
+        print(f"keyset: paged through {position + len(page):,} entries in {len(all_pages):,} pages, {total:.1f}s")
+        report("keyset (all pages)", all_pages)
+
+        async with Session() as db:
+            for d in depths:
+                offset = []
+                for i in range(samples):
+                    t0 = time.perf_counter()
+                    await offset_page(db, d + i * page_size, page_size)
+                    offset.append(time.perf_counter() - t0)
+                    db.expunge_all()
+                report(f"offset  @ depth {d:>9,}", offset)
+                report(f"keyset  @ depth {d:>9,}", keyset_by_depth[d])
+    finally:
+        await engine.dispose()
+        if tmp is not None:
+            os.unlink(tmp.name)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--samples", type=int, default=20, help="pages timed at each depth")
+    parser.add_argument("--db-url", default=None, help="defaults to a temporary SQLite file")
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.page_size, args.samples, args.db_url))
@@ -0,0 +1,111 @@
+"""GET /leaderboard requests/sec: response_model validation + encoding per request vs pre-rendered bytes.
+
+Both endpoints read the same in-memory board. "response_model" is the handler as
+it was before pages were pre-rendered (the ORM-shaped entries are validated
+against List[LeaderboardEntry] and JSON-encoded on every call); "pre-rendered"
+is the real GET /leaderboard. The ASGI app is called directly, so client,
+network and server costs are left out.
+
+Usage (from Backend/):
+    uv run python -m benchmarks.bench_leaderboard_rps --rows 100000 --limit 50 --seconds 5
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from typing import List, Optional
+
+from fastapi import Depends, FastAPI, Query
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.database import Base, get_read_db
+from app.leaderboard_index import leaderboard_index
+from app.models import GameMode, LeaderboardEntry
+from app.routers import leaderboard
+
+from .common import populate_leaderboard, report
+
+
+def build_app(Session) -> FastAPI:
+    app = FastAPI()
+    app.include_router(leaderboard.router)
+
+    @app.get("/before", response_model=List[LeaderboardEntry])
+    async def before(mode: Optional[GameMode] = None, limit: int = Query(50), db: AsyncSession = Depends(get_read_db)):
+        entries, _ = await leaderboard.read_page(db, mode, leaderboard.LeaderboardWindow.all_time, limit, None)
+        return entries
+
+    async def session():
+        async with Session() as db:
+            yield db
+
+    app.dependency_overrides[get_read_db] = session
+    return app
+
+
+async def get(app: FastAPI, path: str, limit: int) -> tuple:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": path, "raw_path": path.encode(), "query_string": f"limit={limit}".encode(), "root_path": "",
+        "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 1), "server": ("bench", 80),
+    }
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    return messages[0]["status"], b"".join(m.get("body", b"") for m in messages[1:])
+
+
+async def run(app: FastAPI, path: str, limit: int, seconds: float, concurrency: int):
+    latencies = []
+    deadline = time.perf_counter() + seconds
+
+    async def worker():
+        while time.perf_counter() < deadline:
+            t0 = time.perf_counter()
+            status, _ = await get(app, path, limit)
+            assert status == 200
+            latencies.append(time.perf_counter() - t0)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, time.perf_counter() - start
+
+
+async def main(rows: int, limit: int, seconds: float, concurrency: int):
+    tmp = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp.name}")
+    Session = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        await populate_leaderboard(engine, rows)
+        leaderboard_index.reset()
+
+        app = build_app(Session)
+        assert json.loads((await get(app, "/before", limit))[1]) == json.loads((await get(app, "/leaderboard", limit))[1])
+        print(f"{rows:,} rows, limit={limit}, {concurrency} concurrent clients, {seconds:.0f}s each")
+        for label, path in (("response_model", "/before"), ("pre-rendered", "/leaderboard")):
+            latencies, elapsed = await run(app, path, limit, seconds, concurrency)
+            print(f"  {label:<16} {len(latencies) / elapsed:10,.0f} req/s")
+            report(f"  {label}", latencies)
+    finally:
+        await engine.dispose()
+        os.unlink(tmp.name)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.limit, args.seconds, args.concurrency))
@@ -0,0 +1,96 @@
+"""Load test for the spectate relay: 1 publisher fanning out to N SSE spectators in one process.
+
+Each spectator consumes the real SSE generator (routers.spectate.frame_event_stream);
+frames are encoded once per format and shared. The process is pinned to one core.
+
+Usage (from Backend/):
+    uv run python -m benchmarks.bench_relay --spectators 1000 --fps 20 --seconds 10
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from app.models import Coordinate, Direction, GameFrame, GameMode
+from app.relay import relay_hub
+from app.routers.spectate import frame_event_stream
+
+from .common import report
+
+PLAYER_ID = "user_bench"
+
+
+def make_frame(tick: int, length: int) -> GameFrame:
+    head = tick % 400
+    snake = [Coordinate(x=(head - i) % 20, y=((head - i) // 20) % 20) for i in range(length)]
+    return GameFrame(snake=snake, food=Coordinate(x=3, y=4), score=tick, direction=Direction.RIGHT)
+
+
+async def spectator(published_at: dict, latencies: list, received: list, idx: int, stop: asyncio.Event):
+    stream = frame_event_stream(PLAYER_ID, keepalive=3600)
+    try:
+        while not stop.is_set():
+            event = await anext(stream)
+            if not event.startswith(b"data: "):
+                continue
+            # score carries the tick number in this benchmark
+            tick = int(event.rsplit(b'"score":', 1)[1].split(b",", 1)[0])
+            latencies.append(time.perf_counter() - published_at[tick])
+            received[idx] += 1
+    finally:
+        await stream.aclose()
+
+
+async def main(spectators: int, fps: float, seconds: float, length: int):
+    published_at = {}
+    latencies = []
+    received = [0] * spectators
+    stop = asyncio.Event()
+
+    tasks = [
+        asyncio.create_task(spectator(published_at, latencies, received, i, stop))
+        for i in range(spectators)
+    ]
+    await asyncio.sleep(0.1)  # let every spectator subscribe
+
+    channel = relay_hub.open_game(PLAYER_ID, "Bench", GameMode.pass_through)
+    frames = [make_frame(tick, length) for tick in range(int(fps * seconds) + 1)]
+    interval = 1 / fps if fps > 0 else 0
+    start = time.perf_counter()
+    published = 0
+    for tick, frame in enumerate(frames):
+        published_at[tick] = time.perf_counter()
+        channel.publish(frame)
+        published += 1
+        next_at = start + (tick + 1) * interval
+        await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+        if time.perf_counter() - start >= seconds:
+            break
+    elapsed = time.perf_counter() - start
+    await asyncio.sleep(0.5)  # drain
+
+    stop.set()
+    relay_hub.close_game(channel)
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    delivered = sum(received)
+    dropped = published * spectators - delivered
+    print(f"spectators={spectators} snake_length={length} target_fps={fps}")
+    print(f"published {published} frames in {elapsed:.2f}s ({published / elapsed:.1f} fps)")
+    print(
+        f"delivered {delivered:,} frames ({delivered / elapsed:,.0f}/s), "
+        f"dropped {dropped:,} ({dropped / max(1, published * spectators):.2%})"
+    )
+    report("publish -> spectator latency", latencies)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--spectators", type=int, default=1000)
+    parser.add_argument("--fps", type=float, default=20.0, help="frames per second from the publisher")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--length", type=int, default=30, help="snake length in each frame")
+    args = parser.parse_args()
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, {sorted(os.sched_getaffinity(0))[0]})
+    asyncio.run(main(args.spectators, args.fps, args.seconds, args.length))
@@ -0,0 +1,77 @@
+"""Replay size per minute of gameplay (binary vs JSON), and store append/read throughput.
+
+Games are played by app.engine with a player who turns `--turns-per-minute`
+times on average, timed by the game's own tick interval.
+
+Usage (from Backend/):
+    uv run python -m benchmarks.bench_replay_format --games 2000 --turns-per-minute 90
+"""
+import argparse
+import json
+import random
+import tempfile
+import time
+
+from app.engine import DIRECTION_CODES, DIRECTIONS, SnakeGame
+from app.models import Direction, GameMode
+from app.replay_store import ReplayStore, encode_replay
+
+# Stop very long pass-through games so one game can't dominate the sample
+MAX_TICKS = 20_000
+
+
+def play(seed: int, turns_per_minute: float):
+    rng = random.Random(seed)
+    mode = GameMode.walls if seed % 2 else GameMode.pass_through
+    game = SnakeGame(mode, seed)
+    inputs, elapsed_ms = [], 0
+    while game.alive and game.tick < MAX_TICKS:
+        if rng.random() < turns_per_minute * game.interval_ms / 60_000:
+            direction = rng.choice(list(Direction))
+            if game.turn(direction):
+                inputs.append((game.tick, DIRECTION_CODES[direction]))
+        elapsed_ms += game.interval_ms
+        game.step()
+    return mode, game, inputs, elapsed_ms
+
+
+def main(games: int, turns_per_minute: float):
+    records, json_bytes, minutes, input_count = [], 0, 0.0, 0
+    for seed in range(games):
+        mode, game, inputs, elapsed_ms = play(seed, turns_per_minute)
+        records.append(encode_replay(mode, seed, game.score, game.tick, inputs))
+        json_bytes += len(json.dumps({
+            "seed": seed, "ticks": game.tick,
+            "inputs": [{"tick": t, "direction": DIRECTIONS[d].value} for t, d in inputs],
+        }, separators=(",", ":")))
+        minutes += elapsed_ms / 60_000
+        input_count += len(inputs)
+
+    binary_bytes = sum(len(r) for r in records)
+    print(f"{games:,} games, {minutes:,.1f} minutes of play, {input_count / minutes:.0f} inputs/minute")
+    print(f"  binary {binary_bytes / minutes:8,.0f} B/minute  ({binary_bytes / input_count:.2f} B/input incl. header)")
+    print(f"  json   {json_bytes / minutes:8,.0f} B/minute  ({json_bytes / binary_bytes:.1f}x larger)")
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = ReplayStore(directory, segment_bytes=64 * 1024 * 1024)
+        start = time.perf_counter()
+        for i, record in enumerate(records):
+            store.append(f"entry_{i:08x}", record)
+        append_s = time.perf_counter() - start
+
+        reader = ReplayStore(directory, segment_bytes=64 * 1024 * 1024)
+        start = time.perf_counter()
+        decoded = 0
+        for i in range(len(records)):
+            decoded += sum(1 for _ in reader.read(f"entry_{i:08x}").inputs())
+        read_s = time.perf_counter() - start
+    print(f"  append {len(records) / append_s:10,.0f} replays/s")
+    print(f"  read   {len(records) / read_s:10,.0f} replays/s  ({decoded / read_s:,.0f} inputs/s decoded via mmap)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--games", type=int, default=2000)
+    parser.add_argument("--turns-per-minute", type=float, default=90.0)
+    args = parser.parse_args()
+    main(args.games, args.turns_per_minute)
@@ -0,0 +1,101 @@
+"""Statements and latency per score write: ORM add + commit + refresh vs the current crud path.
+
+Runs `--concurrency` writers, each with its own session, doing `--writes` inserts
+in total. Statements are counted with a before_cursor_execute listener, so the
+refresh SELECT shows up as an extra round trip per write.
+
+Usage (from Backend/):
+    uv run python -m benchmarks.bench_write_path --writes 5000 --concurrency 16
+    uv run python -m benchmarks.bench_write_path --db-url postgresql+asyncpg://user:pw@localhost/bench
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import uuid
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app import crud
+from app.core.database import Base
+from app.models_db import LeaderboardEntry
+
+from .common import report
+
+
+async def legacy_create_leaderboard_entry(db, entry):
+    # The write path before the refresh was removed
+    db.add(entry)
+    await crud.upsert_player_stats(db, entry.username, entry.mode, entry.score, entry.timestamp)
+    await db.commit()
+    await db.refresh(entry)
+    return entry
+
+
+def new_entry(i: int) -> LeaderboardEntry:
+    return LeaderboardEntry(
+        id=f"entry_{uuid.uuid4().hex[:12]}",
+        username=f"player{i % 500}",
+        score=i % 997,
+        mode="walls" if i % 2 else "pass-through",
+        timestamp=int(time.time() * 1000),
+    )
+
+
+async def run(Session, write, writes: int, concurrency: int):
+    latencies = []
+    counter = iter(range(writes))
+
+    async def writer():
+        # expire_on_commit=True, as in get_db-style sessions
+        async with Session() as db:
+            for i in counter:
+                t0 = time.perf_counter()
+                await write(db, new_entry(i))
+                latencies.append(time.perf_counter() - t0)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(writer() for _ in range(concurrency)))
+    return latencies, time.perf_counter() - start
+
+
+async def main(writes: int, concurrency: int, db_url: str | None):
+    tmp = None
+    if db_url is None:
+        tmp = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+        db_url = f"sqlite+aiosqlite:///{tmp.name}"
+    engine = create_async_engine(db_url, pool_size=concurrency) if "postgresql" in db_url else create_async_engine(db_url)
+    Session = async_sessionmaker(bind=engine, class_=AsyncSession)
+
+    statements = 0
+
+    def count(*args):
+        nonlocal statements
+        statements += 1
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count)
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+        print(f"{engine.dialect.name}: {writes:,} writes, {concurrency} concurrent sessions")
+        for label, write in (("add+commit+refresh", legacy_create_leaderboard_entry), ("insert+commit", crud.create_leaderboard_entry)):
+            statements = 0
+            latencies, elapsed = await run(Session, write, writes, concurrency)
+            print(f"  {label:<20} {statements / writes:.2f} statements/write  {writes / elapsed:8,.0f} writes/s")
+            report(f"  {label}", latencies)
+    finally:
+        await engine.dispose()
+        if tmp is not None:
+            os.unlink(tmp.name)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--writes", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--db-url", default=None, help="defaults to a temporary SQLite file")
+    args = parser.parse_args()
+    asyncio.run(main(args.writes, args.concurrency, args.db_url))
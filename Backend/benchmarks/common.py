@@ -0,0 +1,42 @@
+import random
+import statistics
+
+from sqlalchemy import insert
+
+from app.models_db import LeaderboardEntry
+
+MODES = ["pass-through", "walls"]
+
+
+async def populate_leaderboard(engine, rows: int, users: int = 5000, chunk: int = 20000, seed: int = 1):
+    """Bulk-insert `rows` synthetic leaderboard entries with realistic-ish score skew."""
+    rng = random.Random(seed)
+    base_ts = 1_700_000_000_000
+    for start in range(0, rows, chunk):
+        batch = [
+            {
+                "id": f"entry_{i:09d}",
+                "username": f"player_{rng.randrange(users)}",
+                "score": int(rng.expovariate(1 / 40)),
+                "mode": rng.choice(MODES),
+                "timestamp": base_ts + i * 1000,
+            }
+            for i in range(start, min(start + chunk, rows))
+        ]
+        async with engine.begin() as conn:
+            await conn.execute(insert(LeaderboardEntry), batch)
+
+
+def percentile(samples, pct: float) -> float:
+    ordered = sorted(samples)
+    k = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[k]
+
+
+def report(label: str, samples) -> None:
+    print(
+        f"{label:<28} n={len(samples):<6} "
+        f"p50={percentile(samples, 50) * 1e6:10.1f}us  "
+        f"p99={percentile(samples, 99) * 1e6:10.1f}us  "
+        f"mean={statistics.fmean(samples) * 1e6:10.1f}us"
+    )
@@ -9,4 +9,5 @@ uv run alembic upgrade head
 
 # Start server
 echo "Starting application..."
-exec uv run uvicorn app.main:app --host 0.0.0.0 --port ${PORT:-8000}
+# Workers share live games and leaderboard updates over the event bus (EVENT_BUS)
+exec uv run uvicorn app.main:app --host 0.0.0.0 --port ${PORT:-8000} --workers ${WEB_CONCURRENCY:-1}
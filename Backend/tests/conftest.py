@@ -5,7 +5,14 @@ from sqlalchemy.pool import StaticPool
 from httpx import AsyncClient, ASGITransport
 
 from app.main import app
-from app.core.database import get_db, Base
+from app.core.database import get_db, get_read_db, Base
+from app.leaderboard_index import leaderboard_index
+from app.leaderboard_feed import leaderboard_feed
+from app.ranking import rank_engine
+from app.active_players import active_players
+from app.replay_store import replay_store
+from app.dependencies import user_cache
+from app.core.config import settings
 from app.models_db import User, LeaderboardEntry
 
 import os
@@ -36,6 +43,13 @@ async def db_session():
         
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
+    # The pooled connection's locks belong to this test's event loop
+    await engine.dispose()
+
+@pytest.fixture(autouse=True)
+def unverified_scores(monkeypatch):
+    # Most tests submit made-up scores; test_replay_verification covers "required"
+    monkeypatch.setattr(settings, "SCORE_VERIFICATION", "optional")
 
 @pytest.fixture(scope="session", autouse=True)
 def setup_static():
@@ -59,11 +73,19 @@ def setup_static():
         shutil.rmtree("static")
 
 @pytest_asyncio.fixture(scope="function")
-async def client(db_session):
+async def client(db_session, tmp_path):
     async def override_get_db():
         yield db_session
 
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    # In-memory indexes are process-global; rebuild them from this test's database
+    leaderboard_index.reset()
+    leaderboard_feed.reset()
+    rank_engine.reset()
+    active_players.reset()
+    replay_store.reset(str(tmp_path / "replays"))
+    user_cache.clear()
     
     async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
         yield ac
@@ -0,0 +1,87 @@
+import pytest
+
+from app.active_players import ActivePlayerRegistry, TimerWheel
+from app.core.security import create_token
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_registry(timeout: float = 10.0):
+    clock = FakeClock()
+    return ActivePlayerRegistry(timeout=timeout, resolution=1.0, clock=clock), clock
+
+
+def test_players_expire_after_the_timeout_unless_they_heartbeat():
+    registry, clock = make_registry()
+    registry.heartbeat("p1", "One", "walls", 10)
+    registry.heartbeat("p2", "Two", "walls", 20)
+
+    clock.now += 8
+    registry.heartbeat("p1", "One", "walls", 15)
+    clock.now += 3
+    # p2's timeout (plus up to one tick) has passed; p1's heartbeat pushed its expiry back
+    assert [player.id for player in registry.active()] == ["p1"]
+    assert registry.expired == 1
+
+    clock.now += 10
+    assert registry.active() == []
+    assert registry.expired == 2
+
+
+def test_nobody_expires_early_within_a_tick():
+    registry, clock = make_registry(timeout=3.0)
+    clock.now = 1000.99
+    registry.heartbeat("p1", "One", "walls", 0)
+    clock.now += 3.0
+    assert len(registry) == 1
+    clock.now += 1.0
+    assert len(registry) == 0
+
+
+def test_long_idle_gaps_expire_everything_in_one_lap():
+    wheel = TimerWheel(span=4)
+    wheel.advance(100)
+    wheel.schedule("a", 102)
+    wheel.schedule("b", 104)
+    assert sorted(wheel.advance(10_000)) == ["a", "b"]
+    assert wheel.advance(10_001) == []
+
+
+def test_active_is_sorted_by_score_and_filters_by_mode():
+    registry, _ = make_registry()
+    for i, mode in enumerate(["walls", "pass-through"] * 3):
+        registry.heartbeat(f"p{i}", f"Player{i}", mode, i * 10)
+
+    assert [player.score for player in registry.active()] == [50, 40, 30, 20, 10, 0]
+    assert [player.id for player in registry.active("walls")] == ["p4", "p2", "p0"]
+    assert [player.id for player in registry.active("pass-through", limit=2)] == ["p5", "p3"]
+
+    # Switching modes moves the player between groups
+    registry.heartbeat("p0", "Player0", "pass-through", 100)
+    assert [player.id for player in registry.active("walls")] == ["p4", "p2"]
+    assert registry.active("pass-through", limit=1)[0].id == "p0"
+
+    registry.remove("p0")
+    assert registry.stats()["by_mode"] == {"walls": 2, "pass-through": 3}
+
+
+@pytest.mark.asyncio
+async def test_heartbeat_endpoint_feeds_active_players(client):
+    for player_id, name, mode, score in [("u1", "Alice", "walls", 40), ("u2", "Bob", "walls", 90), ("u3", "Cid", "pass-through", 70)]:
+        response = await client.post(
+            "/players/heartbeat", json={"score": score, "mode": mode}, headers={"Authorization": f"Bearer {create_token(player_id, name)}"}
+        )
+        assert response.status_code == 204
+
+    response = await client.get("/players/active")
+    assert [player["username"] for player in response.json()] == ["Bob", "Cid", "Alice"]
+    response = await client.get("/players/active", params={"mode": "walls", "limit": 1})
+    assert response.json() == [{"id": "u2", "username": "Bob", "currentScore": 90, "mode": "walls"}]
+
+    assert (await client.post("/players/heartbeat", json={"score": 1, "mode": "walls"})).status_code == 401
@@ -1,5 +1,7 @@
 import pytest
 
+from app.core.security import verify_token
+
 @pytest.mark.asyncio
 async def test_health_check(client):
     response = await client.get("/")
@@ -24,7 +26,8 @@ async def test_auth_flow(client):
         "password": "password"
     })
     assert response.status_code == 200
-    assert response.json()["token"] == token
+    # Tokens are signed and carry the user's identity
+    assert verify_token(response.json()["token"]).user_id == verify_token(token).user_id == response.json()["user"]["id"]
     
     # Get Me
     response = await client.get("/auth/me", headers={"Authorization": f"Bearer {token}"})
@@ -43,7 +46,7 @@ async def test_leaderboard(client):
     
     # 2. Submit score
     response = await client.post("/leaderboard", 
-        json={"score": 500, "mode": "walls"},
+        json={"score": 350, "mode": "walls"},
         headers={"Authorization": f"Bearer {token}"}
     )
     assert response.status_code == 201
@@ -53,9 +56,14 @@ async def test_leaderboard(client):
     assert response.status_code == 200
     entries = response.json()
     assert len(entries) > 0
-    assert entries[0]["score"] == 500
+    assert entries[0]["score"] == 350
     assert entries[0]["username"] == "LeaderUser"
 
+    # Scores beyond what the grid allows are rejected before they reach the rank engine
+    for score in (-1, 10**9):
+        response = await client.post("/leaderboard", json={"score": score, "mode": "walls"}, headers={"Authorization": f"Bearer {token}"})
+        assert response.status_code == 422
+
 @pytest.mark.asyncio
 async def test_spectate_active(client):
     response = await client.get("/players/active")
@@ -0,0 +1,44 @@
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from app.batch_engine import BatchSnakeGame, direction_codes
+from app.engine import SnakeGame
+from app.models import Direction, GameMode
+
+
+def test_matches_scalar_engine():
+    rng = random.Random(9)
+    modes = [GameMode.pass_through if i % 3 else GameMode.walls for i in range(64)]
+    seeds = [rng.randrange(2**32) for _ in modes]
+    batch = BatchSnakeGame(modes, seeds)
+    games = [SnakeGame(mode, seed) for mode, seed in zip(modes, seeds)]
+
+    for _ in range(3000):
+        turns = [rng.choice(list(Direction)) if rng.random() < 0.3 else None for _ in games]
+        accepted = batch.turn(direction_codes(turns))
+        expected = [False if d is None else game.turn(d) for game, d in zip(games, turns)]
+        assert accepted.tolist() == expected
+
+        alive = batch.step()
+        assert alive.tolist() == [game.step() for game in games]
+        for i, game in enumerate(games):
+            assert batch.cells(i) == game.cells()
+            assert batch.food_cell(i) == game.food_cell
+            assert (batch.score[i], batch.interval_ms[i], batch.tick[i]) == (game.score, game.interval_ms, game.tick)
+        if not alive.any():
+            break
+
+
+def test_restart_replays_the_same_game():
+    batch = BatchSnakeGame(GameMode.walls, [5, 6])
+    while batch.step().any():
+        pass
+    first = (batch.tick.copy(), batch.score.copy())
+    batch.restart(np.array([True, False]))
+    assert batch.alive.tolist() == [True, False]
+    while batch.step().any():
+        pass
+    assert (batch.tick.tolist(), batch.score.tolist()) == (first[0].tolist(), first[1].tolist())
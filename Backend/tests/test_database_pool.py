@@ -0,0 +1,56 @@
+import asyncio
+
+import pytest
+from sqlalchemy import exc, text
+
+from app.core import database
+from app.core.database import build_engines
+
+
+@pytest.mark.asyncio
+async def test_sqlite_file_gets_wal_single_writer_and_readers(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "pool_metrics", {})
+    writer, reader = build_engines(f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}")
+    try:
+        assert writer is not reader
+        assert writer.sync_engine.pool.size() == 1
+        async with writer.begin() as conn:
+            assert (await conn.execute(text("PRAGMA journal_mode"))).scalar() == "wal"
+            await conn.execute(text("CREATE TABLE t (x INTEGER)"))
+            await conn.execute(text("INSERT INTO t VALUES (1)"))
+        async with reader.connect() as conn:
+            assert (await conn.execute(text("SELECT x FROM t"))).scalar() == 1
+            with pytest.raises(exc.OperationalError):
+                await conn.execute(text("INSERT INTO t VALUES (2)"))
+
+        # Writers queue for the single connection; the wait is measured
+        async def write(i):
+            async with writer.begin() as conn:
+                await conn.execute(text("INSERT INTO t VALUES (:x)"), {"x": i})
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*(write(i) for i in range(5)))
+        stats = database.pool_metrics["writer"].stats()
+        assert stats["size"] == 1 and stats["in_use"] == 0 and stats["peak_in_use"] == 1
+        assert stats["checkouts"] == 6
+        assert stats["max_wait_ms"] >= 10
+        assert set(database.pool_metrics) == {"writer", "reader"}
+    finally:
+        await writer.dispose()
+        await reader.dispose()
+
+
+@pytest.mark.asyncio
+async def test_checkout_timeouts_are_counted(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "pool_metrics", {})
+    monkeypatch.setattr(database.settings, "DB_POOL_TIMEOUT", 0.05)
+    writer, reader = build_engines(f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}")
+    try:
+        async with writer.connect():
+            with pytest.raises(exc.TimeoutError):
+                async with writer.connect():
+                    pass
+        assert database.pool_metrics["writer"].stats()["timeouts"] == 1
+    finally:
+        await writer.dispose()
+        await reader.dispose()
@@ -0,0 +1,109 @@
+import random
+
+import pytest
+
+from app.engine import DIRECTION_CODES, SnakeGame, mulberry32, run_replay
+from app.models import Direction, GameMode
+
+MOVES = {Direction.UP: (0, -1), Direction.DOWN: (0, 1), Direction.LEFT: (-1, 0), Direction.RIGHT: (1, 0)}
+OPPOSITE = {Direction.UP: Direction.DOWN, Direction.DOWN: Direction.UP, Direction.LEFT: Direction.RIGHT, Direction.RIGHT: Direction.LEFT}
+
+
+def test_mulberry32_matches_javascript():
+    # Reference values from the usual JS mulberry32 (output before the / 2**32)
+    state, out = 42, []
+    for _ in range(4):
+        state, value = mulberry32(state)
+        out.append(value)
+    assert out == [2581720956, 1925393290, 3661312704, 2876485805]
+
+
+@pytest.mark.parametrize("mode", [GameMode.pass_through, GameMode.walls])
+def test_matches_frontend_rules(mode):
+    """Replays random play through a list-based port of useSnakeGame.ts, taking food from the engine."""
+    rng = random.Random(7)
+    for seed in range(30):
+        game = SnakeGame(mode, seed=seed)
+        snake, food, score, direction = [(10, 10), (9, 10), (8, 10)], (15, 15), 0, Direction.RIGHT
+        speed = 150
+        while True:
+            if rng.random() < 0.3:
+                requested = rng.choice(list(MOVES))
+                assert game.turn(requested) == (requested != OPPOSITE[direction])
+                if requested != OPPOSITE[direction]:
+                    direction = requested
+            dx, dy = MOVES[direction]
+            head = (snake[0][0] + dx, snake[0][1] + dy)
+            if mode == GameMode.pass_through:
+                head = (head[0] % 20, head[1] % 20)
+            dead = not (0 <= head[0] < 20 and 0 <= head[1] < 20) or head in snake
+
+            assert game.step() is not dead
+            if dead:
+                break
+            snake = [head] + snake
+            if head == food:
+                score += 1
+                speed = max(50, speed - 2)
+                food = game.food_cell
+                assert food not in snake
+            else:
+                snake.pop()
+            assert game.cells() == snake
+            assert game.food_cell == food
+            assert (game.score, game.interval_ms) == (score, speed)
+        assert not game.alive
+        assert game.step() is False
+
+
+def test_tail_cell_is_a_collision():
+    # The frontend checks the head against the whole previous snake, tail included
+    game = SnakeGame(GameMode.pass_through)
+    game.food = 10 * 20 + 11  # grow to 4 cells on the first tick
+    game.step()
+    game.food = 0  # then keep food out of the way
+    for direction in (Direction.DOWN, Direction.LEFT):
+        game.turn(direction)
+        game.step()
+    assert game.cells() == [(10, 11), (11, 11), (11, 10), (10, 10)]
+    game.turn(Direction.UP)
+    assert game.step() is False
+
+
+def test_same_seed_same_game():
+    def play(seed):
+        game, rng = SnakeGame(GameMode.pass_through, seed=seed), random.Random(1)
+        foods = []
+        while game.step() and game.tick < 5000:
+            if rng.random() < 0.2:
+                game.turn(rng.choice(list(MOVES)))
+            if game.food_cell not in foods:
+                foods.append(game.food_cell)
+        return foods, game.score, game.tick
+
+    assert play(11) == play(11)
+    assert play(11)[0] != play(12)[0]
+
+
+def test_free_cells_track_the_snake():
+    game, rng = SnakeGame(GameMode.pass_through, seed=3), random.Random(5)
+    while game.step():
+        if rng.random() < 0.25:
+            game.turn(rng.choice(list(MOVES)))
+        body = {y * 20 + x for x, y in game.cells()}
+        assert set(game._free) == set(range(400)) - body
+        assert all(game._free_pos[cell] == i for i, cell in enumerate(game._free))
+        assert sum(game.occupied) == game.length == len(body)
+
+
+def test_run_replay_reproduces_a_recorded_game():
+    game, rng, inputs = SnakeGame(GameMode.walls, seed=21), random.Random(4), []
+    while game.alive:
+        if rng.random() < 0.3:
+            direction = rng.choice(list(MOVES))
+            inputs.append((game.tick, DIRECTION_CODES[direction]))
+            game.turn(direction)
+        game.step()
+    replayed = run_replay(GameMode.walls, 21, inputs, game.tick + 1)
+    assert (replayed.score, replayed.tick, replayed.cells()) == (game.score, game.tick, game.cells())
+    assert not replayed.alive
@@ -0,0 +1,268 @@
+import asyncio
+import json
+
+import pytest
+
+from app import cluster
+from app.event_bus import EventBus, InProcessBackend, PostgresBackend, UnixSocketBackend
+from app.models import Coordinate, Direction, GameFrame, GameMode
+from app.relay import RelayHub, StreamFormat
+
+
+async def settle(condition, timeout: float = 2.0) -> None:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline
+        await asyncio.sleep(0.01)
+
+
+def collecting_bus(topic: str = "t"):
+    bus, received = EventBus(), []
+    bus.subscribe(topic, received.append)
+    return bus, received
+
+
+class RecordingBackend:
+    name = "recording"
+    shared = True
+
+    def __init__(self, max_payload=None):
+        self.max_payload = max_payload
+        self.lines = []
+        self.accepting = True
+
+    async def start(self, receive, lost, missed) -> None:
+        pass
+
+    def send(self, line: str, critical: bool = False) -> bool:
+        if not self.accepting or (self.max_payload and len(line.encode()) > self.max_payload):
+            return False
+        self.lines.append(json.loads(line))
+        return True
+
+    async def stop(self) -> None:
+        pass
+
+
+@pytest.mark.asyncio
+async def test_socket_hub_relays_to_every_other_worker(tmp_path):
+    path = str(tmp_path / "events.sock")
+    workers = [collecting_bus() for _ in range(3)]
+    for bus, _ in workers:
+        await bus.start(UnixSocketBackend(path))
+    try:
+        assert [bus.backend.is_hub for bus, _ in workers] == [True, False, False]
+        hub, first, second = workers
+        await settle(lambda: len(hub[0].backend._clients) == 2)
+        first[0].publish("t", {"n": 1})
+        hub[0].publish("t", {"n": 2})
+        await settle(lambda: len(hub[1]) == 1 and len(first[1]) == 1 and len(second[1]) == 2)
+
+        # Nobody hears its own events back
+        assert hub[1] == [{"n": 1}]
+        assert first[1] == [{"n": 2}]
+        # Events from different publishers aren't ordered
+        assert sorted(event["n"] for event in second[1]) == [1, 2]
+    finally:
+        for bus, _ in workers:
+            await bus.stop()
+
+
+@pytest.mark.asyncio
+async def test_a_surviving_worker_takes_over_the_hub(tmp_path):
+    path = str(tmp_path / "events.sock")
+    (hub, _), (first, first_received), (second, second_received) = [collecting_bus() for _ in range(3)]
+    for bus in (hub, first, second):
+        await bus.start(UnixSocketBackend(path))
+    await settle(lambda: len(hub.backend._clients) == 2)
+    try:
+        await hub.stop()
+        await settle(lambda: first.backend.is_hub or second.backend.is_hub)
+        survivors = (first, second) if first.backend.is_hub else (second, first)
+        await settle(lambda: len(survivors[0].backend._clients) == 1)
+
+        survivors[1].publish("t", "after handover")
+        received = first_received if survivors[0] is first else second_received
+        await settle(lambda: received == ["after handover"])
+    finally:
+        for bus in (first, second):
+            await bus.stop()
+
+
+@pytest.mark.asyncio
+async def test_a_peer_the_hub_cannot_keep_up_with_rejoins_and_resyncs(tmp_path):
+    path = str(tmp_path / "events.sock")
+    (hub, _), (peer, received) = collecting_bus(), collecting_bus()
+    resyncs = []
+    peer.subscribe("resync", resyncs.append)
+    for bus in (hub, peer):
+        await bus.start(UnixSocketBackend(path))
+    try:
+        await settle(lambda: len(hub.backend._clients) == 1)
+        # Every write now overflows the peer's buffer
+        hub.backend.MAX_BUFFER = -1
+        hub.publish("t", "lost")
+        assert hub.backend._clients == set()
+        del hub.backend.MAX_BUFFER
+
+        await settle(lambda: resyncs == [None] and len(hub.backend._clients) == 1)
+        hub.publish("t", "after")
+        await settle(lambda: received == ["after"])
+    finally:
+        for bus in (peer, hub):
+            await bus.stop()
+
+
+class FakeListenConnection:
+    """Just enough of an asyncpg connection (and its SQLAlchemy wrapper) for PostgresBackend."""
+
+    def __init__(self):
+        self.driver_connection = self
+        self.closed = False
+        self.on_terminate = None
+
+    async def get_raw_connection(self):
+        return self
+
+    def add_termination_listener(self, callback):
+        self.on_terminate = callback
+
+    def remove_termination_listener(self, callback):
+        self.on_terminate = None
+
+    async def add_listener(self, channel, callback):
+        pass
+
+    async def remove_listener(self, channel, callback):
+        pass
+
+    def is_closed(self):
+        return self.closed
+
+    async def invalidate(self):
+        self.closed = True
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.mark.asyncio
+async def test_postgres_backend_listens_again_when_its_connection_dies():
+    connections = []
+
+    class FakeEngine:
+        async def connect(self):
+            connections.append(FakeListenConnection())
+            return connections[-1]
+
+    bus = EventBus()
+    resyncs = []
+    bus.subscribe("resync", resyncs.append)
+    await bus.start(PostgresBackend(FakeEngine(), queue_size=4))
+    try:
+        assert len(connections) == 1 and resyncs == []
+        # The server goes away while nothing is being sent
+        connections[0].closed = True
+        connections[0].on_terminate(connections[0])
+        await settle(lambda: len(connections) == 2)
+        assert resyncs == [None]
+    finally:
+        await bus.stop()
+
+
+@pytest.mark.asyncio
+async def test_single_worker_bus_sends_nothing():
+    bus, received = collecting_bus()
+    await bus.start(InProcessBackend())
+    bus.publish("t", "x")
+    assert received == []
+    assert bus.stats()["published"] == 0
+
+
+def test_remote_frames_open_a_channel_that_spectators_can_watch(monkeypatch):
+    hub = RelayHub(queue_size=4, remote_timeout=30.0)
+    monkeypatch.setattr(cluster, "relay_hub", hub)
+    spectator = hub.subscribe("user_1", StreamFormat(transport="ws"))
+    frame = GameFrame(snake=[Coordinate(x=1, y=1)], food=Coordinate(x=5, y=5), score=7, direction=Direction.UP)
+
+    bus = EventBus()
+    bus.backend = RecordingBackend()
+    monkeypatch.setattr(cluster, "event_bus", bus)
+    cluster.share_frame("user_1", "Player", GameMode.walls, frame)
+    [event] = bus.backend.lines
+    cluster._apply_game(event["d"])
+    channel = hub._channels["user_1"]
+    assert channel.live and (channel.remote, channel.username, channel.mode) == (True, "Player", GameMode.walls)
+    assert GameFrame.model_validate_json(spectator.queue.get_nowait()).score == 7
+
+    cluster._apply_game({"player": "user_1", "end": True})
+    assert not hub.is_live("user_1")
+    assert spectator.queue.get_nowait() == '{"event":"end"}'
+
+
+def test_a_player_who_moved_here_survives_the_old_workers_game_end(monkeypatch):
+    hub = RelayHub(queue_size=4, remote_timeout=30.0)
+    monkeypatch.setattr(cluster, "relay_hub", hub)
+    frame = GameFrame(snake=[Coordinate(x=1, y=1)], food=Coordinate(x=5, y=5), score=2, direction=Direction.UP)
+    hub.publish_remote("user_1", "Player", GameMode.walls, frame)
+
+    # The player reconnects to this worker before the old one notices the drop
+    channel = hub.open_game("user_1", "Player", GameMode.walls)
+    cluster.active_players.heartbeat("user_1", "Player", "walls", 2)
+    cluster._apply_game({"player": "user_1", "end": True})
+    assert channel.live and not channel.remote
+    assert [player.id for player in cluster.active_players.active(None, 10)] == ["user_1"]
+
+    hub.close_game(channel)
+    assert not hub.is_live("user_1")
+    cluster.active_players.remove("user_1")
+
+
+@pytest.mark.asyncio
+async def test_remote_games_expire_when_their_worker_goes_quiet():
+    hub = RelayHub(queue_size=4, remote_timeout=0.05)
+    frame = GameFrame(snake=[Coordinate(x=1, y=1)], food=Coordinate(x=5, y=5), score=1, direction=Direction.UP)
+    spectator = hub.subscribe("user_2", StreamFormat())
+    hub.start()
+    try:
+        hub.publish_remote("user_1", "Player", GameMode.walls, frame)
+        hub.publish_remote("user_2", "Player", GameMode.walls, frame)
+        assert hub.is_live("user_1")
+        # Nothing is read or published in between; the timer ends both games
+        await asyncio.sleep(0.2)
+    finally:
+        await hub.stop()
+    assert hub._channels.keys() == {"user_2"}
+    assert not hub.is_live("user_2")
+    spectator.queue.get_nowait()
+    assert spectator.queue.get_nowait() == b"event: end\ndata: {}\n\n"
+
+
+def test_score_batches_are_split_to_fit_the_payload_limit():
+    bus = EventBus()
+    bus.backend = RecordingBackend(max_payload=200)
+    bus.publish_batch("scores", [["entry_%d" % i, "player", 10, "walls", i] for i in range(20)])
+    assert all(len(json.dumps(line, separators=(",", ":"))) <= 200 for line in bus.backend.lines)
+    assert [row[4] for line in bus.backend.lines for row in line["d"]] == list(range(20))
+    assert bus.stats()["dropped"] == 0
+
+
+def test_a_lost_critical_event_makes_peers_resync(monkeypatch):
+    bus = EventBus()
+    bus.backend = RecordingBackend()
+    bus.backend.accepting = False
+    bus.publish("presence", ["user_1"])
+    assert not bus.resync_pending
+    bus.publish_batch("scores", [["entry_1", "player", 10, "walls", 1]])
+    assert bus.resync_pending
+
+    bus.backend.accepting = True
+    bus.publish_batch("scores", [["entry_2", "player", 20, "walls", 2]])
+    assert [line["t"] for line in bus.backend.lines] == ["resync", "scores"]
+    assert not bus.resync_pending
+
+    resets = []
+    monkeypatch.setattr(cluster.leaderboard_index, "reset", lambda: resets.append("index"))
+    monkeypatch.setattr(cluster.rank_engine, "reset", lambda: resets.append("ranks"))
+    cluster._apply_resync(None)
+    assert resets == ["index", "ranks"]
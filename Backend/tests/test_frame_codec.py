@@ -0,0 +1,115 @@
+import base64
+import random
+
+import pytest
+from pydantic import ValidationError
+
+from app.engine import SnakeGame
+from app.frame_codec import FrameEncoder, decode
+from app.models import Direction, GameFrame, GameMode, StreamEncoding, StreamProtocol
+from app.relay import relay_hub
+from app.routers import spectate
+
+
+def walk(ticks: int, seed: int = 3):
+    """A snake wandering a 20x20 torus, growing when it eats, restarting now and then."""
+    rng = random.Random(seed)
+    moves = {Direction.UP: (0, -1), Direction.DOWN: (0, 1), Direction.LEFT: (-1, 0), Direction.RIGHT: (1, 0)}
+    snake, food, score, direction = [(10, 10), (9, 10), (8, 10)], (15, 15), 0, Direction.RIGHT
+    for tick in range(ticks):
+        if rng.random() < 0.2:
+            direction = rng.choice(list(moves))
+        dx, dy = moves[direction]
+        head = ((snake[0][0] + dx) % 20, (snake[0][1] + dy) % 20)
+        snake = [head] + snake
+        if rng.random() < 0.1:
+            score += 1
+            food = (rng.randrange(20), rng.randrange(20))
+        else:
+            snake.pop()
+        if tick % 97 == 96:
+            snake, score = [(5, 5), (4, 5), (3, 5)], 0  # new game
+        yield GameFrame(
+            snake=[{"x": x, "y": y} for x, y in snake],
+            food={"x": food[0], "y": food[1]},
+            score=score,
+            direction=direction,
+        )
+
+
+@pytest.mark.parametrize("encoding", [StreamEncoding.json, StreamEncoding.binary])
+def test_delta_stream_round_trips(encoding):
+    encoder = FrameEncoder(StreamProtocol.delta, encoding, keyframe_interval=25)
+    state = None
+    # Skipping frames mimics a spectator whose queue dropped some
+    frames = [f for i, f in enumerate(walk(400)) if i % 7 != 3]
+    for frame in frames:
+        state = decode(encoder.encode(frame), state)
+        assert state.to_frame() == frame
+
+
+def test_delta_messages_are_small():
+    frames = list(walk(300))
+    full = sum(len(FrameEncoder().encode(f)) for f in frames)
+    delta_json = FrameEncoder(StreamProtocol.delta, StreamEncoding.json)
+    delta = sum(len(delta_json.encode(f)) for f in frames)
+    delta_binary = FrameEncoder(StreamProtocol.delta, StreamEncoding.binary)
+    binary = sum(len(delta_binary.encode(f)) for f in frames)
+    assert delta * 4 < full
+    assert binary * 10 < full
+
+
+@pytest.mark.asyncio
+async def test_sse_delta_binary_stream_is_base64():
+    relay_hub.reset()
+    stream = spectate.frame_event_stream("user_codec", StreamProtocol.delta, StreamEncoding.binary, keepalive=0.01)
+    await anext(stream)  # keepalive, subscribed now
+
+    channel = relay_hub.open_game("user_codec", "Codec", GameMode.walls)
+    frames = list(walk(3))
+    state = None
+    for frame in frames:
+        channel.publish(frame)
+        event = await anext(stream)
+        state = decode(base64.b64decode(event[len(b"data: "):]), state)
+        assert state.to_frame() == frame
+    relay_hub.close_game(channel)
+    await stream.aclose()
+
+
+@pytest.mark.parametrize("change", [
+    {"snake": [{"x": 40000, "y": 0}]},
+    {"food": {"x": 0, "y": -1}},
+    {"score": 2**31},
+    {"snake": [{"x": 0, "y": 0}] * 401},
+])
+def test_frames_outside_the_grid_are_rejected(change):
+    # They would otherwise fail to pack in the binary encoding, mid-fan-out
+    frame = {"snake": [{"x": 1, "y": 1}], "food": {"x": 2, "y": 2}, "score": 0, "direction": "UP", **change}
+    with pytest.raises(ValidationError):
+        GameFrame.model_validate(frame)
+
+
+@pytest.mark.parametrize("protocol,encoding", [
+    (StreamProtocol.full, StreamEncoding.json),
+    (StreamProtocol.delta, StreamEncoding.json),
+    (StreamProtocol.delta, StreamEncoding.binary),
+])
+def test_a_full_grid_has_no_food(protocol, encoding):
+    game = SnakeGame(GameMode.walls, 1)
+    before = game.to_frame()
+    game.food = -1  # what _place_food leaves once no cell is free
+    frame = game.to_frame()
+    assert frame.food is None
+    assert GameFrame.model_validate_json(frame.model_dump_json()) == frame
+
+    encoder = FrameEncoder(protocol, encoding)
+    if protocol == StreamProtocol.full:
+        assert '"food":null' in encoder.encode(frame)
+        return
+    # Food disappearing is a delta like any other, then a keyframe without food
+    state = decode(encoder.encode(before), None)
+    state = decode(encoder.encode(frame), state)
+    assert state.to_frame() == frame
+    encoder.reset()
+    assert decode(encoder.encode(frame), None).to_frame() == frame
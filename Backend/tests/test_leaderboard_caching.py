@@ -0,0 +1,91 @@
+import pytest
+from sqlalchemy import event
+
+from .conftest import engine
+
+
+@pytest.mark.asyncio
+async def test_conditional_get_skips_the_database(client):
+    response = await client.post("/auth/signup", json={"username": "Etag", "email": "etag@example.com", "password": "pw"})
+    headers = {"Authorization": f"Bearer {response.json()['token']}"}
+    await client.post("/leaderboard", json={"score": 10, "mode": "walls"}, headers=headers)
+
+    response = await client.get("/leaderboard")
+    etag = response.headers["etag"]
+    assert etag.startswith('"') and not etag.startswith('W/')
+    assert response.headers["cache-control"] == "public, max-age=2, stale-while-revalidate=30"
+
+    statements = []
+    record = lambda *args: statements.append(args[2])
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    try:
+        response = await client.get("/leaderboard", headers={"If-None-Match": f'"other", {etag}'})
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", record)
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+    assert statements == []
+
+    # A new score changes the version, so the old ETag no longer matches
+    await client.post("/leaderboard", json={"score": 20, "mode": "walls"}, headers=headers)
+    response = await client.get("/leaderboard", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert [entry["score"] for entry in response.json()] == [20, 10]
+
+
+@pytest.mark.asyncio
+async def test_etag_depends_only_on_the_page(client):
+    from app.leaderboard_index import leaderboard_index
+    from app.routers import leaderboard
+
+    response = await client.post("/auth/signup", json={"username": "Shared", "email": "shared@example.com", "password": "pw"})
+    headers = {"Authorization": f"Bearer {response.json()['token']}"}
+    await client.post("/leaderboard", json={"score": 10, "mode": "walls"}, headers=headers)
+    etag = (await client.get("/leaderboard")).headers["etag"]
+
+    # Another worker: its own index epoch and version, the same rows
+    leaderboard_index.reset()
+    leaderboard.rendered_pages.clear()
+    response = await client.get("/leaderboard", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert leaderboard_index.version == 0
+
+@pytest.mark.asyncio
+async def test_windowed_boards_have_their_own_etag(client):
+    all_time = (await client.get("/leaderboard")).headers["etag"]
+    daily = (await client.get("/leaderboard", params={"window": "daily"})).headers["etag"]
+    assert all_time != daily
+
+
+@pytest.mark.asyncio
+async def test_first_pages_are_served_pre_rendered(client, monkeypatch):
+    from app.routers import leaderboard
+
+    response = await client.post("/auth/signup", json={"username": "Bytes", "email": "bytes@example.com", "password": "pw"})
+    headers = {"Authorization": f"Bearer {response.json()['token']}"}
+    for score in (5, 15, 25):
+        await client.post("/leaderboard", json={"score": score, "mode": "walls"}, headers=headers)
+
+    first = await client.get("/leaderboard", params={"limit": 2})
+    assert [entry["score"] for entry in first.json()] == [25, 15]
+    assert first.headers["content-type"] == "application/json"
+    # The same page through the response_model path (cursor pages aren't pre-rendered)
+    rest = await client.get("/leaderboard", params={"limit": 2, "cursor": first.headers["x-next-cursor"]})
+    assert [entry["score"] for entry in rest.json()] == [5]
+    assert set(rest.json()[0]) == set(first.json()[0])
+
+    # Unchanged board: the stored bytes are sent as they are
+    def no_rendering(*args, **kwargs):
+        raise AssertionError("page was rendered again")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(leaderboard.entries_adapter, "validate_python", no_rendering)
+        second = await client.get("/leaderboard", params={"limit": 2})
+    assert second.content == first.content
+    assert second.headers["x-next-cursor"] == first.headers["x-next-cursor"]
+
+    await client.post("/leaderboard", json={"score": 35, "mode": "walls"}, headers=headers)
+    third = await client.get("/leaderboard", params={"limit": 2})
+    assert [entry["score"] for entry in third.json()] == [35, 25]
@@ -0,0 +1,100 @@
+import pytest
+from httpx import AsyncClient
+
+from app.leaderboard_index import RankedBoard, IndexedEntry, leaderboard_index, window_bucket, bucket_bounds, DAY_MS
+from app.models import LeaderboardWindow
+from app.models_db import LeaderboardEntry as DBLeaderboardEntry
+
+
+def make_entry(id, score, timestamp=0, username="u", mode="walls"):
+    return IndexedEntry(id=id, username=username, score=score, mode=mode, timestamp=timestamp)
+
+
+def test_index_orders_by_score_then_timestamp():
+    index = RankedBoard(capacity=10)
+    index._loaded = True
+    index.add(make_entry("a", 10, timestamp=2))
+    index.add(make_entry("b", 30, timestamp=5))
+    index.add(make_entry("c", 10, timestamp=1))
+    index.add(make_entry("b", 30, timestamp=5))  # duplicate write is ignored
+
+    assert [e.id for e in index.top(10)] == ["b", "c", "a"]
+
+
+def test_index_keeps_only_capacity_best():
+    index = RankedBoard(capacity=3)
+    index._loaded = True
+    for i, score in enumerate([5, 1, 9, 7, 3]):
+        index.add(make_entry(f"e{i}", score))
+
+    assert [e.score for e in index.top(10)] == [9, 7, 5]
+    assert [e.score for e in index.page(2, after=(-9, 0, "e2"))] == [7, 5]
+    # Past the tail of a full board the database has to answer
+    assert index.page(3, after=(-9, 0, "e2")) is None
+
+
+@pytest.mark.asyncio
+async def test_submit_writes_through_to_loaded_index(client: AsyncClient):
+    response = await client.post("/auth/signup", json={
+        "username": "IndexUser",
+        "email": "index@example.com",
+        "password": "pw"
+    })
+    token = response.json()["token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    await client.post("/leaderboard", json={"score": 10, "mode": "walls"}, headers=headers)
+
+    # First read builds the index from the database
+    response = await client.get("/leaderboard")
+    assert [e["score"] for e in response.json()] == [10]
+    assert leaderboard_index.board().loaded
+
+    # Later writes are applied to the index directly
+    await client.post("/leaderboard", json={"score": 20, "mode": "pass-through"}, headers=headers)
+    response = await client.get("/leaderboard")
+    entries = response.json()
+    assert [e["score"] for e in entries] == [20, 10]
+    assert entries[0]["mode"] == "pass-through"
+    assert entries[0]["username"] == "IndexUser"
+
+
+def test_weekly_buckets_start_on_monday():
+    monday = 1_767_571_200_000  # 2026-01-05T00:00:00Z
+    bucket = window_bucket(LeaderboardWindow.weekly, monday)
+    assert window_bucket(LeaderboardWindow.weekly, monday - 1) == bucket - 1
+    assert window_bucket(LeaderboardWindow.weekly, monday + 7 * DAY_MS - 1) == bucket
+    assert bucket_bounds(LeaderboardWindow.weekly, bucket) == (monday, monday + 7 * DAY_MS)
+
+
+@pytest.mark.asyncio
+async def test_mode_and_window_boards(client: AsyncClient, db_session):
+    response = await client.post("/auth/signup", json={
+        "username": "WindowUser",
+        "email": "window@example.com",
+        "password": "pw"
+    })
+    headers = {"Authorization": f"Bearer {response.json()['token']}"}
+
+    # An old entry that belongs to the all-time board only
+    db_session.add(DBLeaderboardEntry(id="entry_old", username="Old", score=999, mode="walls", timestamp=0))
+    await db_session.commit()
+
+    await client.post("/leaderboard", json={"score": 40, "mode": "walls"}, headers=headers)
+    await client.post("/leaderboard", json={"score": 60, "mode": "pass-through"}, headers=headers)
+
+    response = await client.get("/leaderboard", params={"mode": "walls"})
+    assert [e["score"] for e in response.json()] == [999, 40]
+
+    response = await client.get("/leaderboard", params={"window": "daily"})
+    assert [e["score"] for e in response.json()] == [60, 40]
+
+    # Loaded windowed boards are kept up to date by write-through
+    await client.post("/leaderboard", json={"score": 50, "mode": "walls"}, headers=headers)
+    response = await client.get("/leaderboard", params={"mode": "walls", "window": "weekly"})
+    assert [e["score"] for e in response.json()] == [50, 40]
+    response = await client.get("/leaderboard", params={"window": "daily"})
+    assert [e["score"] for e in response.json()] == [60, 50, 40]
+
+    response = await client.get("/leaderboard", params={"window": "monthly"})
+    assert response.status_code == 422
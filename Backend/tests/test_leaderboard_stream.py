@@ -0,0 +1,85 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from app.leaderboard_feed import diff_top, leaderboard_feed
+from app.leaderboard_index import IndexedEntry, leaderboard_index
+from app.routers.leaderboard import stream_leaderboard
+
+
+def entry(entry_id: str, score: int) -> IndexedEntry:
+    return IndexedEntry(entry_id, "p", score, "walls", 0)
+
+
+def parse(message: bytes) -> tuple:
+    event, data = message.decode().strip().split("\n")
+    return event[len("event: "):], json.loads(data[len("data: "):])
+
+
+def apply(entries: list, ops: list) -> list:
+    entries = [e for e in entries if e["id"] not in {op["id"] for op in ops if op["op"] == "drop"}]
+    for op in ops:
+        if op["op"] == "insert":
+            entries.insert(op["index"], op["entry"])
+    return entries
+
+
+def test_diff_rebuilds_the_new_top():
+    old = [entry("a", 50), entry("b", 40), entry("c", 30)]
+    new = [entry("x", 60), entry("a", 50), entry("y", 45)]
+    ops = diff_top(old, new)
+    assert ops == [
+        {"op": "drop", "id": "b"}, {"op": "drop", "id": "c"},
+        {"op": "insert", "index": 0, "entry": new[0]._asdict()}, {"op": "insert", "index": 2, "entry": new[2]._asdict()},
+    ]
+    assert apply([e._asdict() for e in old], ops) == [e._asdict() for e in new]
+
+
+@pytest.mark.asyncio
+async def test_bursts_are_coalesced_into_one_update(client, db_session, monkeypatch):
+    monkeypatch.setattr(leaderboard_feed, "coalesce_seconds", 0.05)
+    response = await client.post("/auth/signup", json={"username": "Live", "email": "live@example.com", "password": "pw"})
+    headers = {"Authorization": f"Bearer {response.json()['token']}"}
+    for score in (30, 20, 10):
+        await client.post("/leaderboard", json={"score": score, "mode": "walls"}, headers=headers)
+
+    stream = (await stream_leaderboard(mode=None, limit=3, db=db_session)).body_iterator
+    event, snapshot = parse(await anext(stream))
+    assert event == "snapshot"
+    assert [e["score"] for e in snapshot["entries"]] == [30, 20, 10]
+
+    await asyncio.gather(*(
+        client.post("/leaderboard", json={"score": score, "mode": "walls"}, headers=headers) for score in (25, 40, 5, 35)
+    ))
+    event, update = parse(await asyncio.wait_for(anext(stream), 1))
+    assert event == "update"
+    board = (await client.get("/leaderboard", params={"limit": 3})).json()
+    assert apply(snapshot["entries"], update["ops"]) == board
+    assert [e["score"] for e in board] == [40, 35, 30]
+
+    # One update for the whole burst; scores below the top 3 push nothing
+    await client.post("/leaderboard", json={"score": 1, "mode": "walls"}, headers=headers)
+    await asyncio.sleep(0.1)
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(anext(stream), 0.05)
+
+    await stream.aclose()
+    assert leaderboard_feed.subscriber_count() == 0
+
+
+@pytest.mark.asyncio
+async def test_lagging_subscriber_is_resynced_with_a_snapshot(monkeypatch):
+    monkeypatch.setattr(leaderboard_feed, "queue_size", 1)
+    board = SimpleNamespace(loaded=True, top=lambda n: [entry("b", 9), entry("a", 5)])
+    monkeypatch.setattr(leaderboard_index, "board", lambda mode: board)
+    subscription = leaderboard_feed.subscribe("walls", 2, [entry("a", 5)])
+
+    # The first snapshot is still unread when the update arrives
+    leaderboard_feed.flush()
+    event, data = parse(await subscription.get())
+    assert event == "snapshot"
+    assert [e["id"] for e in data["entries"]] == ["b", "a"]
+    assert subscription.dropped == 1
+    leaderboard_feed.unsubscribe("walls", 2, subscription)
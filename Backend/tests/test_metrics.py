@@ -0,0 +1,78 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from app.metrics import Histogram, Registry, registry, render_metrics, snapshot_writer, spectate_connections, spectate_frames
+from app.models import GameMode
+from app.relay import relay_hub
+from app.routers import spectate
+
+from .test_relay import make_frame
+
+
+def test_histogram_rendering():
+    reg = Registry()
+    latency = reg.register(Histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0)))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(("/a",), value)
+    assert reg.render(reg.collect()).splitlines() == [
+        "# HELP latency_seconds Latency",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{route="/a",le="0.1"} 2',
+        'latency_seconds_bucket{route="/a",le="1"} 3',
+        'latency_seconds_bucket{route="/a",le="+Inf"} 4',
+        'latency_seconds_sum{route="/a"} 3.65',
+        'latency_seconds_count{route="/a"} 4',
+    ]
+
+
+@pytest.mark.asyncio
+async def test_requests_are_labelled_by_route_template(client):
+    registry.reset()
+    await client.get("/leaderboard/entry_missing/replay")
+    await client.get("/leaderboard/entry_other/replay")
+    response = await client.get("/metrics")
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+    assert 'http_requests_total{method="GET",route="/leaderboard/{entryId}/replay",status="404"} 2' in text
+    assert 'http_request_duration_seconds_count{method="GET",route="/leaderboard/{entryId}/replay"} 2' in text
+    # The scrape itself is in flight
+    assert "http_requests_in_flight 1" in text
+
+
+@pytest.mark.asyncio
+async def test_spectate_streams_are_counted():
+    registry.reset()
+    relay_hub.reset()
+    stream = spectate.frame_event_stream("user_9", keepalive=0.01)
+    assert await anext(stream) == b": keepalive\n\n"
+    channel = relay_hub.open_game("user_9", "Streamer", GameMode.walls)
+    channel.publish(make_frame(1))
+    await anext(stream)
+    assert spectate_connections._values[("sse",)] == 1
+    assert spectate_frames._values[("sse",)] == 1
+    await stream.aclose()
+    relay_hub.close_game(channel)
+    assert spectate_connections._values[("sse",)] == 0
+
+
+def test_workers_are_summed_and_exited_workers_dropped(tmp_path):
+    registry.reset()
+    spectate_frames.inc(("ws",), 5)
+    exited = subprocess.Popen([sys.executable, "-c", "pass"])
+    exited.wait()
+    for pid, frames in ((os.getppid(), 7), (exited.pid, 100)):
+        with open(tmp_path / f"worker-{pid}.json", "w") as f:
+            json.dump([["spectate_frames_sent_total", [["transport", "ws"]], frames]], f)
+
+    snapshot_writer.directory = str(tmp_path)
+    try:
+        assert 'spectate_frames_sent_total{transport="ws"} 12' in render_metrics()
+        assert sorted(os.listdir(tmp_path)) == [f"worker-{os.getppid()}.json"]
+        snapshot_writer.write()
+        assert os.path.exists(tmp_path / f"worker-{os.getpid()}.json")
+    finally:
+        snapshot_writer.directory = None
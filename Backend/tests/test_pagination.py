@@ -0,0 +1,52 @@
+import pytest
+from httpx import AsyncClient
+
+from app.leaderboard_index import leaderboard_index
+from app.models_db import LeaderboardEntry as DBLeaderboardEntry
+
+
+async def seed_entries(db_session, scores):
+    for i, score in enumerate(scores):
+        db_session.add(DBLeaderboardEntry(
+            id=f"entry_{i:03d}", username=f"p{i}", score=score, mode="walls", timestamp=1000 + i % 3
+        ))
+    await db_session.commit()
+
+
+async def collect_pages(client: AsyncClient, limit: int):
+    seen, cursor, pages = [], None, 0
+    while True:
+        params = {"limit": limit}
+        if cursor:
+            params["cursor"] = cursor
+        response = await client.get("/leaderboard", params=params)
+        assert response.status_code == 200
+        seen.extend(e["id"] for e in response.json())
+        pages += 1
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return seen, pages
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("capacity", [1000, 4])  # served from memory / deeper than the index
+async def test_keyset_pages_cover_board_in_order(client: AsyncClient, db_session, monkeypatch, capacity):
+    monkeypatch.setattr(leaderboard_index, "capacity", capacity)
+    scores = [5, 9, 9, 1, 7, 9, 3, 5, 5, 8, 2]
+    await seed_entries(db_session, scores)
+
+    seen, pages = await collect_pages(client, limit=3)
+
+    expected = [
+        f"entry_{i:03d}"
+        for i in sorted(range(len(scores)), key=lambda i: (-scores[i], 1000 + i % 3, f"entry_{i:03d}"))
+    ]
+    assert seen == expected
+    assert pages == 4
+
+
+@pytest.mark.asyncio
+async def test_limit_is_bounded_and_cursor_validated(client: AsyncClient):
+    assert (await client.get("/leaderboard", params={"limit": 0})).status_code == 422
+    assert (await client.get("/leaderboard", params={"limit": 100000})).status_code == 422
+    assert (await client.get("/leaderboard", params={"cursor": "not-a-cursor"})).status_code == 400
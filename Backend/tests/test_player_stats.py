@@ -0,0 +1,51 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select
+
+from app import crud
+from app.models_db import PlayerStats
+
+
+@pytest.mark.asyncio
+async def test_submit_maintains_player_stats(client: AsyncClient, db_session):
+    response = await client.post("/auth/signup", json={
+        "username": "AggUser",
+        "email": "agg@example.com",
+        "password": "pw"
+    })
+    headers = {"Authorization": f"Bearer {response.json()['token']}"}
+
+    for score in [30, 70, 20]:
+        await client.post("/leaderboard", json={"score": score, "mode": "walls"}, headers=headers)
+    await client.post("/leaderboard", json={"score": 5, "mode": "pass-through"}, headers=headers)
+
+    rows = await crud.get_user_stats(db_session, "AggUser")
+    assert rows["walls"].games_played == 3
+    assert rows["walls"].best_score == 70
+    assert rows["walls"].total_score == 120
+    assert rows["pass-through"].games_played == 1
+
+    response = await client.get("/auth/stats", headers=headers)
+    stats = response.json()
+    assert stats["games_played"] == 4
+    assert stats["best_score"] == 70
+    assert stats["total_score"] == 125
+    assert stats["last_played"] is not None
+
+    # Backfill from the leaderboard table reproduces the incrementally maintained rows
+    await crud.rebuild_player_stats(db_session)
+    rebuilt = (await db_session.execute(
+        select(PlayerStats.mode, PlayerStats.games_played, PlayerStats.best_score, PlayerStats.total_score)
+        .order_by(PlayerStats.mode)
+    )).all()
+    assert [tuple(r) for r in rebuilt] == [("pass-through", 1, 5, 5), ("walls", 3, 70, 120)]
+
+
+@pytest.mark.asyncio
+async def test_upsert_replaces_a_missing_last_played(db_session):
+    db_session.add(PlayerStats(username="NoDate", mode="walls", games_played=1, best_score=3, total_score=3, last_played=None))
+    await db_session.flush()
+    await crud.upsert_player_stats(db_session, "NoDate", "walls", 5, 1_700_000_000_000)
+    row = (await db_session.execute(select(PlayerStats).where(PlayerStats.username == "NoDate"))).scalar_one()
+    await db_session.refresh(row)
+    assert (row.games_played, row.best_score, row.last_played) == (2, 5, 1_700_000_000_000)
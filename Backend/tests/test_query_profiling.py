@@ -0,0 +1,61 @@
+import logging
+
+import pytest
+import pytest_asyncio
+
+from app.profiling import QueryProfilingMiddleware, query_profiler
+
+
+@pytest_asyncio.fixture
+async def profiler():
+    query_profiler.enable(slow_ms=0)
+    yield query_profiler
+    query_profiler.disable()
+    query_profiler.reset()
+
+
+@pytest.mark.asyncio
+async def test_disabled_by_default(client):
+    response = await client.get("/leaderboard")
+    assert "server-timing" not in response.headers
+    assert (await client.get("/system/queries")).json() == {"enabled": False, "slow_query_ms": None, "routes": {}}
+
+
+@pytest.mark.asyncio
+async def test_queries_are_counted_per_route(client, profiler, caplog):
+    response = await client.post("/auth/signup", json={"username": "Prof", "email": "prof@example.com", "password": "pw"})
+    headers = {"Authorization": f"Bearer {response.json()['token']}"}
+    with caplog.at_level(logging.WARNING, logger="app.profiling"):
+        for _ in range(2):
+            response = await client.get("/auth/stats", headers=headers)
+    timing = response.headers["server-timing"]
+    assert timing.startswith("db;dur=") and timing.endswith(' queries"')
+    # slow_ms=0 logs every statement, never its parameters
+    slow = [record.message for record in caplog.records if record.message.startswith("Slow query")]
+    assert any("SELECT" in message for message in slow)
+    assert not any("Prof" in message for message in slow)
+
+    routes = (await client.get("/system/queries")).json()["routes"]
+    stats = routes["GET /auth/stats"]
+    assert stats["requests"] == 2
+    assert stats["max_queries"] >= 1 and stats["db_ms"] > 0
+    assert routes["POST /auth/signup"]["requests"] == 1
+    # The endpoint is profiled too, but hadn't finished when it reported
+    assert "GET /system/queries" not in routes
+
+
+@pytest.mark.asyncio
+async def test_unmatched_paths_share_one_row(profiler):
+    async def not_found(scope, receive, send):
+        # What a router without a matching route does: no "route" in the scope
+        await send({"type": "http.response.start", "status": 404, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def ignore(message):
+        pass
+
+    middleware = QueryProfilingMiddleware(not_found)
+    for path in ("/nope/1", "/nope/2"):
+        await middleware({"type": "http", "method": "GET", "path": path}, None, ignore)
+    assert list(profiler.stats()["routes"]) == ["GET unmatched"]
+    assert profiler.stats()["routes"]["GET unmatched"]["requests"] == 2
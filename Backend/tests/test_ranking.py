@@ -0,0 +1,89 @@
+import random
+from types import SimpleNamespace
+
+import pytest
+from httpx import AsyncClient
+
+from app import crud
+from app.models_db import LeaderboardEntry as DBLeaderboardEntry
+from app.ranking import FenwickTree, RankEngine
+
+
+def test_fenwick_counts_match_brute_force():
+    rng = random.Random(7)
+    tree = FenwickTree(size=4)
+    scores = []
+    for _ in range(500):
+        score = rng.randrange(0, 3000)  # forces several grow() rebuilds
+        scores.append(score)
+        tree.add(score)
+
+    for probe in [0, 1, 17, 999, 2999, 5000]:
+        assert tree.count_greater(probe) == sum(1 for s in scores if s > probe)
+
+
+def test_fenwick_never_grows_past_max_size():
+    tree = FenwickTree(size=4, max_size=64)
+    for score in [3, 63, 64, 10**9]:
+        tree.add(score)
+    assert tree._size == 64
+    # Everything above the cap shares the top bucket
+    assert tree.count_greater(62) == 3
+    assert tree.count_greater(63) == 0
+
+
+@pytest.mark.asyncio
+async def test_stats_include_per_mode_ranks(client: AsyncClient):
+    tokens = {}
+    for name in ["RankA", "RankB"]:
+        response = await client.post("/auth/signup", json={
+            "username": name,
+            "email": f"{name.lower()}@example.com",
+            "password": "pw"
+        })
+        tokens[name] = {"Authorization": f"Bearer {response.json()['token']}"}
+
+    await client.post("/leaderboard", json={"score": 50, "mode": "walls"}, headers=tokens["RankA"])
+    await client.post("/leaderboard", json={"score": 80, "mode": "pass-through"}, headers=tokens["RankA"])
+    await client.post("/leaderboard", json={"score": 60, "mode": "walls"}, headers=tokens["RankB"])
+
+    response = await client.get("/auth/stats", headers=tokens["RankA"])
+    stats = response.json()
+    assert stats["games_played"] == 2
+    assert stats["best_score"] == 80
+    assert stats["rank"] == 1
+    assert stats["modes"]["walls"] == {"games_played": 1, "best_score": 50, "rank": 2}
+    assert stats["modes"]["pass-through"] == {"games_played": 1, "best_score": 80, "rank": 1}
+
+    # Engine is loaded now; new entries are counted as they are written
+    await client.post("/leaderboard", json={"score": 90, "mode": "pass-through"}, headers=tokens["RankB"])
+    response = await client.get("/auth/stats", headers=tokens["RankA"])
+    stats = response.json()
+    assert stats["rank"] == 2
+    assert stats["modes"]["walls"]["rank"] == 2
+    assert stats["modes"]["pass-through"]["rank"] == 2
+
+
+@pytest.mark.asyncio
+async def test_load_counts_a_late_write_behind_row_once(db_session, monkeypatch):
+    db_session.add(DBLeaderboardEntry(id="old", username="A", score=10, mode="walls", timestamp=1))
+    await db_session.commit()
+    engine = RankEngine()
+    load = crud.get_score_counts
+
+    async def commit_during_load(db, since, ids):
+        rows = await load(db, since, ids)
+        if not engine.loaded and len(engine._pending) == 0:
+            # Flushed from the journal long after it was played, after the query's snapshot
+            late = dict(id="late", username="B", score=20, mode="walls", timestamp=2)
+            db_session.add(DBLeaderboardEntry(**late))
+            await db_session.commit()
+            engine.add(SimpleNamespace(**late))
+        return rows
+
+    monkeypatch.setattr(crud, "get_score_counts", commit_during_load)
+    await engine.load(db_session)
+
+    assert engine.rank(10) == 2
+    assert engine.rank(20, "walls") == 1
+    assert engine._global.total == 2
@@ -0,0 +1,181 @@
+import asyncio
+
+import pytest
+from fastapi import WebSocketDisconnect
+from fastapi.testclient import TestClient
+
+from app.core.security import create_token
+from app.main import app
+from app.frame_codec import decode
+from app.models import Coordinate, Direction, GameFrame, GameMode, StreamEncoding, StreamProtocol
+from app.active_players import active_players
+from app.relay import RelayHub, StreamFormat, relay_hub
+from app.routers import spectate
+
+
+def make_frame(score: int) -> GameFrame:
+    return GameFrame(
+        snake=[Coordinate(x=10, y=10), Coordinate(x=9, y=10)],
+        food=Coordinate(x=15, y=15),
+        score=score,
+        direction=Direction.RIGHT,
+    )
+
+
+@pytest.mark.asyncio
+async def test_hub_fans_out_and_drops_oldest_for_slow_spectators():
+    hub = RelayHub(queue_size=2)
+    channel = hub.open_game("user_1", "Player", GameMode.walls)
+    ws = StreamFormat(transport="ws")
+    fast, slow = hub.subscribe("user_1", ws), hub.subscribe("user_1", ws)
+
+    for score in range(5):
+        channel.publish(make_frame(score))
+        if score < 4:
+            assert GameFrame.model_validate_json(await fast.get()).score == score
+
+    # The slow spectator kept only the newest frames; the publisher never blocked
+    assert [GameFrame.model_validate_json(await slow.get()).score for _ in range(2)] == [3, 4]
+    assert slow.dropped == 3
+
+    hub.close_game(channel)
+    assert (await slow.get()) == '{"event":"end"}'
+    hub.unsubscribe("user_1", fast)
+    hub.unsubscribe("user_1", slow)
+    assert hub._channels == {}
+
+
+@pytest.mark.asyncio
+async def test_each_frame_is_encoded_once_per_format():
+    hub = RelayHub(queue_size=8)
+    channel = hub.open_game("user_4", "Popular", GameMode.walls)
+    sse = StreamFormat()
+    delta = StreamFormat(StreamProtocol.delta, StreamEncoding.binary, "ws")
+    viewers = [hub.subscribe("user_4", sse) for _ in range(50)]
+    delta_viewers = [hub.subscribe("user_4", delta) for _ in range(50)]
+
+    for score in range(3):
+        channel.publish(make_frame(score))
+
+    assert channel.producers[sse].encoded == 3
+    # First frame is a keyframe for the new subscribers, the rest are shared diffs
+    assert channel.producers[delta].encoded == 4
+    first = [await v.get() for v in viewers]
+    assert all(message is first[0] for message in first)
+    assert first[0].startswith(b"data: {")
+
+    # Producers go away with their last subscriber, the channel with its publisher
+    for v in viewers:
+        hub.unsubscribe("user_4", v)
+    assert sse not in channel.producers
+    for v in delta_viewers:
+        hub.unsubscribe("user_4", v)
+    hub.close_game(channel)
+    assert hub._channels == {}
+
+
+@pytest.mark.asyncio
+async def test_slow_delta_spectator_is_resynced_with_a_keyframe():
+    hub = RelayHub(queue_size=2)
+    channel = hub.open_game("user_5", "Mover", GameMode.walls)
+    subscription = hub.subscribe("user_5", StreamFormat(StreamProtocol.delta, StreamEncoding.binary, "ws"))
+
+    frames = [make_frame(score) for score in range(6)]
+    for frame in frames:
+        channel.publish(frame)
+
+    state = None
+    while not subscription.queue.empty():
+        state = decode(await subscription.get(), state)
+    assert state.to_frame() == frames[-1]
+    assert subscription.dropped > 0
+
+
+@pytest.mark.asyncio
+async def test_sse_stream_relays_published_frames():
+    relay_hub.reset()
+    stream = spectate.frame_event_stream("user_2", keepalive=0.01)
+    assert await anext(stream) == b": keepalive\n\n"
+
+    channel = relay_hub.open_game("user_2", "Streamer", GameMode.pass_through)
+    channel.publish(make_frame(7))
+    event = await anext(stream)
+    assert event.startswith(b"data: ")
+    assert GameFrame.model_validate_json(event[len(b"data: "):]).score == 7
+
+    relay_hub.close_game(channel)
+    assert (await anext(stream)).startswith(b"event: end")
+    await stream.aclose()
+    assert relay_hub._channels == {}
+
+
+def test_websocket_publisher_reaches_spectators():
+    relay_hub.reset()
+    active_players.reset()
+    token = create_token("user_3", "Publisher")
+
+    # No `with`: the lifespan (index warm-up against the real database) isn't needed here
+    client = TestClient(app)
+    with client.websocket_connect("/players/user_3/ws") as spectator:
+        with client.websocket_connect(f"/players/user_3/play?token={token}&mode=walls") as publisher:
+            active = client.get("/players/active").json()
+            assert active == [{"id": "user_3", "username": "Publisher", "currentScore": 0, "mode": "walls"}]
+
+            publisher.send_text(make_frame(3).model_dump_json())
+            assert GameFrame.model_validate_json(spectator.receive_text()).score == 3
+            assert client.get("/players/active").json()[0]["currentScore"] == 3
+
+        assert spectator.receive_json() == {"event": "end"}
+    assert client.get("/players/active").json() == []
+
+    # Publishing as someone else is refused
+    with pytest.raises(WebSocketDisconnect):
+        with client.websocket_connect(f"/players/user_3/play?token={create_token('user_4', 'Impostor')}") as publisher:
+            publisher.receive_text()
+
+
+
+def test_a_reconnected_publisher_outlives_its_old_socket():
+    relay_hub.reset()
+    active_players.reset()
+    token = create_token("user_7", "Flaky")
+    client = TestClient(app)
+    with client.websocket_connect("/players/user_7/ws") as spectator:
+        with client.websocket_connect(f"/players/user_7/play?token={token}&mode=walls") as new:
+            with client.websocket_connect(f"/players/user_7/play?token={token}&mode=walls"):
+                pass
+            # The old socket closing doesn't end the game or drop the player
+            assert [player["id"] for player in client.get("/players/active").json()] == ["user_7"]
+            new.send_text(make_frame(4).model_dump_json())
+            assert GameFrame.model_validate_json(spectator.receive_text()).score == 4
+        assert spectator.receive_json() == {"event": "end"}
+    assert client.get("/players/active").json() == []
+
+class IdleSpectator:
+    """A spectator socket that connects and, some time later, goes away without a word."""
+
+    def __init__(self):
+        self.gone = asyncio.Event()
+
+    async def accept(self) -> None:
+        pass
+
+    async def receive(self) -> dict:
+        await self.gone.wait()
+        return {"type": "websocket.disconnect", "code": 1001}
+
+
+@pytest.mark.asyncio
+async def test_websocket_spectator_that_leaves_an_idle_game_is_cleaned_up():
+    relay_hub.reset()
+    spectate.spectate_connections.clear()
+    spectator = IdleSpectator()
+    handler = asyncio.create_task(spectate.watch_player_ws(spectator, "user_6"))
+    await asyncio.sleep(0)
+    assert "user_6" in relay_hub._channels
+
+    # No frame ever arrives, so only reading the socket notices the disconnect
+    spectator.gone.set()
+    await asyncio.wait_for(handler, timeout=1)
+    assert relay_hub._channels == {}
+    assert spectate.spectate_connections._values[("ws",)] == 0
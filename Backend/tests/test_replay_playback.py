@@ -0,0 +1,94 @@
+import json
+import random
+
+import pytest
+
+from app.engine import DIRECTION_CODES, SnakeGame
+from app.models import Direction, GameMode
+from app.replay_player import ReplayCheckpoints, ReplayCursor
+from app.replay_store import decode_replay, encode_replay, replay_store
+
+
+def record_game(mode: GameMode, seed: int):
+    """Plays a random game; returns (encoded replay, state after every tick)."""
+    rng, game, inputs, states = random.Random(seed), SnakeGame(mode, seed), [], []
+    states.append((game.cells(), game.food_cell, game.score))
+    while game.alive and game.tick < 3000:
+        if rng.random() < 0.25:
+            direction = rng.choice(list(Direction))
+            inputs.append((game.tick, DIRECTION_CODES[direction]))
+            game.turn(direction)
+        if game.step():
+            states.append((game.cells(), game.food_cell, game.score))
+    return encode_replay(mode, seed, game.score, game.tick, inputs), states
+
+
+def state(cursor):
+    return cursor.game.cells(), cursor.game.food_cell, cursor.game.score
+
+
+def longest_game(mode: GameMode):
+    return max((record_game(mode, seed) for seed in range(20)), key=lambda game: len(game[1]))
+
+
+def test_cursor_plays_every_tick():
+    data, states = longest_game(GameMode.walls)
+    cursor = ReplayCursor("entry_a", decode_replay(data), ReplayCheckpoints(4, 50))
+    played = [state(cursor)]
+    while cursor.step():
+        played.append(state(cursor))
+    assert played == states
+
+
+def test_seek_resumes_from_checkpoints(monkeypatch):
+    data, states = longest_game(GameMode.pass_through)
+    assert len(states) > 200
+    checkpoints = ReplayCheckpoints(4, 50)
+    first = ReplayCursor("entry_b", decode_replay(data), checkpoints)
+    list(first.seek(len(states) - 1))
+    assert state(first) == states[-1]
+
+    restored = []
+    original = SnakeGame.restore
+
+    def restore(mode, seed, snapshot):
+        restored.append(snapshot.tick)
+        return original(mode, seed, snapshot)
+
+    monkeypatch.setattr(SnakeGame, "restore", restore)
+    for target in (len(states) - 1, 123, 7):
+        cursor = ReplayCursor("entry_b", decode_replay(data), checkpoints)
+        list(cursor.seek(target))
+        assert state(cursor) == states[target]
+        cursor.step()
+        assert state(cursor) == states[min(target + 1, len(states) - 1)]
+    assert restored == [(len(states) - 1) // 50 * 50, 100]
+
+
+def test_checkpoint_cache_is_lru():
+    cache = ReplayCheckpoints(2, 50)
+    a = cache.get("a")
+    cache.get("b")
+    cache.get("a")
+    cache.get("c")
+    assert cache.get("a") is a
+    assert "b" not in cache._entries
+
+
+@pytest.mark.asyncio
+async def test_replay_endpoint_streams_frames(client):
+    data, states = longest_game(GameMode.walls)
+    replay_store.append("entry_replay", data)
+    start = max(0, len(states) - 15)
+    response = await client.get(f"/leaderboard/entry_replay/replay?speed=64&from_tick={start}")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+
+    events = response.text.strip().split("\n\n")
+    assert events[-1] == "event: end\ndata: {}"
+    frames = [json.loads(event.removeprefix("data: ")) for event in events[:-1]]
+    assert [[(c["x"], c["y"]) for c in frame["snake"]] for frame in frames] == [cells for cells, _, _ in states[start:]]
+    assert frames[-1]["score"] == states[-1][2]
+
+    response = await client.get("/leaderboard/entry_missing/replay")
+    assert response.status_code == 404
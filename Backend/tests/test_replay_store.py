@@ -0,0 +1,76 @@
+import random
+import uuid
+
+import pytest
+
+from app.models import GameMode
+from app.replay_store import ReplayStore, decode_replay, encode_replay
+
+
+def inputs(count: int, seed: int = 1):
+    rng, tick, out = random.Random(seed), 0, []
+    for _ in range(count):
+        tick += rng.choice([0, 1, 3, 7, 40, 5000])
+        out.append((tick, rng.randrange(4)))
+    return out
+
+
+def test_round_trip():
+    recorded = inputs(500)
+    data = encode_replay(GameMode.walls, 0xDEADBEEF, 17, recorded[-1][0] + 3, recorded)
+    record = decode_replay(data)
+    assert (record.mode, record.seed, record.score, record.ticks, record.input_count) == (
+        GameMode.walls, 0xDEADBEEF, 17, recorded[-1][0] + 3, 500
+    )
+    assert list(record.inputs()) == recorded
+
+
+def test_small_deltas_take_one_byte():
+    data = encode_replay(GameMode.pass_through, 1, 0, 1000, [(t * 5, t % 4) for t in range(100)])
+    assert len(data) == 22 + 100
+
+
+def test_store_rotates_segments_and_reopens(tmp_path):
+    store = ReplayStore(str(tmp_path), segment_bytes=2000)
+    records = {f"entry_{i:08x}": encode_replay(GameMode.walls, i, i, 10_000, inputs(50, i)) for i in range(40)}
+    for entry_id, data in records.items():
+        store.append(entry_id, data)
+    assert len(list(tmp_path.glob("segment-*.bin"))) > 1
+
+    view = store.get("entry_00000003")
+    assert isinstance(view, memoryview)
+    assert bytes(view) == records["entry_00000003"]
+
+    # A crash mid-append leaves a partial index record behind
+    with open(tmp_path / "replays.idx", "ab") as f:
+        f.write(b"entry_torn")
+    reopened = ReplayStore(str(tmp_path), segment_bytes=2000)
+    assert all(bytes(reopened.get(entry_id)) == data for entry_id, data in records.items())
+    assert reopened.read("entry_00000007").seed == 7
+    assert reopened.get("missing") is None
+
+    # The next append cuts the torn record off instead of writing after it
+    reopened.append("entry_after_crash", records["entry_00000001"])
+    assert bytes(ReplayStore(str(tmp_path), segment_bytes=2000).get("entry_after_crash")) == records["entry_00000001"]
+
+
+def test_full_length_ids_survive_a_reopen(tmp_path):
+    entry_id = f"entry_{uuid.uuid4().hex}"
+    data = encode_replay(GameMode.pass_through, 9, 3, 500, inputs(20))
+    ReplayStore(str(tmp_path), segment_bytes=2000).append(entry_id, data)
+    assert bytes(ReplayStore(str(tmp_path), segment_bytes=2000).get(entry_id)) == data
+
+
+def test_workers_share_one_store(tmp_path):
+    # Two stores on one directory stand in for two worker processes
+    first, second = (ReplayStore(str(tmp_path), segment_bytes=2000) for _ in range(2))
+    records = {f"entry_{uuid.uuid4().hex}": encode_replay(GameMode.walls, i, i, 10_000, inputs(50, i)) for i in range(30)}
+    for i, (entry_id, data) in enumerate(records.items()):
+        (first if i % 2 else second).append(entry_id, data)
+    for store in (first, second):
+        assert all(bytes(store.get(entry_id)) == data for entry_id, data in records.items())
+
+
+def test_bad_magic_is_rejected():
+    with pytest.raises(ValueError):
+        decode_replay(b"\0" * 22)
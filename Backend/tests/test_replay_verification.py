@@ -0,0 +1,94 @@
+import random
+
+import pytest
+
+from app.core.config import settings
+from app.engine import SnakeGame
+from app.models import Direction, GameMode
+from app.replay_store import replay_store
+from app.verification import replay_verifier
+
+
+@pytest.fixture(autouse=True, scope="module")
+def verifier_pool():
+    yield
+    replay_verifier.shutdown()
+
+
+def play(mode: GameMode, seed: int, rng_seed: int = 1):
+    """A random game recorded as a replay payload; returns (score, replay)."""
+    rng = random.Random(rng_seed)
+    game = SnakeGame(mode, seed)
+    inputs = []
+    while game.alive and game.tick < 20_000:
+        if rng.random() < 0.2:
+            direction = rng.choice(list(Direction))
+            inputs.append({"tick": game.tick, "direction": direction.value})
+            game.turn(direction)
+        game.step()
+    return game.score, {"seed": seed, "ticks": game.tick, "inputs": inputs}
+
+
+async def signup(client) -> dict:
+    response = await client.post("/auth/signup", json={"username": "Replayer", "email": "replay@example.com", "password": "pw"})
+    return {"Authorization": f"Bearer {response.json()['token']}"}
+
+
+@pytest.mark.asyncio
+async def test_verified_replay_is_accepted(client):
+    headers = await signup(client)
+    score, replay = next(
+        (score, replay) for score, replay in (play(GameMode.pass_through, seed) for seed in range(50)) if score > 0
+    )
+    response = await client.post("/leaderboard", json={"score": score, "mode": "pass-through", "replay": replay}, headers=headers)
+    assert response.status_code == 201
+
+    response = await client.post("/leaderboard", json={"score": score + 5, "mode": "pass-through", "replay": replay}, headers=headers)
+    assert response.status_code == 422
+
+    board = (await client.get("/leaderboard")).json()
+    assert [entry["score"] for entry in board] == [score]
+    stored = replay_store.read(board[0]["id"])
+    assert (stored.seed, stored.score, stored.ticks) == (replay["seed"], score, replay["ticks"])
+
+    stats = (await client.get("/system/verification")).json()
+    assert stats["verified"] >= 1 and stats["rejected"] >= 1
+    assert stats["pending"] == 0
+
+
+@pytest.mark.asyncio
+async def test_replay_required(client, monkeypatch):
+    headers = await signup(client)
+    monkeypatch.setattr(settings, "SCORE_VERIFICATION", "required")
+    response = await client.post("/leaderboard", json={"score": 3, "mode": "walls"}, headers=headers)
+    assert response.status_code == 422
+
+    score, replay = play(GameMode.walls, 4)
+    response = await client.post("/leaderboard", json={"score": score, "mode": "walls", "replay": replay}, headers=headers)
+    assert response.status_code == 201
+
+
+@pytest.mark.asyncio
+async def test_saturated_pool_returns_429(client, monkeypatch):
+    headers = await signup(client)
+    monkeypatch.setattr(replay_verifier, "max_pending", 0)
+    score, replay = play(GameMode.walls, 2)
+    response = await client.post("/leaderboard", json={"score": score, "mode": "walls", "replay": replay}, headers=headers)
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "1"
+
+
+@pytest.mark.asyncio
+async def test_malformed_replays_are_rejected(client, monkeypatch):
+    headers = await signup(client)
+    unordered = {"seed": 1, "ticks": 10, "inputs": [{"tick": 5, "direction": "UP"}, {"tick": 2, "direction": "DOWN"}]}
+    response = await client.post("/leaderboard", json={"score": 0, "mode": "walls", "replay": unordered}, headers=headers)
+    assert response.status_code == 422
+
+    monkeypatch.setattr(settings, "REPLAY_MAX_TICKS", 100)
+    response = await client.post("/leaderboard", json={"score": 0, "mode": "walls", "replay": {"seed": 1, "ticks": 101}}, headers=headers)
+    assert response.status_code == 422
+
+    # Beyond what the record header holds: rejected, not a 500
+    response = await client.post("/leaderboard", json={"score": 0, "mode": "walls", "replay": {"seed": 1, "ticks": 2**32}}, headers=headers)
+    assert response.status_code == 422
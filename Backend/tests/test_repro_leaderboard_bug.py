@@ -16,7 +16,7 @@ async def test_repro_leaderboard_visibility(client: AsyncClient):
     token = response.json()["token"]
     
     # 2. Submit high score
-    score = 9999
+    score = 399
     response = await client.post("/leaderboard", 
         json={"score": score, "mode": "pass-through"},
         headers={"Authorization": f"Bearer {token}"}
@@ -0,0 +1,35 @@
+import time
+
+import pytest
+
+from app.core import security
+from app.core.security import create_token, verify_token
+
+
+def test_round_trip():
+    claims = verify_token(create_token("user_1", "Alice"))
+    assert (claims.user_id, claims.username) == ("user_1", "Alice")
+    assert claims.expires > time.time()
+
+
+def test_tampered_expired_and_foreign_tokens_are_rejected(monkeypatch):
+    token = create_token("user_1", "Alice")
+    payload, signature = token.split(".")
+    forged = create_token("user_2", "Mallory").split(".")[0]
+    assert verify_token(f"{forged}.{signature}") is None
+    assert verify_token(payload) is None
+    assert verify_token("user_1") is None
+    assert verify_token(f"{payload}.{signature[:-1]}é") is None
+    assert verify_token(f"é.{signature}") is None
+    assert verify_token(create_token("user_1", "Alice", ttl=-1)) is None
+
+    monkeypatch.setattr(security, "_key", b"another key")
+    assert verify_token(token) is None
+
+
+@pytest.mark.asyncio
+async def test_expired_token_is_unauthorized(client):
+    response = await client.post("/auth/signup", json={"username": "Old", "email": "old@example.com", "password": "pw"})
+    token = create_token(response.json()["user"]["id"], "Old", ttl=-1)
+    response = await client.post("/leaderboard", json={"score": 1, "mode": "walls"}, headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 401
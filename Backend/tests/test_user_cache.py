@@ -0,0 +1,69 @@
+import pytest
+from sqlalchemy import event
+
+from app.core.cache import TTLCache
+from app.dependencies import user_cache
+
+from .conftest import engine
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_and_lru():
+    clock = FakeClock()
+    cache = TTLCache(maxsize=2, ttl=10, clock=clock)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)  # evicts b, the least recently used
+    assert cache.get("b") is None
+    clock.now = 11
+    assert cache.get("a") is None
+    cache.set("d", 4)
+    cache.invalidate("d")
+    assert cache.get("d") is None
+    assert cache.stats() | {"hit_ratio": None} == {
+        "size": 1, "maxsize": 2, "ttl_seconds": 10, "hits": 1, "misses": 3, "hit_ratio": None,
+        "evictions": 1, "expirations": 1, "invalidations": 1,
+    }
+
+
+@pytest.mark.asyncio
+async def test_authenticated_requests_skip_the_users_table(client):
+    response = await client.post("/auth/signup", json={"username": "Cached", "email": "cached@example.com", "password": "pw"})
+    user_id, token = response.json()["user"]["id"], response.json()["token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    queries = []
+
+    def record(conn, cursor, statement, *args):
+        if "FROM users" in statement:
+            queries.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    try:
+        # The signed token is enough to submit a score
+        assert (await client.post("/leaderboard", json={"score": 4, "mode": "walls"}, headers=headers)).status_code == 201
+        assert queries == []
+
+        # The profile (email) is loaded once, then served from the cache
+        for _ in range(3):
+            assert (await client.get("/auth/me", headers=headers)).json() == {"id": user_id, "username": "Cached", "email": "cached@example.com"}
+        assert len(queries) == 1
+
+        user_cache.invalidate(user_id)
+        await client.get("/auth/me", headers=headers)
+        assert len(queries) == 2
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", record)
+
+    assert (await client.get("/auth/me", headers={"Authorization": "Bearer nope"})).status_code == 401
+    assert list(user_cache._data) == [user_id]
+    stats = (await client.get("/system/user-cache")).json()
+    assert stats["hits"] == 2 and stats["invalidations"] == 1
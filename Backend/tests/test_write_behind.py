@@ -0,0 +1,182 @@
+import asyncio
+import json
+import os
+import time
+
+import pytest
+import pytest_asyncio
+
+from app.core.config import settings
+from app.leaderboard_index import IndexedEntry
+from app.write_behind import ScoreJournal, score_writer
+
+from .conftest import TestingSessionLocal
+
+
+@pytest_asyncio.fixture
+async def writer(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "SCORE_JOURNAL_DIR", str(tmp_path / "journal"))
+    monkeypatch.setattr(settings, "SCORE_FLUSH_INTERVAL_MS", 20)
+    await score_writer.start(TestingSessionLocal)
+    yield score_writer
+    await score_writer.stop()
+    score_writer.flushed = score_writer.batches = score_writer.dead_lettered = 0
+
+
+async def signup(client) -> dict:
+    response = await client.post("/auth/signup", json={"username": "Batcher", "email": "batch@example.com", "password": "pw"})
+    return {"Authorization": f"Bearer {response.json()['token']}"}
+
+
+@pytest.mark.asyncio
+async def test_submissions_are_batched(client, writer, tmp_path):
+    headers = await signup(client)
+    responses = await asyncio.gather(*(
+        client.post("/leaderboard", json={"score": score, "mode": "walls"}, headers=headers) for score in range(40)
+    ))
+    assert {r.status_code for r in responses} == {202}
+    ids = {r.json()["id"] for r in responses}
+    assert len(ids) == 40
+
+    await writer.stop()
+    assert writer.flushed == 40
+    assert writer.batches < 40
+    board = (await client.get("/leaderboard?limit=100")).json()
+    assert {entry["id"] for entry in board} == ids
+    stats = (await client.get("/auth/stats", headers=headers)).json()
+    assert stats["games_played"] == 40 and stats["best_score"] == 39
+    # Everything committed: no journal left behind
+    assert os.listdir(tmp_path / "journal") == []
+
+    response = await client.post("/leaderboard", json={"score": 1, "mode": "walls"}, headers=headers)
+    assert response.status_code == 201
+
+
+@pytest.mark.asyncio
+async def test_concurrent_submissions_share_fsyncs(client, writer, monkeypatch):
+    headers = await signup(client)
+    calls = []
+    real_fsync = os.fsync
+
+    def slow_fsync(fd):
+        calls.append(fd)
+        time.sleep(0.01)
+        real_fsync(fd)
+
+    monkeypatch.setattr(os, "fsync", slow_fsync)
+    responses = await asyncio.gather(*(
+        client.post("/leaderboard", json={"score": 1, "mode": "walls"}, headers=headers) for _ in range(30)
+    ))
+    assert {r.status_code for r in responses} == {202}
+    assert 1 <= len(calls) < 30
+
+
+@pytest.mark.asyncio
+async def test_journal_is_replayed_on_start(client, tmp_path, monkeypatch):
+    journal = tmp_path / "journal"
+    journal.mkdir()
+    monkeypatch.setattr(settings, "SCORE_JOURNAL_DIR", str(journal))
+    headers = await signup(client)
+    response = await client.post("/leaderboard", json={"score": 5, "mode": "walls"}, headers=headers)
+    committed = response.json()["id"]
+
+    now = int(time.time() * 1000)
+    lines = [
+        IndexedEntry(committed, "Batcher", 5, "walls", now),
+        IndexedEntry("entry_lost0001", "Batcher", 9, "walls", now),
+    ]
+    # Left by a worker that died; its lock file is still there but unlocked
+    with open(journal / "scores-999999-00000003.log", "w") as f:
+        f.writelines(json.dumps(list(entry)) + "\n" for entry in lines)
+        f.write('["entry_torn"')
+    (journal / "scores-999999.lock").touch()
+
+    await score_writer.start(TestingSessionLocal)
+    try:
+        assert sorted(os.listdir(journal)) == [f"scores-{os.getpid()}-00000000.log", f"scores-{os.getpid()}.lock"]
+    finally:
+        await score_writer.stop()
+    assert os.listdir(journal) == []
+
+    from app.leaderboard_index import leaderboard_index
+    leaderboard_index.reset()
+    board = (await client.get("/leaderboard")).json()
+    assert sorted(entry["id"] for entry in board) == sorted([committed, "entry_lost0001"])
+
+
+@pytest.mark.asyncio
+async def test_journals_of_running_workers_are_left_alone(client, tmp_path, monkeypatch):
+    journal = tmp_path / "journal"
+    monkeypatch.setattr(settings, "SCORE_JOURNAL_DIR", str(journal))
+    other = ScoreJournal(str(journal), fsync=False, owner="other")
+    directory = other.lock_directory()
+    other.open()
+    os.close(directory)
+    await other.append(IndexedEntry("entry_elsewhere", "Batcher", 4, "walls", int(time.time() * 1000)))
+
+    await score_writer.start(TestingSessionLocal)
+    await score_writer.stop()
+    assert os.listdir(journal) == ["scores-other-00000000.log", "scores-other.lock"]
+    board = (await client.get("/leaderboard")).json()
+    assert board == []
+    other._file.close()
+    os.close(other._lock_fd)
+
+
+@pytest.mark.asyncio
+async def test_draining_writer_falls_back_to_direct_writes(client, writer):
+    headers = await signup(client)
+    writer._accepting = False
+    response = await client.post("/leaderboard", json={"score": 1, "mode": "walls"}, headers=headers)
+    assert response.status_code == 201
+
+
+@pytest.mark.asyncio
+async def test_rows_the_database_rejects_are_dead_lettered(client, writer, tmp_path):
+    headers = await signup(client)
+    response = await client.post("/leaderboard", json={"score": 3, "mode": "walls"}, headers=headers)
+    await writer.queue.join()
+    taken = response.json()["id"]
+
+    now = int(time.time() * 1000)
+    entries = [IndexedEntry(f"entry_new{i}", "Batcher", i, "walls", now) for i in range(5)]
+    entries.insert(2, IndexedEntry(taken, "Batcher", 7, "walls", now))
+    for entry in entries:
+        await writer.submit(entry)
+    await writer.queue.join()
+
+    # The duplicate id is set aside; the rest of its batch still goes in
+    board = (await client.get("/leaderboard?limit=100")).json()
+    assert sorted(entry["id"] for entry in board) == sorted([taken] + [f"entry_new{i}" for i in range(5)])
+    assert writer.dead_lettered == 1
+    with open(tmp_path / "journal" / "dead-letter.log") as f:
+        [line] = f.readlines()
+    assert json.loads(line)[:3] == [taken, "Batcher", 7]
+
+
+@pytest.mark.asyncio
+async def test_unwritable_dead_letter_log_keeps_the_flusher_running(client, writer, monkeypatch):
+    headers = await signup(client)
+    response = await client.post("/leaderboard", json={"score": 3, "mode": "walls"}, headers=headers)
+    await writer.queue.join()
+    monkeypatch.setattr(settings, "SCORE_JOURNAL_DIR", "/dev/null/journal")
+
+    await writer.submit(IndexedEntry(response.json()["id"], "Batcher", 7, "walls", int(time.time() * 1000)))
+    await writer.submit(IndexedEntry("entry_after", "Batcher", 8, "walls", int(time.time() * 1000)))
+    await asyncio.wait_for(writer.queue.join(), 5)
+    assert writer.dead_lettered == 1
+    assert not writer._task.done()
+
+
+@pytest.mark.asyncio
+async def test_full_queue_answers_503(client, writer, monkeypatch):
+    headers = await signup(client)
+    # Park the flusher so nothing leaves the queue
+    writer._task.cancel()
+    writer.queue = asyncio.Queue(maxsize=2)
+    try:
+        responses = [await client.post("/leaderboard", json={"score": 1, "mode": "walls"}, headers=headers) for _ in range(3)]
+        assert [r.status_code for r in responses] == [202, 202, 503]
+        assert responses[2].headers["retry-after"] == "1"
+    finally:
+        writer._task = asyncio.create_task(writer._run())
@@ -1,10 +1,29 @@
 import pytest
 import httpx
+import os
 import uuid
 import asyncio
+import random
+
+from app.engine import SnakeGame
+from app.models import Direction, GameMode
 
 # This test requires the full stack running in Docker
-BASE_URL = "http://localhost:8080"
+BASE_URL = os.getenv("E2E_BASE_URL", "http://localhost:8080")
+
+
+def played_game(seed: int):
+    """A random pass-through game and its replay, since the server verifies submitted scores."""
+    rng = random.Random(seed)
+    game = SnakeGame(GameMode.pass_through, seed)
+    inputs = []
+    while game.alive and game.tick < 5000:
+        if rng.random() < 0.2:
+            direction = rng.choice(list(Direction))
+            inputs.append({"tick": game.tick, "direction": direction.value})
+            game.turn(direction)
+        game.step()
+    return game.score, {"seed": seed, "ticks": game.tick, "inputs": inputs}
 
 @pytest.mark.asyncio
 async def test_leaderboard_update_via_nginx():
@@ -38,9 +57,9 @@ async def test_leaderboard_update_via_nginx():
         initial_entries = lb_resp.json()
         
         # 4. Submit Score
-        score = 8888
+        score, replay = played_game(388)
         sub_resp = await client.post("/leaderboard", 
-            json={"score": score, "mode": "pass-through"},
+            json={"score": score, "mode": "pass-through", "replay": replay},
             headers={"Authorization": f"Bearer {token}"}
         )
         assert sub_resp.status_code == 201
@@ -76,3 +95,50 @@ async def test_leaderboard_update_via_nginx():
         
         pass
 
+
+@pytest.mark.asyncio
+async def test_leaderboard_is_cached_by_proxy():
+    async with httpx.AsyncClient(base_url=BASE_URL, timeout=10.0) as client:
+        try:
+            first = await client.get("/leaderboard", params={"limit": 7})
+        except httpx.ConnectError:
+            pytest.skip("Full stack not running")
+        if "x-cache-status" not in first.headers:
+            pytest.skip("Not behind the nginx proxy (no X-Cache-Status header)")
+
+        assert first.status_code == 200
+        etag = first.headers["etag"]
+        assert "max-age=" in first.headers["cache-control"]
+
+        # Within max-age the proxy answers from its cache
+        second = await client.get("/leaderboard", params={"limit": 7})
+        assert second.headers["x-cache-status"] == "HIT"
+        assert second.headers["etag"] == etag
+        assert second.json() == first.json()
+
+        # Conditional requests are answered without a body
+        conditional = await client.get("/leaderboard", params={"limit": 7}, headers={"If-None-Match": etag})
+        assert conditional.status_code == 304
+
+        # Once max-age has passed, a new score shows up (revalidated, not served stale forever)
+        unique_id = uuid.uuid4().hex[:6]
+        reg_resp = await client.post("/auth/signup", json={
+            "username": f"E2ECache_{unique_id}",
+            "email": f"e2e_cache_{unique_id}@img.com",
+            "password": "password",
+        })
+        token = reg_resp.json()["token"]
+        sub_resp = await client.post("/leaderboard",
+            json={"score": 400, "mode": "walls"},
+            headers={"Authorization": f"Bearer {token}"}
+        )
+        assert sub_resp.status_code in (201, 202)
+
+        max_age = int(first.headers["cache-control"].split("max-age=")[1].split(",")[0])
+        for _ in range(10):
+            await asyncio.sleep(max_age + 0.5)
+            latest = await client.get("/leaderboard", params={"limit": 7})
+            if latest.headers["etag"] != etag:
+                break
+        # Every applied score changes the validator, whether or not it makes the top 7
+        assert latest.headers["etag"] != etag
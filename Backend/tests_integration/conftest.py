@@ -5,13 +5,25 @@ from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sess
 from httpx import AsyncClient, ASGITransport
 
 from app.main import app
-from app.core.database import get_db, Base
+from app.core.database import get_db, get_read_db, Base
+from app.leaderboard_index import leaderboard_index
+from app.leaderboard_feed import leaderboard_feed
+from app.ranking import rank_engine
+from app.active_players import active_players
+from app.replay_store import replay_store
+from app.dependencies import user_cache
+from app.core.config import settings
 
 # Use a file-based SQLite DB for integration tests by default
 TEST_DB_FILE = "./test_integration.db"
 DEFAULT_DB_URL = f"sqlite+aiosqlite:///{TEST_DB_FILE}"
 SQLALCHEMY_DATABASE_URL = os.getenv("TEST_DATABASE_URL", DEFAULT_DB_URL)
 
+@pytest.fixture(autouse=True)
+def unverified_scores(monkeypatch):
+    # Most tests submit made-up scores
+    monkeypatch.setattr(settings, "SCORE_VERIFICATION", "optional")
+
 @pytest_asyncio.fixture(scope="session")
 def event_loop():
     import asyncio
@@ -60,11 +72,19 @@ async def db_session(db_engine):
         pass
 
 @pytest_asyncio.fixture(scope="function")
-async def client(db_session):
+async def client(db_session, tmp_path):
     async def override_get_db():
         yield db_session
 
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    # In-memory indexes are process-global; rebuild them from this test's database
+    leaderboard_index.reset()
+    leaderboard_feed.reset()
+    rank_engine.reset()
+    active_players.reset()
+    replay_store.reset(str(tmp_path / "replays"))
+    user_cache.clear()
     
     async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
         yield ac
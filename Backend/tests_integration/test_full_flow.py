@@ -27,7 +27,7 @@ async def test_full_user_journey(client: AsyncClient):
     })
     
     assert response.status_code == 200
-    assert response.json()["token"] == token # In our mock token impl, it's consistent
+    assert response.json()["user"]["id"] == auth_data["user"]["id"]
     
     # 3. Access Protected Route (Me)
     headers = {"Authorization": f"Bearer {token}"}
@@ -0,0 +1,131 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+import pytest
+from sqlalchemy import create_engine
+from websockets.sync.client import connect
+
+from app.core.database import Base
+from app.models import Coordinate, Direction, GameFrame
+
+# Two real uvicorn workers sharing one SQLite database and an event bus hub,
+# the way entrypoint.sh runs them with WEB_CONCURRENCY > 1 (separate ports
+# here, so each request can be pointed at a chosen worker).
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_until(condition, timeout: float = 10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        result = condition()
+        if result:
+            return result
+        time.sleep(0.05)
+    raise AssertionError("timed out")
+
+
+@pytest.fixture
+def workers(tmp_path):
+    db_path = tmp_path / "game.db"
+    sync_engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(sync_engine)
+    sync_engine.dispose()
+
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite+aiosqlite:///{db_path}",
+        "EVENT_BUS": "socket",
+        "EVENT_BUS_SOCKET_PATH": str(tmp_path / "events.sock"),
+        "SECRET_KEY": "multi-worker-test",
+        "REPLAY_STORE_DIR": str(tmp_path / "replays"),
+        "SCORE_JOURNAL_DIR": str(tmp_path / "journal"),
+        "SCORE_VERIFICATION": "optional",
+        # Run from tmp_path, away from the static/ stub that tests/conftest.py creates
+        "PYTHONPATH": BACKEND_DIR,
+    }
+    processes, urls = [], []
+    for _ in range(2):
+        port = free_port()
+        processes.append(subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+            cwd=tmp_path, env=env,
+        ))
+        urls.append(f"http://127.0.0.1:{port}")
+    try:
+        for url in urls:
+            wait_until(lambda: _healthy(url))
+        yield urls
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait(timeout=10)
+
+
+def _healthy(url: str) -> bool:
+    try:
+        return httpx.get(f"{url}/system/events").status_code == 200
+    except httpx.TransportError:
+        return False
+
+
+def signup(url: str, name: str) -> dict:
+    response = httpx.post(f"{url}/auth/signup", json={"username": name, "email": f"{name}@example.com", "password": "password123"})
+    assert response.status_code == 201
+    return response.json()
+
+
+def test_scores_reach_the_other_worker(workers):
+    a, b = workers
+    token = signup(a, "worker_a_player")["token"]
+
+    # B loads its in-memory board before the score exists
+    assert httpx.get(f"{b}/leaderboard").json() == []
+
+    response = httpx.post(f"{a}/leaderboard", json={"score": 320, "mode": "walls"}, headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 201
+    entry_id = response.json()["id"]
+
+    board = wait_until(lambda: httpx.get(f"{b}/leaderboard").json())
+    assert [(entry["id"], entry["score"]) for entry in board] == [(entry_id, 320)]
+    assert httpx.get(f"{b}/system/events").json()["received"] >= 1
+    # Exactly one of them runs the hub
+    assert sorted(httpx.get(f"{url}/system/events").json()["hub"] for url in workers) == [False, True]
+
+
+def test_spectators_on_one_worker_watch_a_game_published_on_another(workers):
+    a, b = workers
+    user = signup(a, "live_player")
+    player_id = user["user"]["id"]
+    frame = GameFrame(snake=[Coordinate(x=3, y=3)], food=Coordinate(x=8, y=8), score=30, direction=Direction.LEFT)
+
+    with httpx.stream("GET", f"{b}/players/{player_id}/watch", timeout=10) as stream:
+        with connect(f"ws://{a[len('http://'):]}/players/{player_id}/play?token={user['token']}&mode=walls") as publisher:
+            publisher.send(frame.model_dump_json())
+            for line in stream.iter_lines():
+                if line.startswith("data: "):
+                    assert json.loads(line[len("data: "):])["score"] == 30
+                    break
+            active = httpx.get(f"{b}/players/active").json()
+            assert [(player["id"], player["mode"]) for player in active] == [(player_id, "walls")]
+
+
+def test_heartbeats_show_up_on_every_worker(workers):
+    a, b = workers
+    user = signup(a, "heartbeat_player")
+    response = httpx.post(f"{a}/players/heartbeat", json={"score": 12, "mode": "pass-through"}, headers={"Authorization": f"Bearer {user['token']}"})
+    assert response.status_code == 204
+
+    active = wait_until(lambda: httpx.get(f"{b}/players/active", params={"mode": "pass-through"}).json())
+    assert [(player["id"], player["currentScore"]) for player in active] == [(user["user"]["id"], 12)]
@@ -3,8 +3,12 @@ import time
 import sys
 import threading
 import uvicorn
+from app.core.config import settings
 from app.main import app
 
+# The walkthrough submits a made-up score, with no replay to verify
+settings.SCORE_VERIFICATION = "optional"
+
 def run_server():
     uvicorn.run(app, host="127.0.0.1", port=8000, log_level="error")
 
@@ -3,7 +3,7 @@ import { Position } from '@/hooks/useSnakeGame';
 
 interface GameCanvasProps {
   snake: Position[];
-  food: Position;
+  food: Position | null;
   gridSize: number;
   gameOver: boolean;
 }
@@ -40,19 +40,21 @@ export const GameCanvas = ({ snake, food, gridSize, gameOver }: GameCanvasProps)
     }
 
     // Draw food with glow effect
-    ctx.shadowBlur = 15;
-    ctx.shadowColor = 'hsl(330 85% 60%)';
-    ctx.fillStyle = 'hsl(330 85% 60%)';
-    ctx.beginPath();
-    ctx.arc(
-      food.x * cellSize + cellSize / 2,
-      food.y * cellSize + cellSize / 2,
-      cellSize / 3,
-      0,
-      Math.PI * 2
-    );
-    ctx.fill();
-    ctx.shadowBlur = 0;
+    if (food) {
+      ctx.shadowBlur = 15;
+      ctx.shadowColor = 'hsl(330 85% 60%)';
+      ctx.fillStyle = 'hsl(330 85% 60%)';
+      ctx.beginPath();
+      ctx.arc(
+        food.x * cellSize + cellSize / 2,
+        food.y * cellSize + cellSize / 2,
+        cellSize / 3,
+        0,
+        Math.PI * 2
+      );
+      ctx.fill();
+      ctx.shadowBlur = 0;
+    }
 
     // Draw snake with gradient
     snake.forEach((segment, index) => {
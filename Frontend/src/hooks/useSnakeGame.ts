@@ -1,23 +1,24 @@
 import { useState, useEffect, useCallback, useRef } from 'react';
 import { GameMode } from '@/contexts/GameContext';
+import { Direction, Replay, ReplayRecorder, randomSeed } from '@/lib/replay';
 
 export interface Position {
   x: number;
   y: number;
 }
 
-type Direction = 'UP' | 'DOWN' | 'LEFT' | 'RIGHT';
-
 const GRID_SIZE = 20;
 const INITIAL_SPEED = 150; // ms per frame
+const INITIAL_SNAKE: Position[] = [
+  { x: 10, y: 10 },
+  { x: 9, y: 10 },
+  { x: 8, y: 10 },
+];
+const INITIAL_FOOD: Position = { x: 15, y: 15 };
 
 export const useSnakeGame = (mode: GameMode) => {
-  const [snake, setSnake] = useState<Position[]>([
-    { x: 10, y: 10 },
-    { x: 9, y: 10 },
-    { x: 8, y: 10 },
-  ]);
-  const [food, setFood] = useState<Position>({ x: 15, y: 15 });
+  const [snake, setSnake] = useState<Position[]>(INITIAL_SNAKE);
+  const [food, setFood] = useState<Position>(INITIAL_FOOD);
   const [direction, setDirection] = useState<Direction>('RIGHT');
   const [isPlaying, setIsPlaying] = useState(false);
   const [gameOver, setGameOver] = useState(false);
@@ -26,18 +27,11 @@ export const useSnakeGame = (mode: GameMode) => {
 
   const directionRef = useRef(direction);
   const requestedDirectionRef = useRef<Direction | null>(null);
-
-  // Generate random food position
-  const generateFood = useCallback((currentSnake: Position[]): Position => {
-    let newFood: Position;
-    do {
-      newFood = {
-        x: Math.floor(Math.random() * GRID_SIZE),
-        y: Math.floor(Math.random() * GRID_SIZE),
-      };
-    } while (currentSnake.some(segment => segment.x === newFood.x && segment.y === newFood.y));
-    return newFood;
-  }, []);
+  // The game loop reads and advances these; state mirrors them for rendering
+  const snakeRef = useRef(snake);
+  const foodRef = useRef(food);
+  // Seeded food placement plus the inputs, so the server can re-simulate the game
+  const recorderRef = useRef<ReplayRecorder | null>(null);
 
   // Check collision with self
   const checkSelfCollision = useCallback((head: Position, body: Position[]): boolean => {
@@ -61,6 +55,7 @@ export const useSnakeGame = (mode: GameMode) => {
     // Can't reverse direction
     if (opposites[directionRef.current] !== newDirection) {
       requestedDirectionRef.current = newDirection;
+      recorderRef.current?.turn(newDirection);
     }
   }, []);
 
@@ -69,66 +64,73 @@ export const useSnakeGame = (mode: GameMode) => {
     if (!isPlaying || gameOver) return;
 
     const gameLoop = setInterval(() => {
-      setSnake(prevSnake => {
-        // Apply requested direction at the start of each frame
-        if (requestedDirectionRef.current) {
-          directionRef.current = requestedDirectionRef.current;
-          requestedDirectionRef.current = null;
-        }
+      const prevSnake = snakeRef.current;
 
-        const head = { ...prevSnake[0] };
-
-        // Move head based on direction
-        switch (directionRef.current) {
-          case 'UP':
-            head.y -= 1;
-            break;
-          case 'DOWN':
-            head.y += 1;
-            break;
-          case 'LEFT':
-            head.x -= 1;
-            break;
-          case 'RIGHT':
-            head.x += 1;
-            break;
-        }
+      // Apply requested direction at the start of each frame
+      if (requestedDirectionRef.current) {
+        directionRef.current = requestedDirectionRef.current;
+        requestedDirectionRef.current = null;
+      }
 
-        // Handle wrapping or wall collision based on mode
-        if (mode === 'pass-through') {
-          head.x = (head.x + GRID_SIZE) % GRID_SIZE;
-          head.y = (head.y + GRID_SIZE) % GRID_SIZE;
-        } else if (checkWallCollision(head)) {
-          setGameOver(true);
-          setIsPlaying(false);
-          return prevSnake;
-        }
+      const head = { ...prevSnake[0] };
 
-        // Check self collision
-        if (checkSelfCollision(head, prevSnake)) {
-          setGameOver(true);
-          setIsPlaying(false);
-          return prevSnake;
-        }
+      // Move head based on direction
+      switch (directionRef.current) {
+        case 'UP':
+          head.y -= 1;
+          break;
+        case 'DOWN':
+          head.y += 1;
+          break;
+        case 'LEFT':
+          head.x -= 1;
+          break;
+        case 'RIGHT':
+          head.x += 1;
+          break;
+      }
 
-        const newSnake = [head, ...prevSnake];
+      // Handle wrapping or wall collision based on mode
+      if (mode === 'pass-through') {
+        head.x = (head.x + GRID_SIZE) % GRID_SIZE;
+        head.y = (head.y + GRID_SIZE) % GRID_SIZE;
+      } else if (checkWallCollision(head)) {
+        setGameOver(true);
+        setIsPlaying(false);
+        return;
+      }
 
-        // Check if ate food
-        if (head.x === food.x && head.y === food.y) {
-          setScore(prev => prev + 1);
-          setFood(generateFood(newSnake));
-          // Increase speed slightly
-          setSpeed(prev => Math.max(50, prev - 2));
-        } else {
-          newSnake.pop();
+      // Check self collision
+      if (checkSelfCollision(head, prevSnake)) {
+        setGameOver(true);
+        setIsPlaying(false);
+        return;
+      }
+
+      const newSnake = [head, ...prevSnake];
+      const currentFood = foodRef.current;
+      const recorder = recorderRef.current!;
+
+      // Check if ate food
+      if (head.x === currentFood.x && head.y === currentFood.y) {
+        setScore(prev => prev + 1);
+        const newFood = recorder.move(head, null);
+        if (newFood) {
+          foodRef.current = newFood;
+          setFood(newFood);
         }
+        // Increase speed slightly
+        setSpeed(prev => Math.max(50, prev - 2));
+      } else {
+        recorder.move(head, newSnake.pop()!);
+      }
 
-        return newSnake;
-      });
+      snakeRef.current = newSnake;
+      setSnake(newSnake);
     }, speed);
 
     return () => clearInterval(gameLoop);
-  }, [isPlaying, gameOver, food, speed, mode, generateFood, checkSelfCollision, checkWallCollision]);
+  }, [isPlaying, gameOver, speed, mode, checkSelfCollision, checkWallCollision]);
 
   // Keyboard controls
   useEffect(() => {
@@ -168,15 +170,14 @@ export const useSnakeGame = (mode: GameMode) => {
   }, [isPlaying, changeDirection]);
 
   const startGame = useCallback(() => {
-    setSnake([
-      { x: 10, y: 10 },
-      { x: 9, y: 10 },
-      { x: 8, y: 10 },
-    ]);
+    snakeRef.current = INITIAL_SNAKE;
+    setSnake(INITIAL_SNAKE);
     setDirection('RIGHT');
     directionRef.current = 'RIGHT';
     requestedDirectionRef.current = null;
-    setFood({ x: 15, y: 15 });
+    foodRef.current = INITIAL_FOOD;
+    setFood(INITIAL_FOOD);
+    recorderRef.current = new ReplayRecorder(randomSeed(), INITIAL_SNAKE, GRID_SIZE);
     setScore(0);
     setSpeed(INITIAL_SPEED);
     setGameOver(false);
@@ -193,6 +194,9 @@ export const useSnakeGame = (mode: GameMode) => {
     }
   }, [gameOver]);
 
+  // Null before the first game
+  const getReplay = useCallback((): Replay | null => recorderRef.current?.replay() ?? null, []);
+
   return {
     snake,
     food,
@@ -205,5 +209,6 @@ export const useSnakeGame = (mode: GameMode) => {
     pauseGame,
     resumeGame,
     changeDirection,
+    getReplay,
   };
 };
@@ -33,7 +33,8 @@ export interface UserStats {
 
 export interface GameFrame {
   snake: { x: number; y: number }[];
-  food: { x: number; y: number };
+  // null once the snake fills the grid
+  food: { x: number; y: number } | null;
   score: number;
   direction: 'UP' | 'DOWN' | 'LEFT' | 'RIGHT';
 }
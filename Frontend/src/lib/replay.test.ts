@@ -0,0 +1,55 @@
+import { describe, it, expect } from 'vitest';
+import { Cell, Direction, ReplayRecorder, mulberry32 } from './replay';
+
+const MOVES: Record<Direction, Cell> = { UP: { x: 0, y: -1 }, DOWN: { x: 0, y: 1 }, LEFT: { x: -1, y: 0 }, RIGHT: { x: 1, y: 0 } };
+const OPPOSITES: Record<Direction, Direction> = { UP: 'DOWN', DOWN: 'UP', LEFT: 'RIGHT', RIGHT: 'LEFT' };
+
+describe('mulberry32', () => {
+    it('matches the reference generator', () => {
+        let state = 1;
+        const outputs: number[] = [];
+        for (let i = 0; i < 3; i++) {
+            const [next, value] = mulberry32(state);
+            state = next;
+            outputs.push(value);
+        }
+        expect(outputs).toEqual([2693262067, 11749833, 2265367787]);
+    });
+});
+
+describe('ReplayRecorder', () => {
+    it('places food where the backend engine does', () => {
+        // A pass-through game steering straight at the food, as in useSnakeGame.
+        // Expected values come from Backend/app/engine.py with the same seed and inputs.
+        let snake: Cell[] = [{ x: 10, y: 10 }, { x: 9, y: 10 }, { x: 8, y: 10 }];
+        let food: Cell = { x: 15, y: 15 };
+        let direction: Direction = 'RIGHT';
+        const recorder = new ReplayRecorder(12345, snake, 20);
+        const foods: Cell[] = [];
+
+        for (let i = 0; i < 200; i++) {
+            const head = snake[0];
+            const wanted: Direction = food.x !== head.x ? (food.x > head.x ? 'RIGHT' : 'LEFT') : (food.y > head.y ? 'DOWN' : 'UP');
+            if (wanted !== direction && OPPOSITES[direction] !== wanted) {
+                recorder.turn(wanted);
+                direction = wanted;
+            }
+            const next = { x: (head.x + MOVES[direction].x + 20) % 20, y: (head.y + MOVES[direction].y + 20) % 20 };
+            expect(snake.some(cell => cell.x === next.x && cell.y === next.y)).toBe(false);
+            snake = [next, ...snake];
+            if (next.x === food.x && next.y === food.y) {
+                food = recorder.move(next, null)!;
+                foods.push(food);
+            } else {
+                recorder.move(next, snake.pop()!);
+            }
+        }
+
+        expect(foods.length).toBe(14);
+        expect(foods.slice(0, 8).map(cell => [cell.x, cell.y])).toEqual([[7, 19], [1, 6], [10, 9], [4, 19], [19, 9], [15, 6], [8, 1], [18, 14]]);
+        const replay = recorder.replay();
+        expect(replay.seed).toBe(12345);
+        expect(replay.ticks).toBe(200);
+        expect(replay.inputs.length).toBe(24);
+    });
+});
@@ -0,0 +1,101 @@
+// Replay recording for score verification (SCORE_VERIFICATION on the backend).
+//
+// The backend re-simulates a submitted game from its seed and inputs
+// (Backend/app/engine.py), so food must be placed exactly the way the engine
+// places it: cells not covered by the snake are kept in a dense list with a
+// position map (swap-remove), and new food is
+//   free[floor(next_u32() * free.length / 2^32)]
+// drawn from a mulberry32 generator seeded with the replay's seed.
+
+export type Direction = 'UP' | 'DOWN' | 'LEFT' | 'RIGHT';
+
+export interface Cell {
+  x: number;
+  y: number;
+}
+
+export interface ReplayInput {
+  tick: number;
+  direction: Direction;
+}
+
+export interface Replay {
+  seed: number;
+  ticks: number;
+  inputs: ReplayInput[];
+}
+
+/** One step of mulberry32: [new state, 32-bit output]. */
+export function mulberry32(state: number): [number, number] {
+  state = (state + 0x6d2b79f5) >>> 0;
+  let t = Math.imul(state ^ (state >>> 15), state | 1) >>> 0;
+  t = ((t + (Math.imul(t ^ (t >>> 7), t | 61) >>> 0)) >>> 0) ^ t;
+  return [state, (t ^ (t >>> 14)) >>> 0];
+}
+
+export function randomSeed(): number {
+  return crypto.getRandomValues(new Uint32Array(1))[0];
+}
+
+export class ReplayRecorder {
+  readonly seed: number;
+  ticks = 0;
+  readonly inputs: ReplayInput[] = [];
+  private rng: number;
+  private readonly free: number[];
+  private readonly position: number[];
+
+  /** `snake` is the starting snake, head first. */
+  constructor(seed: number, snake: Cell[], private readonly gridSize: number) {
+    this.seed = seed >>> 0;
+    this.rng = this.seed;
+    const cells = gridSize * gridSize;
+    this.free = Array.from({ length: cells }, (_, i) => i);
+    this.position = Array.from({ length: cells }, (_, i) => i);
+    for (const cell of snake) {
+      this.take(this.index(cell));
+    }
+  }
+
+  private index(cell: Cell): number {
+    return cell.y * this.gridSize + cell.x;
+  }
+
+  private take(cell: number): void {
+    const last = this.free.pop()!;
+    if (last !== cell) {
+      const i = this.position[cell];
+      this.free[i] = last;
+      this.position[last] = i;
+    }
+  }
+
+  /** A direction change the game accepted, requested after `ticks` moves. */
+  turn(direction: Direction): void {
+    this.inputs.push({ tick: this.ticks, direction });
+  }
+
+  /**
+   * A completed move. Pass the vacated tail cell, or null if the snake ate;
+   * returns the new food cell when it ate (null if the grid is full).
+   */
+  move(head: Cell, vacatedTail: Cell | null): Cell | null {
+    this.ticks += 1;
+    this.take(this.index(head));
+    if (vacatedTail !== null) {
+      const cell = this.index(vacatedTail);
+      this.position[cell] = this.free.length;
+      this.free.push(cell);
+      return null;
+    }
+    if (this.free.length === 0) return null;
+    const [state, value] = mulberry32(this.rng);
+    this.rng = state;
+    const cell = this.free[Math.floor((value * this.free.length) / 2 ** 32)];
+    return { x: cell % this.gridSize, y: Math.floor(cell / this.gridSize) };
+  }
+
+  replay(): Replay {
+    return { seed: this.seed, ticks: this.ticks, inputs: [...this.inputs] };
+  }
+}
@@ -1,4 +1,4 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { Header } from '@/components/Header';
 import { GameCanvas } from '@/components/GameCanvas';
@@ -21,6 +21,7 @@ export default function Game() {
   const {
     snake,
     food,
+    direction,
     isPlaying,
     gameOver,
     score,
@@ -28,27 +29,60 @@ export default function Game() {
     startGame,
     pauseGame,
     resumeGame,
+    getReplay,
   } = useSnakeGame(mode);
 
+  // Heartbeat the current score while playing (GET /players/active)
+  const scoreRef = useRef(score);
+  scoreRef.current = score;
+  useEffect(() => {
+    if (!isPlaying || !user) return;
+    const send = () => api.sendHeartbeat(scoreRef.current, mode).catch(() => {});
+    send();
+    const timer = setInterval(send, 5000);
+    return () => clearInterval(timer);
+  }, [isPlaying, mode, user]);
+
+  // Publish every frame to spectators (/players/{id}/watch) while a game runs
+  const streamRef = useRef<WebSocket | null>(null);
+  const closeStream = () => {
+    streamRef.current?.close();
+    streamRef.current = null;
+  };
+  useEffect(() => {
+    const stream = streamRef.current;
+    if (stream?.readyState === WebSocket.OPEN) {
+      stream.send(JSON.stringify({ snake, food, score, direction }));
+    }
+  }, [snake, food, score, direction]);
+  useEffect(() => {
+    if (gameOver) closeStream();
+  }, [gameOver]);
+  useEffect(() => closeStream, []);
+
   // Submit score when game is over
   useEffect(() => {
     if (gameOver && score > 0 && user) {
-      api.submitScore(score, mode);
+      api.submitScore(score, mode, getReplay());
       toast({
         title: 'Score Submitted!',
         description: `Your score of ${score} has been saved to the leaderboard.`,
       });
     }
-  }, [gameOver, score, mode, user, toast]);
+  }, [gameOver, score, mode, user, toast, getReplay]);
 
   const handleStart = () => {
     startGame();
     setHasStarted(true);
+    closeStream();
+    if (user) streamRef.current = api.openGameStream(user.id, mode);
   };
 
   const handleRestart = () => {
     startGame();
     setHasStarted(true);
+    closeStream();
+    if (user) streamRef.current = api.openGameStream(user.id, mode);
   };
 
   const togglePause = () => {
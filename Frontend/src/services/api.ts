@@ -1,4 +1,5 @@
 import { User, LeaderboardEntry, ActivePlayer, UserStats } from '../lib/mockBackend';
+import { Replay } from '../lib/replay';
 // Note: We are reusing types from mockBackend for now to avoid refactoring everything, 
 // but we should eventually move types to a shared location or generated file.
 // Ideally, we would generate these from OpenAPI, but for this task we'll match manually.
@@ -84,11 +85,27 @@ export const api = {
         return await res.json();
     },
 
-    async submitScore(score: number, mode: string) {
+    // With a replay the server can re-simulate the game (required when SCORE_VERIFICATION=required)
+    async submitScore(score: number, mode: string, replay?: Replay | null) {
         const token = localStorage.getItem('token');
         if (!token) return; // Must be logged in
 
         await fetch(`${API_Base_URL}/leaderboard`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'Authorization': `Bearer ${token}`
+            },
+            body: JSON.stringify(replay ? { score, mode, replay } : { score, mode })
+        });
+    },
+
+    // Sent every few seconds while a game is running, so spectators can find it
+    async sendHeartbeat(score: number, mode: string) {
+        const token = localStorage.getItem('token');
+        if (!token) return;
+
+        await fetch(`${API_Base_URL}/players/heartbeat`, {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
@@ -98,6 +115,16 @@ export const api = {
         });
     },
 
+    // One socket per game; each GameFrame sent on it goes out to the game's spectators
+    openGameStream(playerId: string, mode: string): WebSocket | null {
+        const token = localStorage.getItem('token');
+        if (!token) return null;
+
+        const scheme = window.location.protocol === 'https:' ? 'wss' : 'ws';
+        const query = new URLSearchParams({ token, mode });
+        return new WebSocket(`${scheme}://${window.location.host}${API_Base_URL}/players/${playerId}/play?${query}`);
+    },
+
     // Spectate
     async getActivePlayers(): Promise<ActivePlayer[]> {
         const res = await fetch(`${API_Base_URL}/players/active`);
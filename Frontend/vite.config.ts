@@ -25,6 +25,7 @@ export default defineConfig(({ mode }) => ({
       '/players': {
         target: 'http://127.0.0.1:8000',
         changeOrigin: true,
+        ws: true,
       }
     },
   },